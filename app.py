@@ -1,25 +1,118 @@
 import streamlit as st
-import pandas as pd
 import requests
 import os
 from datetime import datetime, timezone
 import time
+import uuid
+
+from scraper import ApiError, get_client
+from scraper.batch import parse_batch_csv
+from scraper.cache import ResultCache
+from scraper.config import ADMIN_API_KEYS, API_URL, DEFAULT_API_KEY
+from scraper.dedup import merge_duplicates
+from scraper.export import FORMATS, ExportCache, available_formats, export_bytes
+from scraper.jobs import JobRunner, JobStore
+from scraper.history import SearchHistory
+from scraper.leads import LeadStore
+from scraper.metrics import metrics
+from scraper.pager import CursorPager
+from scraper.results import get_result_store
+from scraper.quota import TIERS, QuotaExceeded, QuotaScheduler, Throttled
+from scraper.fanout import parse_areas, split_location
+from scraper.planner import plan_searches
+from scraper.search import batch_results, run_batch, run_fanout, run_refresh, run_search, start_paged_search
+from scraper.suppression import get_suppression_list
+from scraper.status import StatusCache, account_from_status
+
+# pandas is imported where results are rendered, so first paint doesn't wait on it
+
+# Phase timings for this run (no-ops unless SCRAPER_METRICS=1)
+profile = metrics.rerun()
+profile.lap("setup")
+
+# ─────────────────────────────────────────────
+# UI Setup - drawn before any backend call so the page never waits on /status
+st.set_page_config(layout="wide", page_title="Cold Email Scraper Pro", page_icon="📬")
+st.title("📬 Cold Email Scraper Pro")
 
 # ─────────────────────────────────────────────
 # Config
-API_URL = "https://cold-email-scraper.fly.dev"
-API_KEY = os.getenv("API_KEY", "free_tier_default_key_12345")  # Use a clearly different key
+# API_URL comes from scraper.config (environment variable of the same name)
+API_KEY = os.getenv("API_KEY", DEFAULT_API_KEY)  # Use a clearly different key
 if not API_KEY:
     st.error("API_KEY not configured")
     st.info("Using fallback API key for testing")
-    API_KEY = "free_tier_default_key_12345"
+    API_KEY = DEFAULT_API_KEY
+
+# Shared keep-alive connection pool for every backend call
+client = get_client(API_URL)
+
+# On-disk cache of previous searches, shared by every session on this server
+@st.cache_resource
+def get_result_cache():
+    return ResultCache()
+
+result_cache = get_result_cache()
+
+# /status answers shared across sessions and browser tabs, keyed by API key
+STATUS_TTL = 30  # seconds before a cached status is refreshed in the background
+
+@st.cache_resource
+def get_status_cache():
+    return StatusCache(client, ttl=STATUS_TTL)
+
+status_cache = get_status_cache()
+
+# Every lead ever fetched, deduplicated across searches and sessions
+@st.cache_resource
+def get_lead_store():
+    return LeadStore()
+
+lead_store = get_lead_store()
+
+# Every search each browser ran, with its yield, for type-ahead and replay
+@st.cache_resource
+def get_search_history():
+    return SearchHistory()
+
+search_history = get_search_history()
+
+# Result sets of every session under one memory budget; sessions keep only
+# their results_version as a handle, and sets that don't fit spill to disk
+result_store = get_result_store()
+
+# Do-not-contact list for the whole server, memory-mapped once per process
+suppression = get_suppression_list()
 
-TIERS = {
-    "free": {"daily": 3, "monthly": 10},
-    "starter": {"daily": 50, "monthly": 300},
-    "pro": {"daily": 100, "monthly": 1000},
-    "enterprise": {"daily": 500, "monthly": 5000}  # Updated from unlimited to reasonable limits
-}
+# Serialized downloads, built on first click and reused per result set version
+@st.cache_resource
+def get_export_cache():
+    return ExportCache()
+
+export_cache = get_export_cache()
+
+# Plan quota and burst smoothing per API key, shared by every session, job and
+# batch row on this server (the shared free-tier key is scheduled per browser,
+# see `quota` below)
+SEARCH_SLOT_WAIT = 30  # seconds a search waits for a slot before giving up
+
+@st.cache_resource
+def get_quota_scheduler():
+    return QuotaScheduler()
+
+quota_scheduler = get_quota_scheduler()
+
+# Background searches, run on a shared worker pool and kept in SQLite so they
+# survive reruns and reloads
+JOB_POLL_INTERVAL = 2  # seconds between job list refreshes while jobs are active
+
+@st.cache_resource
+def get_job_runner():
+    return JobRunner(client, JobStore(), cache=result_cache, lead_store=lead_store,
+                     on_finish=lambda api_key, job_id: status_cache.invalidate(api_key), scheduler=quota_scheduler,
+                     history=search_history)
+
+job_runner = get_job_runner()
 
 # ─────────────────────────────────────────────
 # Session State Setup
@@ -31,10 +124,8 @@ if "premium" not in st.session_state:
     st.session_state.premium = False
 if "api_key" not in st.session_state:
     st.session_state.api_key = API_KEY  # Use default API key for free tier
-if "last_results" not in st.session_state:
-    st.session_state.last_results = []
-if "search_history" not in st.session_state:
-    st.session_state.search_history = []
+if "results_count" not in st.session_state:
+    st.session_state.results_count = 0
 # Add explicit control flag
 if "status_checked" not in st.session_state:
     st.session_state.status_checked = False
@@ -46,6 +137,44 @@ if "current_page" not in st.session_state:
     st.session_state.current_page = 0
 if "results_per_page" not in st.session_state:
     st.session_state.results_per_page = 10
+if "pager" not in st.session_state:
+    st.session_state.pager = None
+# Changes whenever the results are replaced; the session's handle into
+# result_store and the key of per-result-set caches
+if "results_version" not in st.session_state:
+    st.session_state.results_version = uuid.uuid4().hex
+# Background jobs belong to this browser; the id rides in the URL so a
+# reload (or a bookmark) finds them again
+if "sid" not in st.query_params:
+    st.query_params["sid"] = uuid.uuid4().hex[:16]
+job_owner = st.query_params["sid"]
+# Free users share one API key; give each browser its own slots for it
+quota = quota_scheduler.scoped(job_owner)
+
+def set_results(results, pager=None, lead_states=None):
+    # A pager replaces the stored list for server-paginated result sets
+    if st.session_state.get("pager") is not None:
+        st.session_state.pager.close()
+    result_store.release(st.session_state.results_version)
+    st.session_state.pager = pager
+    st.session_state.results_version = uuid.uuid4().hex
+    # Leads on the suppression list never reach the table or an export
+    results, lead_states, st.session_state.results_suppressed = suppression.filter(results, lead_states)
+    # lead_states: "new" / "changed" / "seen" per lead, from the lead index at fetch time
+    result_store.put(st.session_state.results_version, results, lead_states)
+    st.session_state.results_count = len(results)
+    st.session_state.current_page = 0
+
+def ingest_results(results, source=""):
+    # Index the leads before showing them so "only new" can be answered
+    with profile.phase("ingest"):
+        set_results(results, lead_states=lead_store.merge(results, source))
+
+def get_results_frame(only_new=False):
+    # Typed frame and aggregates are built once per result set, not per rerun;
+    # None once the store has let go of an abandoned set
+    with profile.phase("results_frame"):
+        return result_store.frame(st.session_state.results_version, only_new)
 
 # ─────────────────────────────────────────────
 # Fetch current premium tier
@@ -62,52 +191,29 @@ def fetch_status():
         
     try:
         with st.spinner("Checking account status..."):
-            headers = {
-                "X-API-Key": st.session_state.api_key
-            }
-            
-            r = requests.get(f"{API_URL}/status", headers=headers, timeout=10)
-            if r.ok:
-                data = r.json()
-                tier = data.get("tier", "free")
-                
-                # Force free tier ONLY for default API key
-                if st.session_state.api_key == API_KEY:
-                    tier = "free"
-                
-                st.session_state.premium_tier = tier
-                st.session_state.premium = tier != "free"
-                st.session_state.usage = data.get("usage", {"daily": 0, "monthly": 0})
-                st.session_state.reset = data.get("reset", {})
+            r = status_cache.get(st.session_state.api_key)
+            # Free tier is forced for the default key, and an unknown default
+            # key (401) or missing /status (404) falls back to free defaults
+            account = account_from_status(r.status_code, r.data, st.session_state.api_key)
+            if account is not None:
+                st.session_state.premium_tier = account["tier"]
+                st.session_state.premium = account["tier"] != "free"
+                st.session_state.usage = account["usage"]
+                st.session_state.reset = account["reset"]
                 st.session_state.status_checked = True
+                quota.observe(st.session_state.api_key, account["tier"], account["usage"], account["reset"])
+            if r.ok:
                 return True
             elif r.status_code == 401:
-                # Invalid API key - use defaults ONLY if not already premium
-                if st.session_state.api_key == API_KEY:
-                    st.session_state.premium_tier = "free"
-                    st.session_state.premium = False
-                    st.session_state.usage = {"daily": 0, "monthly": 0}
-                    st.session_state.reset = {}
-                    st.session_state.status_checked = True
+                if account is not None:
                     st.warning("⚠️ API key not recognized - using free tier")
                 return False
             elif r.status_code == 404:
-                # Status endpoint doesn't exist - set defaults ONLY for free API key
-                if st.session_state.api_key == API_KEY:
-                    st.session_state.premium_tier = "free"
-                    st.session_state.premium = False
-                    st.session_state.usage = {"daily": 0, "monthly": 0}
-                    st.session_state.reset = {}
-                    st.session_state.status_checked = True
+                if account is not None:
                     st.warning("⚠️ Status endpoint not available - using defaults")
                 return False
             else:
-                error_detail = ""
-                try:
-                    error_data = r.json()
-                    error_detail = error_data.get("error", "Unknown error")
-                except:
-                    error_detail = r.text[:200]
+                error_detail = r.data.get("error") or r.text or "Unknown error"
                 
                 st.error(f"Failed to fetch status: HTTP {r.status_code} - {error_detail}")
                 return False
@@ -121,26 +227,30 @@ def fetch_status():
         st.error(f"❌ Unexpected error: {str(e)}")
         return False
 
-# Only fetch status if not already checked OR if API key changed
+def mark_status_checked():
+    st.session_state.last_checked_api_key = current_api_key
+    st.session_state.last_status_check = time.time()
+
+# Only fetch status if not already checked OR if API key changed. Every
+# session reads through the shared status cache, so this only reaches the
+# backend when the key's cached status is missing or stale.
+profile.lap("status")
 current_api_key = st.session_state.get("api_key", API_KEY)
 last_checked_key = st.session_state.get("last_checked_api_key", "")
 
-# Add caching for status checks
-@st.cache_data(ttl=30)  # Cache for 30 seconds
-def fetch_status_cached(api_key):
-    return fetch_status()
-
-# Use cached version when appropriate
-if (not st.session_state.get("status_checked", False) or 
-    current_api_key != last_checked_key or
-    time.time() - st.session_state.get("last_status_check", 0) > 30):
-    fetch_status()
-    st.session_state.last_status_check = time.time()
+status_due = (not st.session_state.get("status_checked", False) or 
+              current_api_key != last_checked_key or
+              time.time() - st.session_state.get("last_status_check", 0) > STATUS_TTL)
+if status_due:
+    if status_cache.peek(current_api_key) is not None:
+        # Already known (possibly from another tab) - apply it right away
+        fetch_status()
+        mark_status_checked()
+        status_due = False
+    else:
+        # Fetch in the background; the result is applied after the page is drawn
+        status_cache.prefetch(current_api_key)
 
-# ─────────────────────────────────────────────
-# UI Setup
-st.set_page_config(layout="wide", page_title="Cold Email Scraper Pro", page_icon="📬")
-st.title("📬 Cold Email Scraper Pro")
 tier = st.session_state.premium_tier      
 
 reset = st.session_state.get("reset", {})
@@ -158,10 +268,94 @@ def time_until(iso_str):
     except:
         return "unknown"
 
+# Minimum seconds between live table refreshes while a search streams in
+STREAM_RENDER_INTERVAL = 0.5
+
+def render_live_results(leads, metrics_slot, table_slot):
+    with metrics_slot.container():
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Total Leads", len(leads))
+        with col2:
+            st.metric("With Email", sum(1 for lead in leads if lead.get('email') is not None))
+        with col3:
+            st.metric("With Phone", sum(1 for lead in leads if lead.get('phone') is not None))
+    table_slot.dataframe(leads, use_container_width=True, hide_index=True)
+
+# Usage metrics - drawn into a sidebar slot so the deferred status check can
+# refresh them in place
+def render_usage_metrics(limits):
+    usage_daily = st.session_state.usage.get('daily', 0)
+    usage_monthly = st.session_state.usage.get('monthly', 0)
+    
+    # Daily usage
+    daily_percentage = min(usage_daily / limits['daily'], 1.0) if limits['daily'] != float('inf') else 0
+    st.metric(
+        "🔍 Daily Searches", 
+        f"{usage_daily}/{limits['daily'] if limits['daily'] != float('inf') else '∞'}"
+    )
+    if limits['daily'] != float('inf'):
+        st.progress(daily_percentage)
+        if daily_percentage >= 0.8:
+            st.warning(f"⚠️ {int((1-daily_percentage)*limits['daily'])} searches left today")
+    
+    # Monthly usage
+    monthly_percentage = min(usage_monthly / limits['monthly'], 1.0) if limits['monthly'] != float('inf') else 0
+    st.metric(
+        "🗓️ Monthly Searches", 
+        f"{usage_monthly}/{limits['monthly'] if limits['monthly'] != float('inf') else '∞'}"
+    )
+    if limits['monthly'] != float('inf'):
+        st.progress(monthly_percentage)
+        if monthly_percentage >= 0.8:
+            st.warning(f"⚠️ {int((1-monthly_percentage)*limits['monthly'])} searches left this month")
+    
+    # Reset times
+    if st.session_state.get("reset"):
+        reset = st.session_state.reset
+        if "daily" in reset:
+            st.caption(f"🔁 Daily limit resets {time_until(reset['daily'])}")
+        if "monthly" in reset:
+            st.caption(f"📅 Monthly limit resets {time_until(reset['monthly'])}")
+
+# ─────────────────────────────────────────────
+# Debug panel - phase timings and backend latencies, only with SCRAPER_METRICS=1
+def render_debug_panel():
+    if not metrics.enabled:
+        return
+    with debug_slot.container():
+        with st.expander("🛠️ Debug"):
+            if profile.total is not None:
+                st.caption(f"Last full rerun: {profile.total * 1000:.0f} ms")
+            st.dataframe(profile.rows(), hide_index=True, use_container_width=True)
+            st.markdown("**Backend calls**")
+            api_rows = metrics.summary("api_request_seconds") + metrics.summary("api_stream_seconds")
+            if api_rows:
+                st.dataframe(api_rows, hide_index=True, use_container_width=True)
+            else:
+                st.caption("No backend calls yet")
+            st.markdown("**Phases across reruns**")
+            st.dataframe(metrics.summary("phase_seconds") + metrics.summary("export_seconds"),
+                         hide_index=True, use_container_width=True)
+            if st.session_state.get("last_api_response"):
+                st.markdown("**Last /scrape response**")
+                st.json(st.session_state.last_api_response)
+            col1, col2 = st.columns(2)
+            with col1:
+                st.download_button("Prometheus", metrics.to_prometheus(), file_name="scraper_metrics.prom",
+                                   mime="text/plain", on_click="ignore")
+            with col2:
+                st.download_button("JSON", metrics.to_json(), file_name="scraper_metrics.json",
+                                   mime="application/json", on_click="ignore")
+
 # ─────────────────────────────────────────────
 # Sidebar
+profile.lap("sidebar")
 with st.sidebar:
     st.subheader("📊 Account Status")
+    status_slot = st.empty()
+    if status_due and not st.session_state.status_checked:
+        status_slot.caption("⏳ Checking account status...")
     
     # Status indicator
     if st.session_state.premium:
@@ -188,14 +382,7 @@ with st.sidebar:
             if license_key:
                 try:
                     with st.spinner("Validating license key..."):
-                        resp = requests.post(
-                            f"{API_URL}/activate",
-                            json={"key": license_key},
-                            headers={
-                                "X-API-Key": license_key
-                            },
-                            timeout=30  # Increased timeout for Gumroad API calls
-                        )
+                        resp = client.activate(license_key)
                         
                         if resp.status_code == 200:
                             data = resp.json()
@@ -208,6 +395,7 @@ with st.sidebar:
                                 st.session_state.premium = True
                                 st.session_state.premium_tier = data["tier"]
                                 st.session_state.status_checked = False  # Force status refresh
+                                status_cache.invalidate(data["api_key"])
                                 st.balloons()
                                 time.sleep(2)
                                 st.rerun()
@@ -244,12 +432,9 @@ with st.sidebar:
         if st.session_state.premium:
             if st.button("🚪 End Session", type="secondary", help="End your premium session"):
                 try:
-                    resp = requests.post(
-                        f"{API_URL}/logout",
-                        headers={
-                            "X-API-Key": st.session_state.api_key  # Use current API key, not the fallback
-                        }
-                    )
+                    # Use current API key, not the fallback
+                    resp = client.logout(st.session_state.api_key)
+                    status_cache.invalidate(st.session_state.api_key)
                     if resp.status_code == 200:
                         data = resp.json()
                         if data.get("success"):
@@ -270,6 +455,7 @@ with st.sidebar:
                 except Exception as e:
                     st.error(f"🚨 Connection error: {str(e)}")
                     # Force reset even if server call fails
+                    status_cache.invalidate(st.session_state.api_key)
                     st.session_state.api_key = API_KEY
                     st.session_state.premium = False
                     st.session_state.premium_tier = "free"
@@ -295,18 +481,13 @@ with st.sidebar:
                 if st.button("Login", type="primary"):
                     if premium_key:
                         try:
-                            resp = requests.post(
-                                f"{API_URL}/login",
-                                json={"premium_key": premium_key},
-                                headers={
-                                    "X-API-Key": premium_key
-                                }
-                            )
+                            resp = client.login(premium_key)
                             if resp.status_code == 200:
                                 data = resp.json()
                                 if data.get("success"):
                                     # Save the premium API key
                                     st.session_state.api_key = premium_key
+                                    status_cache.invalidate(premium_key)
                                     st.session_state.premium = True
                                     st.session_state.premium_tier = data["tier"]
                                     st.session_state.show_login = False
@@ -331,39 +512,10 @@ with st.sidebar:
     st.divider()
     
     # Usage metrics
-    usage_daily = st.session_state.usage.get('daily', 0)
-    usage_monthly = st.session_state.usage.get('monthly', 0)
     limits = TIERS.get(tier, TIERS['free'])
-    
-    # Daily usage
-    daily_percentage = min(usage_daily / limits['daily'], 1.0) if limits['daily'] != float('inf') else 0
-    st.metric(
-        "🔍 Daily Searches", 
-        f"{usage_daily}/{limits['daily'] if limits['daily'] != float('inf') else '∞'}"
-    )
-    if limits['daily'] != float('inf'):
-        st.progress(daily_percentage)
-        if daily_percentage >= 0.8:
-            st.warning(f"⚠️ {int((1-daily_percentage)*limits['daily'])} searches left today")
-    
-    # Monthly usage
-    monthly_percentage = min(usage_monthly / limits['monthly'], 1.0) if limits['monthly'] != float('inf') else 0
-    st.metric(
-        "🗓️ Monthly Searches", 
-        f"{usage_monthly}/{limits['monthly'] if limits['monthly'] != float('inf') else '∞'}"
-    )
-    if limits['monthly'] != float('inf'):
-        st.progress(monthly_percentage)
-        if monthly_percentage >= 0.8:
-            st.warning(f"⚠️ {int((1-monthly_percentage)*limits['monthly'])} searches left this month")
-    
-    # Reset times
-    if st.session_state.get("reset"):
-        reset = st.session_state.reset
-        if "daily" in reset:
-            st.caption(f"🔁 Daily limit resets {time_until(reset['daily'])}")
-        if "monthly" in reset:
-            st.caption(f"📅 Monthly limit resets {time_until(reset['monthly'])}")
+    usage_slot = st.empty()
+    with usage_slot.container():
+        render_usage_metrics(limits)
     
     st.divider()
     
@@ -399,9 +551,45 @@ with st.sidebar:
     
     # Utility section at bottom
     st.divider()
+    st.caption(f"🗂️ Lead index: {len(lead_store)} businesses from all searches")
+
+    # Do-not-contact list: built into an on-disk index once, then checked on
+    # every result set by every session
+    with st.expander("🚫 Suppression List"):
+        suppression_info = suppression.info()
+        if suppression_info:
+            built = datetime.fromtimestamp(suppression_info["built"]).strftime("%Y-%m-%d %H:%M")
+            st.caption(f"**{suppression_info['name'] or 'Uploaded list'}** · {suppression_info['entries']:,} entries "
+                       f"({suppression_info['emails']:,} emails, {suppression_info['phones']:,} phones, "
+                       f"{suppression_info['domains']:,} domains) · built {built}")
+        else:
+            st.caption("No list yet - leads are shown and exported unfiltered.")
+        # The list applies to everyone on this server, so only admin keys may change it
+        if st.session_state.api_key not in ADMIN_API_KEYS:
+            st.caption("🔒 Managed by the server admin.")
+        else:
+            suppression_file = st.file_uploader(
+                "Emails, phones or domains", type=["csv", "txt"], key="suppression_file",
+                help="One per line or in CSV cells; replaces the current list for everyone on this server"
+            )
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.button("🔨 Build", disabled=suppression_file is None):
+                    with st.spinner("Indexing suppression list..."):
+                        try:
+                            built_info = suppression.build(suppression_file, suppression_file.name)
+                        except (ValueError, UnicodeDecodeError) as e:
+                            st.error(f"❌ Could not read the list: {str(e)}")
+                        else:
+                            st.success(f"✅ {built_info['entries']:,} entries indexed")
+                            st.caption("Applies to new results; run the search again to filter the current ones.")
+            with col2:
+                if st.button("🗑️ Remove", disabled=suppression_info is None):
+                    suppression.clear()
+                    st.rerun()
+
     if st.button("🧹 Clear Results", help="Clear previous search results"):
-        st.session_state.last_results = []
-        st.session_state.search_history = []
+        set_results([])
         st.success("Previous results cleared")
         time.sleep(1)
         st.rerun()
@@ -413,316 +601,799 @@ with st.sidebar:
         st.session_state.premium_tier = "free"
         st.session_state.usage = {"daily": 0, "monthly": 0}
         st.session_state.reset = {}
-        st.session_state.last_results = []
-        st.session_state.search_history = []
+        set_results([])
         st.session_state.status_checked = False  # Add this line
         if "show_login" in st.session_state:
             del st.session_state.show_login
         st.success("Session reset to free tier")
         time.sleep(1)
         st.rerun()
+    
+    # Filled at the end of the run, once every phase has been timed
+    debug_slot = st.empty()
 
 # ─────────────────────────────────────────────
 # Tabs
 tab1, tab2 = st.tabs(["🔍 Search", "💎 Premium"])
+profile.lap("search_tab")
 
 # ────────────── SEARCH TAB ──────────────
 with tab1:
-    # In the search form, add quick selections
-    with st.form("search_form"):
-        # Previous searches dropdown
-        if st.session_state.search_history:
-            recent_searches = [f"{h['keyword']} in {h['location']}" for h in st.session_state.search_history[-5:]]
-            selected_recent = st.selectbox("Recent Searches", [""] + recent_searches)
-            if selected_recent:
-                recent_data = next(h for h in st.session_state.search_history if f"{h['keyword']} in {h['location']}" == selected_recent)
-                keyword = st.text_input("Business Type", value=recent_data['keyword'])
-                location = st.text_input("Location", value=recent_data['location'])
+    # Past searches of this browser, kept across reloads; a stored search is
+    # shown again from the lead index without a new /scrape call
+    def use_past_search(entry):
+        st.session_state.search_keyword = entry["keyword"]
+        st.session_state.search_location = entry["location"]
+    
+    def describe_past_search(entry):
+        when = datetime.fromtimestamp(entry["created"]).strftime("%b %d %H:%M")
+        return (f"{entry['keyword']} in {entry['location']} · {entry['returned']}/{entry['requested']} leads · "
+                f"{entry['email_rate']:.0%} with email · {when}")
+    
+    past_searches = search_history.recent(job_owner, limit=1)
+    if past_searches:
+        with st.expander("🕘 Search History"):
+            history_query = st.text_input("Find a past search", placeholder="Start typing a keyword or location",
+                                          key="history_query")
+            matches = search_history.search(job_owner, history_query, limit=20)
+            if not matches:
+                st.caption("No past searches match.")
             else:
-                keyword = st.text_input("Business Type", placeholder="e.g. dentist")
-                location = st.text_input("Location", placeholder="e.g. New York")
-        else:
-            keyword = st.text_input("Business Type", placeholder="e.g. dentist")
-            location = st.text_input("Location", placeholder="e.g. New York")
-
-        max_map = {"free": 20, "starter": 50, "pro": 100, "enterprise": 200}
-        max_results = max_map.get(tier, 20)
+                selected_past = st.selectbox("Past searches", matches, format_func=describe_past_search,
+                                             key="history_selected")
+                col_hist1, col_hist2, col_hist3, col_hist4 = st.columns([1, 1, 1, 1])
+                with col_hist1:
+                    show_past = st.button("📂 Show stored results", disabled=not selected_past["returned"])
+                with col_hist2:
+                    refresh_past = st.button("🔁 Only new leads", help="Run this search again and keep just the leads "
+                                                                     "that are new or changed since last time")
+                with col_hist3:
+                    st.button("✏️ Use in search form", on_click=use_past_search, args=(selected_past,))
+                with col_hist4:
+                    if st.button("🗑️ Clear history"):
+                        search_history.clear(job_owner)
+                        st.rerun()
+                if refresh_past:
+                    entry = search_history.get(selected_past["id"], job_owner)
+                    if entry is None:
+                        st.warning("⚠️ This search is no longer in your history.")
+                    else:
+                        since = datetime.fromtimestamp(entry["created"], timezone.utc).isoformat()
+                        try:
+                            with st.spinner("Checking for new leads..."):
+                                outcome = run_refresh(
+                                    client, st.session_state.api_key, entry["keyword"], entry["location"],
+                                    entry["requested"], entry["lead_keys"], tier, store=lead_store, since=since,
+                                    scheduler=quota, wait=SEARCH_SLOT_WAIT
+                                )
+                        except QuotaExceeded as e:
+                            st.error(f"🚫 {e.period.title()} limit of {e.limit} searches reached! Upgrade to premium for more searches.")
+                            st.stop()
+                        except Throttled as e:
+                            st.warning(f"⏳ {e}")
+                            st.stop()
+                        except ApiError as e:
+                            st.error(f"❌ API Error ({e.status_code}): {e.message}")
+                            st.stop()
+                        except Exception as e:
+                            st.error(f"❌ Search request failed: {str(e)}")
+                            st.stop()
+                        search_history.record(job_owner, entry["keyword"], entry["location"], entry["requested"],
+                                              outcome["fetched"], source="refresh", lead_keys=outcome["lead_keys"])
+                        set_results(outcome["results"], lead_states=outcome["lead_states"])
+                        st.session_state.status_checked = False
+                        status_cache.invalidate(st.session_state.api_key)
+                        changes = outcome["changes"]
+                        removed = f", {changes['removed']} no longer listed" if changes["removed"] else ""
+                        st.success(f"🔁 {changes['new']} new and {changes['changed']} changed leads "
+                                   f"({changes['unchanged']} unchanged{removed})")
+                if show_past:
+                    entry = search_history.get(selected_past["id"], job_owner)
+                    leads = lead_store.get(entry["lead_keys"]) if entry else []
+                    set_results(leads)
+                    if len(leads) < selected_past["returned"]:
+                        st.warning(f"⚠️ Only {len(leads)} of {selected_past['returned']} leads are still in the lead index.")
+                    else:
+                        st.success(f"📂 Showing {len(leads)} stored leads - no search used.")
+    
+    with st.form("search_form"):
+        keyword = st.text_input("Business Type", placeholder="e.g. dentist", key="search_keyword")
+        location = st.text_input("Location", placeholder="e.g. New York", key="search_location")
 
-        # Set sensible defaults based on tier
-        default_map = {"free": 10, "starter": 25, "pro": 50, "enterprise": 100}
-        default_value = default_map.get(tier, 10)
+        max_results = limits['max_count']
+        default_value = limits['default_count']
         
         count = st.slider("Number of Results", 5, max_results, default_value)
+        stream_results = st.checkbox("⚡ Show leads as they arrive", value=True,
+                                     help="Stream results from the server instead of waiting for the full list")
+        bypass_cache = st.checkbox("♻️ Bypass cache", value=False,
+                                   help="Always run a fresh search, even if this search was run recently")
+        run_in_background = st.checkbox("🕒 Run in background", value=False,
+                                        help="Queue the search and keep browsing - results wait under Background Jobs, even after a page reload")
         submitted = st.form_submit_button("🚀 Find Leads")
 
     if submitted:
         if not keyword or not location:
             st.warning("Please enter both keyword and location.")
+        elif run_in_background:
+            # Jobs still queued will need a search too; running ones are
+            # already counted as in flight by the scheduler
+            queued = sum(job["state"] == "queued" for job in job_runner.active(job_owner))
+            try:
+                quota.check(st.session_state.api_key, tier, needed=queued + 1)
+            except QuotaExceeded:
+                st.error("🚫 Search limit reached for your plan (including queued jobs). Upgrade to premium for more searches.")
+            else:
+                job_runner.submit(job_owner, st.session_state.api_key, keyword, location, count, tier,
+                                  bypass_cache=bypass_cache, stream=stream_results)
+                st.success(f"🕒 Queued \"{keyword} in {location}\" - follow it under Background Jobs below.")
         else:
-            # Check limits on frontend before making request
-            if not st.session_state.premium:
-                current_daily = st.session_state.usage.get('daily', 0)
-                current_monthly = st.session_state.usage.get('monthly', 0)
-                
-                if current_daily >= 3:
-                    st.error("🚫 Daily limit of 3 searches reached! Upgrade to premium for more searches.")
+            # Leads are drawn as they arrive so a streaming backend shows the
+            # first rows within seconds; the full table follows below
+            live_metrics = st.empty()
+            live_table = st.empty()
+            last_render = [0.0]
+            
+            def show_progress(leads):
+                if time.monotonic() - last_render[0] >= STREAM_RENDER_INTERVAL:
+                    render_live_results(leads, live_metrics, live_table)
+                    last_render[0] = time.monotonic()
+            
+            try:
+                # Repeat searches are answered from the result cache and don't
+                # use up the plan's quota, identical ones already running are
+                # joined, and live ones may queue briefly behind other
+                # searches on the same key
+                with st.spinner("Searching..."), profile.phase("scrape"):
+                    outcome = run_search(
+                        client, st.session_state.api_key, keyword, location, count, tier,
+                        cache=result_cache, bypass_cache=bypass_cache, stream=stream_results,
+                        scheduler=quota, wait=SEARCH_SLOT_WAIT, on_lead=show_progress
+                    )
+            except QuotaExceeded as e:
+                st.error(f"🚫 {e.period.title()} limit of {e.limit} searches reached! Upgrade to premium for more searches.")
+                if e.period == "daily":
                     st.info("💡 Your daily limit will reset at midnight UTC.")
-                    st.stop()
-                    
-                if current_monthly >= 10:
-                    st.error("🚫 Monthly limit of 10 searches reached! Upgrade to premium for more searches.")
+                else:
                     st.info("💡 Your monthly limit will reset next month.")
-                    st.stop()
+                st.stop()
+            except Throttled as e:
+                st.warning(f"⏳ {e}")
+                st.stop()
+            except ApiError as e:
+                st.session_state.last_api_response = {
+                    "status": e.status_code, "error": e.message, "body": e.data or e.text
+                }
+                st.error(f"❌ API Error ({e.status_code}): {e.message}")
+                render_debug_panel()
+                st.stop()
+            except ValueError:
+                st.error("❌ Invalid JSON response from server.")
+                st.stop()
+            except Exception as e:
+                st.error(f"❌ Search request failed: {str(e)}")
+                st.stop()
+            finally:
+                live_metrics.empty()
+                live_table.empty()
             
-            with st.spinner("Searching..."):
-                try:
-                    headers = {
-                        "X-API-Key": st.session_state.api_key
-                    }
-                    
-                    # Add debug info (remove this after testing)
-                    st.write(f"🔍 Debug: Requesting {count} results for '{keyword}' in '{location}'")
-                    
-                    resp = requests.post(
-                        f"{API_URL}/scrape",
-                        json={"keyword": keyword, "location": location, "count": count},
-                        headers=headers,
-                        timeout=120  # Increased from 60 to 120 seconds
-                    )
-                    
-                    # Add this debug info after getting the response
-                    try:
-                        data = resp.json()
-                        results = data.get("results", [])
-                        st.write(f"🔍 Debug: API returned {len(results)} results (requested {count})")
-                        
-                        # Show the API response data for debugging
-                        with st.expander("API Response Debug"):
-                            st.json({
-                                "requested": data.get("requested"),
-                                "returned": data.get("returned"),
-                                "message": data.get("message"),
-                                "usage": data.get("usage")
-                            })
-                            
-                    except Exception:
-                        st.error("❌ Invalid JSON response from server.")
-                        st.stop()
-
-                    if resp.status_code != 200 or "error" in data:
-                        error_msg = data.get("error", "Unknown error")
-                        st.error(f"❌ API Error ({resp.status_code}): {error_msg}")
-                        with st.expander("Debug Info"):
-                            st.code(resp.text)
-                        st.stop()
-
-                    # Update usage from API response
-                    st.session_state.usage = data.get("usage", st.session_state.usage)
-                    
-                    # Force refresh status to get updated usage counters
-                    st.session_state.status_checked = False
-                    
-                    results = data.get("results", [])
-                    st.session_state.last_results = results
-                    
-                    # Reset pagination when new search is performed
-                    st.session_state.current_page = 0
-
-                    # Add to search history here (after results is defined)
-                    if results:
-                        search_entry = {
-                            "keyword": keyword,
-                            "location": location,
-                            "timestamp": datetime.now().isoformat(),
-                            "count": len(results)
-                        }
-                        st.session_state.search_history.append(search_entry)
-                        # Keep only last 10 searches
-                        st.session_state.search_history = st.session_state.search_history[-10:]
+            results = outcome["results"]
+            data = outcome["summary"]
+            ingest_results(results, f"{keyword} in {location}")
+            search_history.record(job_owner, keyword, location, count, results, cached=outcome["cached"])
+            
+            if outcome["cached"]:
+                if results:
+                    st.success(f"⚡ Loaded {len(results)} cached leads - no search used. Tick \"Bypass cache\" to refresh.")
+                else:
+                    st.info("🔍 No leads found for this search (cached).")
+            elif outcome["shared"]:
+                # Someone on this server was running the same search; their
+                # call answered ours, so no search was used here
+                st.success(f"🤝 Joined an identical search already running - {len(results)} leads, no search used.")
+            else:
+                # Shown in the debug panel
+                st.session_state.last_api_response = {
+                    "requested": data.get("requested"),
+                    "returned": data.get("returned"),
+                    "message": data.get("message"),
+                    "usage": data.get("usage")
+                }
+                
+                # Update usage from API response
+                st.session_state.usage = data.get("usage", st.session_state.usage)
+                
+                # Force refresh status to get updated usage counters
+                st.session_state.status_checked = False
+                status_cache.invalidate(st.session_state.api_key)
+                
+                if not results:
+                    st.info("🔍 No leads found for this search.")
+                else:
+                    # Show updated usage after search
+                    updated_usage = st.session_state.usage
+                    st.success(f"✅ Found {len(results)} leads! Daily usage: {updated_usage.get('daily', 0)}/{limits['daily'] if limits['daily'] != float('inf') else '∞'}")
                     
-                    if not results:
-                        st.info("🔍 No leads found for this search.")
+                    # Display updated usage metrics prominently
+                    with st.container():
+                        col_usage1, col_usage2 = st.columns(2)
+                        with col_usage1:
+                            st.metric(
+                                "Updated Daily Usage", 
+                                f"{updated_usage.get('daily', 0)}/{limits['daily'] if limits['daily'] != float('inf') else '∞'}",
+                                delta=1 if results else 0
+                            )
+                        with col_usage2:
+                            st.metric(
+                                "Updated Monthly Usage", 
+                                f"{updated_usage.get('monthly', 0)}/{limits['monthly'] if limits['monthly'] != float('inf') else '∞'}",
+                                delta=1 if results else 0
+                            )
+    
+    # Background jobs - read from the job store, so they're back after a reload
+    JOB_STATES = {"queued": "⏳ Queued", "running": "🔄 Running", "done": "✅ Done", "failed": "❌ Failed",
+                  "cancelled": "🚫 Cancelled", "interrupted": "⚠️ Interrupted"}
+    
+    def open_job(job_id):
+        stored = job_runner.store.results(job_id)
+        if stored is not None:
+            results, lead_states, _ = stored
+            set_results(results, lead_states=lead_states)
+    
+    def remove_job(job_id):
+        job_runner.store.delete(job_id, job_owner)
+    
+    active_job_ids = {job["id"] for job in job_runner.active(job_owner)}
+    
+    def jobs_view():
+        jobs = job_runner.store.list(job_owner)
+        if not jobs:
+            return
+        with st.expander(f"🗂️ Background Jobs ({len(active_job_ids)} active)", expanded=bool(active_job_ids)):
+            for job in jobs:
+                col_job, col_state, col_action = st.columns([3, 2, 1])
+                with col_job:
+                    st.markdown(f"**{job['keyword']}** in {job['location']}")
+                    st.caption(f"{job['count']} requested · started {datetime.fromtimestamp(job['created']).strftime('%H:%M:%S')}")
+                with col_state:
+                    if job["state"] == "done":
+                        st.markdown(f"{JOB_STATES['done']} · {job['returned']} leads" + (" (cached)" if job["cached"] else ""))
+                    elif job["state"] == "running":
+                        st.markdown(f"{JOB_STATES['running']} · {job['progress']} leads so far")
                     else:
-                        # Show updated usage after search
-                        updated_usage = st.session_state.usage
-                        st.success(f"✅ Found {len(results)} leads! Daily usage: {updated_usage.get('daily', 0)}/{limits['daily'] if limits['daily'] != float('inf') else '∞'}")
-                        
-                        # Display updated usage metrics prominently
-                        with st.container():
-                            col_usage1, col_usage2 = st.columns(2)
-                            with col_usage1:
-                                st.metric(
-                                    "Updated Daily Usage", 
-                                    f"{updated_usage.get('daily', 0)}/{limits['daily'] if limits['daily'] != float('inf') else '∞'}",
-                                    delta=1 if results else 0
-                                )
-                            with col_usage2:
-                                st.metric(
-                                    "Updated Monthly Usage", 
-                                    f"{updated_usage.get('monthly', 0)}/{limits['monthly'] if limits['monthly'] != float('inf') else '∞'}",
-                                    delta=1 if results else 0
-                                )
-                except Exception as e:
-                    st.error(f"❌ Search request failed: {str(e)}")
+                        st.markdown(JOB_STATES.get(job["state"], job["state"]))
+                    if job["error"]:
+                        st.caption(job["error"])
+                with col_action:
+                    if job["state"] == "done":
+                        if st.button("📂 Open", key=f"open_{job['id']}"):
+                            open_job(job["id"])
+                            st.rerun()  # the results view lives outside this fragment
+                    elif job["state"] == "queued":
+                        st.button("✖️ Cancel", key=f"cancel_{job['id']}", on_click=job_runner.cancel, args=(job["id"],))
+                    elif job["state"] != "running":
+                        st.button("🗑️", key=f"remove_{job['id']}", on_click=remove_job, args=(job["id"],),
+                                  help="Remove from the list")
+        # A job finished since the page was drawn: redraw everything so usage
+        # counters refresh and polling stops
+        if active_job_ids - {job["id"] for job in jobs if job["state"] in ("queued", "running")}:
+            st.session_state.status_checked = False
+            st.rerun()
     
-    # Initialize results from session state or empty list
-    results = st.session_state.get("last_results", [])
+    # Only poll while something is still queued or running
+    st.fragment(jobs_view, run_every=JOB_POLL_INTERVAL if active_job_ids else None)()
     
-    # Only show DataFrame and metrics if we have results
-    if results:
-        df = pd.DataFrame(results)
-        
-        # Pagination settings
-        results_per_page = st.session_state.results_per_page
-        total_results = len(df)
-        total_pages = (total_results - 1) // results_per_page + 1
-        current_page = st.session_state.current_page
-        
-        # Ensure current page is valid
-        if current_page >= total_pages:
-            st.session_state.current_page = 0
-            current_page = 0
-        
-        # Calculate start and end indices for current page
-        start_idx = current_page * results_per_page
-        end_idx = min(start_idx + results_per_page, total_results)
-        
-        # Get current page data
-        page_df = df.iloc[start_idx:end_idx].copy()
-        
-        # Add row numbers (global, not per page)
-        page_df.insert(0, '#', range(start_idx + 1, end_idx + 1))
-        
-        # Reorder columns - only include columns that actually exist
-        desired_order = ['#', 'name']
-        available_desired = [col for col in desired_order if col in page_df.columns]
-        other_columns = [col for col in page_df.columns if col not in desired_order]
-        page_df = page_df[available_desired + other_columns]
-        
-        # Display pagination controls at the top
-        col1, col2, col3, col4, col5 = st.columns([1, 1, 2, 1, 1])
-        
-        with col1:
-            if st.button("⏮️ First", disabled=current_page == 0):
-                st.session_state.current_page = 0
-                st.rerun()
-        
-        with col2:
-            if st.button("◀️ Prev", disabled=current_page == 0):
-                st.session_state.current_page = max(0, current_page - 1)
-                st.rerun()
-        
-        with col3:
-            st.markdown(f"**Page {current_page + 1} of {total_pages}** | Showing {start_idx + 1}-{end_idx} of {total_results} results")
+    # Batch mode: one CSV row per keyword/location/count search
+    with st.expander("📦 Batch Search (CSV upload)"):
+        st.caption(f"Upload a CSV with `keyword`, `location` and optional `count` columns. "
+                   f"Your {tier.title()} plan runs {limits['concurrency']} searches at a time.")
+        batch_file = st.file_uploader("Batch CSV", type=["csv"], key="batch_csv")
+        batch_rows = []
+        if batch_file is not None:
+            try:
+                batch_rows = parse_batch_csv(batch_file.getvalue(), default_count=default_value, max_count=max_results)
+            except (ValueError, UnicodeDecodeError) as e:
+                st.error(f"❌ Could not read CSV: {str(e)}")
+            if batch_rows:
+                st.dataframe(batch_rows, use_container_width=True, hide_index=True)
         
-        with col4:
-            if st.button("Next ▶️", disabled=current_page >= total_pages - 1):
-                st.session_state.current_page = min(total_pages - 1, current_page + 1)
-                st.rerun()
+        if st.button("🚀 Run Batch", disabled=not batch_rows):
+            row_status = [dict(row, status="⏳ queued", leads=0, error="") for row in batch_rows]
+            labels = {"cached": "⚡ cached", "done": "✅ done", "failed": "❌ failed"}
+            progress = st.empty()
+            status_table = st.empty()
+            status_table.dataframe(row_status, use_container_width=True, hide_index=True)
+            counts = {"cached": 0, "searched": 0}
+            
+            def show_row(index, outcome):
+                row_status[index]["status"] = labels[outcome["state"]]
+                row_status[index]["leads"] = outcome["returned"]
+                row_status[index]["error"] = outcome["error"]
+                if outcome["state"] == "cached":
+                    counts["cached"] += 1
+                else:
+                    counts["searched"] += 1
+                    if outcome["summary"].get("usage"):
+                        # Rows finish out of order; keep the highest counters seen
+                        usage = outcome["summary"]["usage"]
+                        st.session_state.usage = {
+                            "daily": max(usage.get("daily", 0), st.session_state.usage.get("daily", 0)),
+                            "monthly": max(usage.get("monthly", 0), st.session_state.usage.get("monthly", 0)),
+                        }
+                    searches = len(batch_rows) - counts["cached"]
+                    progress.progress(counts["searched"] / searches,
+                                      text=f"{counts['searched']}/{searches} searches finished")
+                status_table.dataframe(row_status, use_container_width=True, hide_index=True)
+            
+            # Rows answered from the result cache don't count against the quota
+            try:
+                statuses = run_batch(client, st.session_state.api_key, batch_rows, tier, cache=result_cache,
+                                     bypass_cache=bypass_cache, max_workers=limits['concurrency'],
+                                     scheduler=quota, on_row=show_row)
+            except QuotaExceeded as e:
+                st.error(f"🚫 This batch needs {e.needed} searches but only {e.remaining} are left on your plan.")
+                st.stop()
+            progress.progress(1.0, text="Batch finished")
+            
+            merged = batch_results(statuses)
+            ingest_results(merged, f"batch of {len(batch_rows)} searches")
+            if counts["searched"]:
+                st.session_state.status_checked = False
+                status_cache.invalidate(st.session_state.api_key)
+            for row, status in zip(batch_rows, statuses):
+                if status["state"] in ("done", "cached"):
+                    search_history.record(job_owner, row["keyword"], row["location"], row["count"],
+                                          status["results"], cached=status["state"] == "cached", source="batch")
+            failed = sum(1 for r in row_status if r["status"] == "❌ failed")
+            if failed:
+                st.warning(f"⚠️ {failed} of {len(batch_rows)} searches failed")
+            st.success(f"✅ Batch finished: {len(merged)} unique leads from {len(batch_rows) - failed} searches "
+                       f"({counts['cached']} from cache)")
+    
+    # Fan-out: one broad location searched area by area, past the per-search cap
+    def suggest_areas():
+        st.session_state.fanout_areas = "\n".join(split_location(st.session_state.fanout_location))
+    
+    def keep_productive_areas(shards):
+        # Failed areas stay: they added nothing only because they weren't searched
+        st.session_state.fanout_areas = "\n".join(shard["area"] for shard in shards if not shard["prunable"])
+    
+    def retry_failed_areas(areas):
+        st.session_state.fanout_areas = "\n".join(areas)
+    
+    with st.expander("🗺️ Area Fan-out (beyond the per-search cap)"):
+        st.caption(f"Splits a city into neighbourhoods or postcodes and searches each one - up to "
+                   f"{max_results} leads per area on your {tier.title()} plan, one search per area.")
+        col_fan1, col_fan2 = st.columns(2)
+        with col_fan1:
+            fanout_keyword = st.text_input("Business Type", placeholder="e.g. dentist", key="fanout_keyword")
+        with col_fan2:
+            fanout_location = st.text_input("Location", placeholder="e.g. New York", key="fanout_location")
+        st.button("📍 Suggest areas", on_click=suggest_areas, disabled=not fanout_location,
+                  help="Fill in known neighbourhoods for large cities - edit the list freely")
+        fanout_areas = parse_areas(st.text_area("Areas (one per line)", key="fanout_areas",
+                                                placeholder="Manhattan\nBrooklyn\n10001"))
+        fanout_count = st.slider("Leads per area", 5, max_results, default_value, key="fanout_count")
         
-        with col5:
-            if st.button("Last ⏭️", disabled=current_page >= total_pages - 1):
-                st.session_state.current_page = total_pages - 1
-                st.rerun()
+        if st.button(f"🚀 Search {len(fanout_areas)} areas", disabled=not (fanout_keyword and fanout_location and fanout_areas)):
+            live_metrics = st.empty()
+            live_table = st.empty()
+            progress = st.empty()
+            finished = {}
+            
+            def show_shard(index, status):
+                finished[index] = status
+                progress.progress(len(finished) / len(fanout_areas),
+                                  text=f"{len(finished)}/{len(fanout_areas)} areas searched")
+                render_live_results(batch_results(finished[i] for i in sorted(finished)), live_metrics, live_table)
+            
+            try:
+                outcome = run_fanout(client, st.session_state.api_key, fanout_keyword, fanout_location, fanout_areas,
+                                     fanout_count, tier, cache=result_cache, bypass_cache=bypass_cache,
+                                     max_workers=limits['concurrency'], scheduler=quota, on_shard=show_shard)
+            except QuotaExceeded as e:
+                st.error(f"🚫 Searching {len(fanout_areas)} areas needs {e.needed} searches but only {e.remaining} are left on your plan.")
+                st.stop()
+            finally:
+                live_metrics.empty()
+                live_table.empty()
+                progress.empty()
+            
+            ingest_results(outcome["results"], f"{fanout_keyword} in {fanout_location} ({len(fanout_areas)} areas)")
+            if any(status["state"] == "done" for status in outcome["statuses"]):
+                st.session_state.status_checked = False
+                status_cache.invalidate(st.session_state.api_key)
+            for row, status in zip(outcome["rows"], outcome["statuses"]):
+                if status["state"] in ("done", "cached"):
+                    search_history.record(job_owner, row["keyword"], row["location"], row["count"],
+                                          status["results"], cached=status["state"] == "cached", source="fanout")
+            st.session_state.fanout_shards = outcome["shards"]
+            st.success(f"✅ {len(outcome['results'])} unique leads from {len(fanout_areas)} areas")
         
-        # Results per page selector
-        col_settings1, col_settings2 = st.columns([1, 3])
-        with col_settings1:
-            new_per_page = st.selectbox(
-                "Results per page:", 
-                [5, 10, 20, 50], 
-                index=[5, 10, 20, 50].index(results_per_page),
-                key="results_per_page_selector"
+        # Per-area yield of the last fan-out, so areas that add nothing can be pruned
+        shards = st.session_state.get("fanout_shards")
+        if shards:
+            st.dataframe(
+                [{"Area": shard["area"], "Status": shard["state"], "Leads": shard["returned"],
+                  "Unique": shard["unique"], "Emails": shard["emails"], "Unique %": f"{shard['unique_rate']:.0%}",
+                  "Error": shard["error"]} for shard in shards],
+                use_container_width=True, hide_index=True
             )
-            if new_per_page != results_per_page:
-                st.session_state.results_per_page = new_per_page
-                st.session_state.current_page = 0  # Reset to first page
-                st.rerun()
-        
-        # Better metrics display (for ALL results, not just current page)
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.metric("Total Leads", len(df))
-        with col2:
-            emails_found = len(df[df['email'].notna()]) if 'email' in df.columns else 0
-            st.metric("With Email", emails_found)
-        with col3:
-            phones_found = len(df[df['phone'].notna()]) if 'phone' in df.columns else 0
-            st.metric("With Phone", phones_found)
+            failed_areas = [shard["area"] for shard in shards if shard["state"] in ("failed", "skipped")]
+            if failed_areas:
+                st.warning(f"⚠️ {len(failed_areas)} areas failed, retry: {', '.join(failed_areas)}")
+                st.button(f"🔁 Retry {len(failed_areas)} failed areas", on_click=retry_failed_areas,
+                          args=(failed_areas,))
+            unproductive = sum(1 for shard in shards if shard["prunable"])
+            if unproductive:
+                st.button(f"✂️ Drop {unproductive} areas that added no new leads", on_click=keep_productive_areas,
+                          args=(shards,))
+    
+    # Planner: spend the remaining quota on the searches that yielded best before
+    with st.expander("🧭 Search Planner"):
+        st.caption("List the searches you could run; the planner picks the ones your past searches say will "
+                   "yield most, sized to reach your target within the quota you have left.")
+        planner_text = st.text_area("Searches (one `keyword, location` per line)", key="planner_pairs",
+                                    placeholder="dentist, New York\nplumber, Boston")
+        planner_pairs = [tuple(part.strip() for part in line.split(",", 1))
+                         for line in planner_text.splitlines() if "," in line]
+        col_plan1, col_plan2 = st.columns(2)
+        with col_plan1:
+            planner_target = st.number_input("Target", min_value=1, value=200, step=50, key="planner_target")
+        with col_plan2:
+            planner_want = st.radio("Count", ["leads", "emails"], horizontal=True, key="planner_want",
+                                    format_func=lambda w: "Leads" if w == "leads" else "Leads with email")
         
-        # Download options (for ALL results, not just current page)
-        col1, col2 = st.columns(2)
-        with col1:
-            download_df = df.drop('#', axis=1) if '#' in df.columns else df
-            st.download_button(
-                "📥 Download All (CSV)",
-                download_df.to_csv(index=False),
-                file_name=f"leads_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
-                mime="text/csv"
-            )
-        with col2:
-            if emails_found > 0:
-                email_df = df[df['email'].notna()]
-                if '#' in email_df.columns:
-                    email_df = email_df.drop('#', axis=1)
-                st.download_button(
-                    "📧 Download Email Leads Only",
-                    email_df.to_csv(index=False),
-                    file_name=f"email_leads_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
-                    mime="text/csv"
+        if planner_pairs:
+            plan = plan_searches(planner_pairs, planner_target, tier,
+                                 quota.remaining(st.session_state.api_key, tier),
+                                 quota.resets(st.session_state.api_key, tier),
+                                 history=search_history, want=planner_want)
+            if plan["steps"]:
+                st.dataframe(
+                    [{"Search": f"{step['keyword']} in {step['location']}", "Count": step["count"],
+                      "Expected leads": step["expected_leads"], "Expected emails": step["expected_emails"],
+                      "Past runs": step["runs"],
+                      "When": "now" if not step["day"] else
+                              step["at"].strftime("%b %d %H:%M UTC") if step["at"] else f"in {step['day']} days"}
+                     for step in plan["steps"]],
+                    use_container_width=True, hide_index=True
                 )
+            st.markdown(f"**{plan['searches']} searches** for about **{plan['expected']:.0f} {planner_want}**" +
+                        (f" - {plan['shortfall']:.0f} short of the target with the quota and searches listed"
+                         if plan["shortfall"] else ""))
+            
+            today = [step for step in plan["steps"] if not step["day"]]
+            if st.button(f"▶️ Run today's {len(today)} searches", disabled=not today):
+                plan_rows = [{"keyword": step["keyword"], "location": step["location"], "count": step["count"]}
+                             for step in today]
+                with st.spinner(f"Running {len(plan_rows)} searches..."):
+                    try:
+                        statuses = run_batch(client, st.session_state.api_key, plan_rows, tier, cache=result_cache,
+                                             bypass_cache=bypass_cache, max_workers=limits['concurrency'],
+                                             scheduler=quota)
+                    except QuotaExceeded as e:
+                        st.error(f"🚫 This plan needs {e.needed} searches but only {e.remaining} are left on your plan.")
+                        st.stop()
+                merged = batch_results(statuses)
+                ingest_results(merged, f"plan of {len(plan_rows)} searches")
+                st.session_state.status_checked = False
+                status_cache.invalidate(st.session_state.api_key)
+                for row, status in zip(plan_rows, statuses):
+                    if status["state"] in ("done", "cached"):
+                        search_history.record(job_owner, row["keyword"], row["location"], row["count"],
+                                              status["results"], cached=status["state"] == "cached", source="plan")
+                st.success(f"✅ {len(merged)} unique leads from {len(plan_rows)} planned searches")
+    
+    # Large searches: the backend hands results back page by page behind a
+    # cursor, so thousands of leads never have to sit in memory at once
+    with st.expander("📚 Large Search (server-side pages)"):
+        with st.form("large_search_form"):
+            large_keyword = st.text_input("Business Type", placeholder="e.g. dentist", key="large_keyword")
+            large_location = st.text_input("Location", placeholder="e.g. New York", key="large_location")
+            col_large1, col_large2 = st.columns(2)
+            with col_large1:
+                # Paged searches have their own, larger cap per plan
+                large_count = st.number_input("Number of Results", min_value=1,
+                                              max_value=limits['max_paged_count'],
+                                              value=limits['max_paged_count'], step=10)
+            with col_large2:
+                large_page_size = st.selectbox("Server page size", [50, 100, 200], index=1,
+                                               help="Leads fetched per request while you page or export")
+            large_submitted = st.form_submit_button("🚀 Find Leads")
         
-        # Display current page data
-        try:
-            st.dataframe(
-                page_df,
-                use_container_width=True,
-                hide_index=True,
-                column_config={
-                    "#": st.column_config.NumberColumn("#", help="Lead number", width="small"),
-                    "name": st.column_config.TextColumn("Business Name", help="Business name"),
-                    "email": st.column_config.TextColumn("Email", help="Contact email"),
-                    "phone": st.column_config.TextColumn("Phone", help="Contact phone"),
-                    "website": st.column_config.LinkColumn("Website"),
-                    "address": st.column_config.TextColumn("Address", help="Business address"),
-                    "rating": st.column_config.NumberColumn("Rating", help="Business rating", format="%.1f ⭐")
-                }
-            )
-        except Exception as e:
-            st.error(f"❌ Display error: {str(e)}")
-        
-        # Pagination controls at the bottom (repeat for convenience)
-        st.divider()
-        col1, col2, col3, col4, col5 = st.columns([1, 1, 2, 1, 1])
+        if large_submitted:
+            if not large_keyword or not large_location:
+                st.warning("Please enter both keyword and location.")
+            else:
+                with st.spinner("Searching..."):
+                    try:
+                        data = start_paged_search(client, st.session_state.api_key, large_keyword, large_location,
+                                                  int(large_count), int(large_page_size), tier, scheduler=quota,
+                                                  wait=SEARCH_SLOT_WAIT)
+                    except QuotaExceeded:
+                        st.error("🚫 Search limit reached for your plan. Upgrade to premium for more searches.")
+                        st.stop()
+                    except Throttled as e:
+                        st.warning(f"⏳ {e}")
+                        st.stop()
+                    except ApiError as e:
+                        st.error(f"❌ API Error ({e.status_code}): {e.message}")
+                        st.stop()
+                    except Exception as e:
+                        st.error(f"❌ Search request failed: {str(e)}")
+                        st.stop()
+                
+                st.session_state.usage = data.get("usage", st.session_state.usage)
+                st.session_state.status_checked = False
+                status_cache.invalidate(st.session_state.api_key)
+                if data.get("next_cursor"):
+                    source = f"{large_keyword} in {large_location}"
+                    pager = CursorPager(client, st.session_state.api_key, data, int(large_page_size),
+                                        on_page=lambda leads: lead_store.merge(leads, source),
+                                        keep=lambda leads: suppression.filter(leads)[0])
+                    set_results([], pager=pager)
+                    pager.prefetch(1)
+                    total = f"{data['total']}" if data.get("total") is not None else "more"
+                    st.success(f"✅ First {len(data.get('results', []))} leads loaded ({total} available) - "
+                               f"further pages load as you browse")
+                else:
+                    # Backend without cursor support answered with the whole list
+                    ingest_results(data.get("results", []), f"{large_keyword} in {large_location}")
+                    st.success(f"✅ Found {st.session_state.results_count} leads!")
+    
+    # Pagination callbacks run before the fragment reruns, so paging only
+    # re-executes the results view instead of the whole app
+    def set_page(page):
+        st.session_state.current_page = page
+    
+    def set_results_per_page():
+        st.session_state.results_per_page = st.session_state.results_per_page_selector
+        st.session_state.current_page = 0  # Reset to first page
+    
+    def reset_page():
+        st.session_state.current_page = 0
+    
+    def merge_duplicate_leads():
+        # Fuzzy matches (similar name plus same phone, address or website)
+        # become one lead each; the report stays with the merged set
+        frame = get_results_frame()
+        if frame is None:
+            return
+        lead_states = result_store.lead_states(st.session_state.results_version)
+        suppressed = st.session_state.get("results_suppressed", 0)
+        with profile.phase("dedup"):
+            # An in-memory frame already has the normalized domain / phone columns
+            outcome = merge_duplicates(list(frame.iter_leads()), getattr(frame, "df", None))
+        set_results(outcome["leads"], lead_states=[lead_states[i] for i in outcome["kept"]] if lead_states else None)
+        st.session_state.results_suppressed = suppressed
+        st.session_state.dedup_report = {"version": st.session_state.results_version,
+                                         "duplicates": outcome["duplicates"], "clusters": outcome["clusters"]}
+    
+    @st.fragment
+    def results_view():
+        pager = st.session_state.get("pager")
         
-        with col1:
-            if st.button("⏮️ First ", disabled=current_page == 0, key="first_bottom"):
+        # Only show DataFrame and metrics if we have results
+        if st.session_state.results_count or pager is not None:
+            # Server-paginated sets fetch pages on demand; both sources expose
+            # row_count, page(), iter_leads() and the email/phone counts
+            lead_states = result_store.lead_states(st.session_state.results_version) if pager is None else None
+            only_new = bool(lead_states) and st.session_state.get("only_new_leads", False)
+            frame = pager if pager is not None else get_results_frame(only_new)
+            if frame is None:
+                st.session_state.results_count = 0
+                st.info("⌛ These results expired after a long idle period - run the search again.")
+                return
+            more = "" if frame.complete else "+"
+            
+            # Pagination settings
+            results_per_page = st.session_state.results_per_page
+            total_results = frame.row_count
+            total_pages = max(1, (total_results - 1) // results_per_page + 1)
+            current_page = st.session_state.current_page
+            
+            # Ensure current page is valid
+            if current_page >= total_pages:
                 st.session_state.current_page = 0
-                st.rerun()
-        
-        with col2:
-            if st.button("◀️ Prev ", disabled=current_page == 0, key="prev_bottom"):
-                st.session_state.current_page = max(0, current_page - 1)
-                st.rerun()
-        
-        with col3:
-            st.markdown(f"<center><b>Page {current_page + 1} of {total_pages}</b></center>", unsafe_allow_html=True)
-        
-        with col4:
-            if st.button("Next ▶️ ", disabled=current_page >= total_pages - 1, key="next_bottom"):
-                st.session_state.current_page = min(total_pages - 1, current_page + 1)
-                st.rerun()
-        
-        with col5:
-            if st.button("Last ⏭️ ", disabled=current_page >= total_pages - 1, key="last_bottom"):
-                st.session_state.current_page = total_pages - 1
-                st.rerun()
+                current_page = 0
+            
+            # Calculate start and end indices for current page
+            start_idx = current_page * results_per_page
+            end_idx = min(start_idx + results_per_page, total_results)
+            
+            # Get current page data - a slice of the prebuilt frame, which
+            # already carries global row numbers and the display column order
+            try:
+                with profile.phase("page"):
+                    page_df = frame.page(start_idx, end_idx)
+            except ApiError as e:
+                st.error(f"❌ Could not load this page ({e.status_code}): {e.message}")
+                return
+            except requests.exceptions.RequestException as e:
+                st.error(f"❌ Could not load this page: {str(e)}")
+                return
+            end_idx = start_idx + len(page_df)
+            if pager is not None:
+                # Loading a page can reveal further server pages (or the end)
+                more = "" if frame.complete else "+"
+                total_results = frame.row_count
+                total_pages = max(1, (total_results - 1) // results_per_page + 1)
+            
+            # Display pagination controls at the top
+            col1, col2, col3, col4, col5 = st.columns([1, 1, 2, 1, 1])
+            
+            with col1:
+                st.button("⏮️ First", disabled=current_page == 0, on_click=set_page, args=(0,))
+            
+            with col2:
+                st.button("◀️ Prev", disabled=current_page == 0, on_click=set_page, args=(max(0, current_page - 1),))
+            
+            with col3:
+                st.markdown(f"**Page {current_page + 1} of {total_pages}{more}** | Showing {min(start_idx + 1, end_idx)}-{end_idx} of {total_results}{more} results")
+            
+            with col4:
+                st.button("Next ▶️", disabled=current_page >= total_pages - 1, on_click=set_page, args=(min(total_pages - 1, current_page + 1),))
+            
+            with col5:
+                st.button("Last ⏭️", disabled=current_page >= total_pages - 1, on_click=set_page, args=(total_pages - 1,))
+            
+            # Results per page selector
+            col_settings1, col_settings2 = st.columns([1, 3])
+            with col_settings1:
+                st.selectbox(
+                    "Results per page:", 
+                    [5, 10, 20, 50], 
+                    index=[5, 10, 20, 50].index(results_per_page),
+                    key="results_per_page_selector",
+                    on_change=set_results_per_page
+                )
+            with col_settings2:
+                if lead_states:
+                    new_count = sum(1 for state in lead_states if state == "new")
+                    st.toggle(
+                        f"🆕 Only new leads ({new_count} of {len(lead_states)})",
+                        key="only_new_leads",
+                        on_change=reset_page,
+                        help="Hide businesses already in your lead index from earlier searches"
+                    )
+            
+            # Better metrics display (for ALL results, not just current page)
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Total Leads", f"{frame.total}" if frame.complete else f"{frame.fetched}{more}")
+            with col2:
+                emails_found = frame.emails_found
+                st.metric("With Email", f"{emails_found}{more}")
+            with col3:
+                st.metric("With Phone", f"{frame.phones_found}{more}")
+            suppressed = frame.suppressed if pager is not None else st.session_state.get("results_suppressed", 0)
+            if suppressed:
+                st.caption(f"🚫 {suppressed} leads on the suppression list were left out")
+            
+            # Fuzzy duplicate merge (in-memory result sets only)
+            dedup_report = st.session_state.get("dedup_report")
+            if dedup_report and dedup_report["version"] == st.session_state.results_version:
+                if dedup_report["duplicates"]:
+                    st.success(f"🧬 Merged {dedup_report['duplicates']} duplicates into "
+                               f"{len(dedup_report['clusters'])} businesses")
+                    with st.expander("Merged businesses"):
+                        st.dataframe(
+                            [{"Business": c["name"], "Listings": c["count"],
+                              "Also listed as": ", ".join(str(n) for n in c["names"] if n != c["name"])}
+                             for c in dedup_report["clusters"][:500]],
+                            use_container_width=True, hide_index=True
+                        )
+                else:
+                    st.info("🧬 No duplicate businesses found")
+            elif pager is None and frame.total > 1:
+                st.button("🧬 Merge duplicate businesses", on_click=merge_duplicate_leads,
+                          help="Merge leads that look like the same business: similar name plus the same phone, "
+                               "a similar address, or the same website")
+            
+            # Download options (for ALL results, not just current page).
+            # Files are only serialized when a button is clicked, then cached
+            # for this result set so repeat downloads are instant.
+            export_formats = [f for f in limits.get('exports', ['csv']) if f in available_formats()]
+            col1, col2, col3 = st.columns([1, 1, 1])
+            with col1:
+                if len(export_formats) > 1:
+                    export_format = st.selectbox(
+                        "Export format",
+                        export_formats,
+                        format_func=lambda f: FORMATS[f]['label'],
+                        key="export_format"
+                    )
+                else:
+                    export_format = "csv"
+            fmt = FORMATS[export_format]
+            version = st.session_state.results_version if pager is not None else frame.version
+            
+            def timed_export(leads):
+                with metrics.timer("export_seconds", format=export_format):
+                    return export_bytes(leads, export_format)
+            
+            def build_all_export():
+                return export_cache.get_or_build(
+                    (version, "all", export_format), lambda: timed_export(list(frame.iter_leads()))
+                )
+            
+            def build_email_export():
+                email_leads = [lead for lead in frame.iter_leads() if lead.get('email') is not None]
+                return export_cache.get_or_build(
+                    (version, "email", export_format), lambda: timed_export(email_leads)
+                )
+            
+            with col2:
+                st.download_button(
+                    f"📥 Download All ({fmt['label']})",
+                    build_all_export,
+                    file_name=f"leads_{datetime.now().strftime('%Y%m%d_%H%M')}.{fmt['ext']}",
+                    mime=fmt['mime'],
+                    on_click="ignore"
+                )
+            with col3:
+                if emails_found > 0:
+                    st.download_button(
+                        "📧 Download Email Leads Only",
+                        build_email_export,
+                        file_name=f"email_leads_{datetime.now().strftime('%Y%m%d_%H%M')}.{fmt['ext']}",
+                        mime=fmt['mime'],
+                        on_click="ignore"
+                    )
+            
+            # Display current page data
+            try:
+                with profile.phase("render_table"):
+                    st.dataframe(
+                        page_df,
+                        use_container_width=True,
+                        hide_index=True,
+                        column_config={
+                            "#": st.column_config.NumberColumn("#", help="Lead number", width="small"),
+                            "name": st.column_config.TextColumn("Business Name", help="Business name"),
+                            "email": st.column_config.TextColumn("Email", help="Contact email"),
+                            "phone": st.column_config.TextColumn("Phone", help="Contact phone"),
+                            "website": st.column_config.LinkColumn("Website"),
+                            "address": st.column_config.TextColumn("Address", help="Business address"),
+                            "rating": st.column_config.NumberColumn("Rating", help="Business rating", format="%.1f ⭐"),
+                            "domain": st.column_config.TextColumn("Domain", help="Registrable domain of the website"),
+                            "role_email": st.column_config.CheckboxColumn("Role Address", help="info@, sales@ and other shared mailboxes"),
+                            "email_norm": None,
+                            "phone_e164": None
+                        }
+                    )
+            except Exception as e:
+                st.error(f"❌ Display error: {str(e)}")
+            
+            # Pagination controls at the bottom (repeat for convenience)
+            st.divider()
+            col1, col2, col3, col4, col5 = st.columns([1, 1, 2, 1, 1])
+            
+            with col1:
+                st.button("⏮️ First ", disabled=current_page == 0, key="first_bottom", on_click=set_page, args=(0,))
+            
+            with col2:
+                st.button("◀️ Prev ", disabled=current_page == 0, key="prev_bottom", on_click=set_page, args=(max(0, current_page - 1),))
+            
+            with col3:
+                st.markdown(f"<center><b>Page {current_page + 1} of {total_pages}{more}</b></center>", unsafe_allow_html=True)
+            
+            with col4:
+                st.button("Next ▶️ ", disabled=current_page >= total_pages - 1, key="next_bottom", on_click=set_page, args=(min(total_pages - 1, current_page + 1),))
+            
+            with col5:
+                st.button("Last ⏭️ ", disabled=current_page >= total_pages - 1, key="last_bottom", on_click=set_page, args=(total_pages - 1,))
 
-    else:
-        # Show message when no results
-        st.info("👆 Use the search form above to find leads")
+        else:
+            # Show message when no results
+            st.info("👆 Use the search form above to find leads")
+    
+    with profile.phase("results_view"):
+        results_view()
 
 # ────────────── PREMIUM TAB ──────────────
+profile.lap("premium_tab")
 with tab2:
     st.subheader("💎 Premium Plans & Features")
     
@@ -777,8 +1448,7 @@ with tab2:
         ]
     }
     
-    comparison_df = pd.DataFrame(plan_data)
-    st.dataframe(comparison_df, use_container_width=True, hide_index=True)
+    st.dataframe(plan_data, use_container_width=True, hide_index=True)
     
     st.divider()
     
@@ -848,3 +1518,24 @@ with tab2:
         **Q: Do searches reset daily?**
         A: Yes, daily limits reset at midnight UTC. Monthly limits reset on the same day each month.
         """)
+
+# ─────────────────────────────────────────────
+# Deferred status check - the page above is already on screen
+profile.lap("status_deferred")
+if status_due:
+    rendered_tier = (st.session_state.premium_tier, st.session_state.premium)
+    rendered_usage = (dict(st.session_state.usage), dict(st.session_state.get("reset", {})))
+    with status_slot.container():
+        fetch_status()
+    mark_status_checked()
+    if (st.session_state.premium_tier, st.session_state.premium) != rendered_tier:
+        # Tier-dependent limits are drawn all over the page
+        st.rerun()
+    elif (dict(st.session_state.usage), dict(st.session_state.get("reset", {}))) != rendered_usage:
+        # Only the counters moved - refresh the sidebar metrics in place
+        with usage_slot.container():
+            render_usage_metrics(limits)
+
+profile.finish()
+render_debug_panel()
+metrics.dump()
@@ -0,0 +1,157 @@
+"""End-to-end timings for app.py against the local mock backend.
+
+Starts bench/mock_backend.py in-process, points the app at it and drives it
+with Streamlit's AppTest. For each result-set size it reports:
+
+- cold load: first script run of a fresh session
+- results render: the rerun that first shows a result set of that size
+- rerun: a rerun with nothing changed
+- next page: clicking "Next ▶️" in the results view
+- search: fetching the leads from the mock (NDJSON stream, plain JSON, cursor pages)
+- export: building each download format
+
+    python bench/benchmark.py
+    python bench/benchmark.py --sizes 10 1000 --latency 0.05 --json timings.json
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_SIZES = [10, 100, 1000, 10000, 100000]
+BENCH_KEY = "pro_bench_key"
+
+
+def timed(fn, repeat=1):
+    """Median wall time of ``fn()`` over ``repeat`` calls, in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def check(at):
+    if at.exception:
+        raise RuntimeError(f"app raised: {at.exception[0].message}")
+    return at
+
+
+def bench_app(leads, repeat, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    from scraper.results import get_result_store
+
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=timeout)
+    row = {"cold_load_ms": timed(lambda: check(at.run()))}
+
+    # The app and this process share the result store; the session only holds the handle
+    version = get_result_store().put(f"bench-{len(leads)}-{time.time_ns()}", leads)
+    at.session_state["api_key"] = BENCH_KEY
+    at.session_state["results_version"] = version
+    at.session_state["results_count"] = len(leads)
+    row["results_render_ms"] = timed(lambda: check(at.run()))
+    row["rerun_ms"] = timed(lambda: check(at.run()), repeat)
+
+    def next_page():
+        at.session_state["current_page"] = 0
+        check(at.run())
+        buttons = [b for b in at.button if b.label == "Next ▶️"]
+        if buttons and not buttons[0].disabled:
+            check(buttons[0].click().run())
+            assert at.session_state["current_page"] == 1
+
+    if len(leads) > 10:
+        row["next_page_ms"] = timed(next_page, repeat)
+    return row
+
+
+def bench_search(client, size, page_size):
+    from scraper.pager import CursorPager
+
+    row = {}
+
+    def run(stream):
+        leads = [p for kind, p in client.iter_scrape(BENCH_KEY, "dentist", "New York", size, stream=stream)
+                 if kind == "lead"]
+        assert len(leads) == size, (len(leads), size)
+
+    row["search_stream_ms"] = timed(lambda: run(True))
+    row["search_json_ms"] = timed(lambda: run(False))
+
+    def pages():
+        first = client.scrape_page(BENCH_KEY, "dentist", "New York", size, page_size)
+        pager = CursorPager(client, BENCH_KEY, first, page_size)
+        try:
+            assert sum(1 for _ in pager.iter_all()) == size
+        finally:
+            pager.close()
+
+    row["search_cursor_ms"] = timed(pages)
+    return row
+
+
+def bench_export(leads, repeat):
+    from scraper.export import available_formats, export_bytes
+
+    return {f"export_{fmt}_ms": timed(lambda: export_bytes(leads, fmt), repeat)
+            for fmt in available_formats()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark app.py against the mock backend.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3, help="samples per timing (median is reported)")
+    parser.add_argument("--latency", type=float, default=0.0, help="mock latency per request, seconds")
+    parser.add_argument("--lead-bytes", type=int, default=0, help="padding added to every lead")
+    parser.add_argument("--page-size", type=int, default=500, help="server page size for cursor searches")
+    parser.add_argument("--timeout", type=float, default=300, help="AppTest run timeout, seconds")
+    parser.add_argument("--skip-app", action="store_true", help="only time search and export")
+    parser.add_argument("--json", help="also write the timings to this file")
+    args = parser.parse_args()
+
+    # AppTest repeats every deprecation warning on each run
+    logging.disable(logging.WARNING)
+
+    # Everything the app persists goes to a throwaway directory
+    data_dir = tempfile.mkdtemp(prefix="scraper-bench-")
+    os.environ["SCRAPER_DATA_DIR"] = data_dir
+    os.environ["RESULT_CACHE_PATH"] = os.path.join(data_dir, "cache.sqlite3")
+    os.environ["LEAD_STORE_PATH"] = os.path.join(data_dir, "leads.sqlite3")
+
+    from mock_backend import make_lead, serve
+    server = serve(latency=args.latency, lead_bytes=args.lead_bytes, max_results=max(args.sizes))
+    os.environ["API_URL"] = server.base_url
+
+    from scraper import get_client
+    client = get_client(server.base_url)
+
+    report = []
+    for size in args.sizes:
+        leads = [make_lead("dentist", "New York", i, args.lead_bytes) for i in range(size)]
+        row = {"size": size}
+        row.update(bench_search(client, size, args.page_size))
+        if not args.skip_app:
+            row.update(bench_app(leads, args.repeat, args.timeout))
+        row.update(bench_export(leads, args.repeat))
+        report.append(row)
+        print(f"{size:>7} leads  " + "  ".join(f"{k[:-3]}={v:.0f}ms" for k, v in row.items() if k != "size"),
+              flush=True)
+
+    server.shutdown()
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"latency": args.latency, "lead_bytes": args.lead_bytes, "results": report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
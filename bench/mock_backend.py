@@ -0,0 +1,305 @@
+"""Local stand-in for the Cold Email Scraper backend.
+
+Implements /status, /scrape, /results, /activate, /login and /logout with the
+response shapes app.py expects, plus knobs for latency, payload size and
+error injection. Run it and point the app at it:
+
+    python bench/mock_backend.py --port 8765 --latency 0.2
+    API_URL=http://127.0.0.1:8765 streamlit run app.py
+
+Keys: the app's default key is always free tier; ``starter_*``, ``pro_*`` and
+``enterprise_*`` keys get that tier; any other key gets ``--tier``.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+DEFAULT_KEY = "free_tier_default_key_12345"
+LIMITS = {
+    "free": {"daily": 3, "monthly": 10},
+    "starter": {"daily": 50, "monthly": 300},
+    "pro": {"daily": 100, "monthly": 1000},
+    "enterprise": {"daily": 500, "monthly": 5000},
+}
+
+CITIES = ["New York", "Brooklyn", "Queens", "Jersey City", "Newark", "Yonkers"]
+CATEGORIES = ["Dentist", "Orthodontist", "Dental Clinic", "Cosmetic Dentist"]
+STREETS = ["Main St", "Broadway", "5th Ave", "Park Ave", "Elm St", "Oak Ave"]
+
+
+def make_lead(keyword, location, i, pad=0):
+    """Deterministic synthetic lead ``i`` for a search."""
+    rng = random.Random(f"{keyword}|{location}|{i}")
+    slug = f"{keyword.lower().replace(' ', '')}{i}"
+    lead = {
+        "name": f"{keyword.title()} {rng.choice(['Care', 'Studio', 'Group', 'Center'])} {i}",
+        "email": f"info@{slug}.com" if rng.random() < 0.6 else None,
+        "phone": f"(212) {rng.randint(200, 999)}-{rng.randint(1000, 9999)}" if rng.random() < 0.85 else None,
+        "website": f"https://www.{slug}.com" if rng.random() < 0.8 else None,
+        "address": f"{rng.randint(1, 999)} {rng.choice(STREETS)}, {location}",
+        "rating": round(rng.uniform(3.0, 5.0), 1),
+        "city": rng.choice(CITIES),
+        "category": rng.choice(CATEGORIES),
+    }
+    if pad:
+        lead["description"] = "x" * pad
+    return lead
+
+
+class MockState:
+    def __init__(self, tier="pro", latency=0.0, jitter=0.0, error_rate=0.0, error_status=500,
+                 lead_bytes=0, stream_delay=0.0, max_results=100000, enforce_limits=False):
+        self.tier = tier
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.lead_bytes = lead_bytes
+        self.stream_delay = stream_delay
+        self.max_results = max_results
+        self.enforce_limits = enforce_limits
+        self.usage = {}
+        self.cursors = {}
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.rng = random.Random(0)
+
+    def tier_for(self, key):
+        if not key or key == DEFAULT_KEY:
+            return "free"
+        for tier in ("starter", "pro", "enterprise"):
+            if key.startswith(tier + "_"):
+                return tier
+        return self.tier
+
+    def usage_for(self, key):
+        return self.usage.setdefault(key, {"daily": 0, "monthly": 0})
+
+    def reset_times(self):
+        now = datetime.now(timezone.utc)
+        tomorrow = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        next_month = (now.replace(day=1) + timedelta(days=32)).replace(day=1, hour=0, minute=0,
+                                                                        second=0, microsecond=0)
+        return {"daily": tomorrow.isoformat(), "monthly": next_month.isoformat()}
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "MockScraper/1.0"
+    disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    @property
+    def state(self):
+        return self.server.state
+
+    # ─────────────────────────────────────────────
+    # Helpers
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            return {}
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _chunk(self, text):
+        data = text.encode("utf-8")
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def _simulate(self):
+        """Apply latency and error injection; True when an error was sent."""
+        with self.state.lock:
+            self.state.requests += 1
+            fail = self.state.rng.random() < self.state.error_rate
+        delay = self.state.latency + random.uniform(0, self.state.jitter)
+        if delay:
+            time.sleep(delay)
+        if fail:
+            self._send_json(self.state.error_status, {"error": "Injected failure"})
+        return fail
+
+    # ─────────────────────────────────────────────
+    # Routes
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if self._simulate():
+            return
+        key = self.headers.get("X-API-Key", "")
+        if url.path == "/status":
+            self._send_json(200, {
+                "tier": self.state.tier_for(key),
+                "usage": dict(self.state.usage_for(key)),
+                "reset": self.state.reset_times(),
+            })
+        elif url.path == "/results":
+            cursor = parse_qs(url.query).get("cursor", [""])[0]
+            with self.state.lock:
+                job = self.state.cursors.get(cursor)
+            if job is None:
+                self._send_json(404, {"error": "Unknown or expired cursor"})
+                return
+            self._send_page(job, int(cursor.rsplit(":", 1)[1]))
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        body = self._body()
+        if self._simulate():
+            return
+        key = self.headers.get("X-API-Key", "")
+        if url.path == "/scrape":
+            self._scrape(key, body)
+        elif url.path == "/activate":
+            license_key = body.get("key", "")
+            if len(license_key) < 8:
+                self._send_json(400, {"error": "Invalid license key format"})
+                return
+            self._send_json(200, {"success": True, "api_key": license_key,
+                                  "tier": self.state.tier_for(license_key)})
+        elif url.path == "/login":
+            premium_key = body.get("premium_key", "")
+            tier = self.state.tier_for(premium_key)
+            self._send_json(200, {"success": tier != "free", "tier": tier})
+        elif url.path == "/logout":
+            self._send_json(200, {"success": True})
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def _scrape(self, key, body):
+        keyword = body.get("keyword", "")
+        location = body.get("location", "")
+        if not keyword or not location:
+            self._send_json(400, {"error": "keyword and location are required"})
+            return
+        requested = int(body.get("count", 10))
+        count = max(0, min(requested, self.state.max_results))
+        tier = self.state.tier_for(key)
+        with self.state.lock:
+            usage = self.state.usage_for(key)
+            if self.state.enforce_limits and (usage["daily"] >= LIMITS[tier]["daily"] or
+                                              usage["monthly"] >= LIMITS[tier]["monthly"]):
+                limited = True
+            else:
+                limited = False
+                usage["daily"] += 1
+                usage["monthly"] += 1
+            usage = dict(usage)
+        if limited:
+            self._send_json(429, {"error": f"{tier.title()} plan search limit reached", "usage": usage})
+            return
+
+        summary = {"requested": requested, "returned": count, "usage": usage,
+                   "message": f"Found {count} results for {keyword} in {location}"}
+        job = {"keyword": keyword, "location": location, "count": count,
+               "page_size": int(body.get("page_size") or 0), "summary": summary}
+
+        if job["page_size"]:
+            job_id = f"{id(job):x}{time.time_ns():x}"
+            job["id"] = job_id
+            self._send_page(job, 0)
+            return
+
+        accept = self.headers.get("Accept", "")
+        if body.get("stream") and "application/x-ndjson" in accept:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i in range(count):
+                lead = make_lead(keyword, location, i, self.state.lead_bytes)
+                self._chunk(json.dumps({"type": "lead", "data": lead}) + "\n")
+                if self.state.stream_delay:
+                    time.sleep(self.state.stream_delay)
+            self._chunk(json.dumps({"type": "summary", **summary}) + "\n")
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+            return
+
+        # Original contract: the whole list at once
+        if self.state.stream_delay:
+            time.sleep(self.state.stream_delay * count)
+        results = [make_lead(keyword, location, i, self.state.lead_bytes) for i in range(count)]
+        self._send_json(200, {"results": results, **summary})
+
+    def _send_page(self, job, page):
+        size = job["page_size"]
+        start = page * size
+        end = min(start + size, job["count"])
+        payload = {
+            "results": [make_lead(job["keyword"], job["location"], i, self.state.lead_bytes)
+                        for i in range(start, end)],
+            "total": job["count"],
+        }
+        if end < job["count"]:
+            cursor = f"{job['id']}:{page + 1}"
+            with self.state.lock:
+                self.state.cursors[cursor] = job
+            payload["next_cursor"] = cursor
+        if page == 0:
+            payload.update(job["summary"])
+        self._send_json(200, payload)
+
+
+def serve(host="127.0.0.1", port=0, verbose=False, **options):
+    """Start the mock on a background thread; returns the server (``.base_url`` set)."""
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    server.state = MockState(**options)
+    server.verbose = verbose
+    server.base_url = f"http://{host}:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local mock of the scraper backend.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--tier", default="pro", choices=list(LIMITS), help="tier for unrecognized keys")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency, up to this many seconds")
+    parser.add_argument("--stream-delay", type=float, default=0.0, help="seconds per lead when producing results")
+    parser.add_argument("--lead-bytes", type=int, default=0, help="padding added to every lead")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--max-results", type=int, default=100000)
+    parser.add_argument("--enforce-limits", action="store_true", help="reject searches over the tier quota")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    server = serve(
+        args.host, args.port, verbose=args.verbose, tier=args.tier, latency=args.latency,
+        jitter=args.jitter, error_rate=args.error_rate, error_status=args.error_status,
+        lead_bytes=args.lead_bytes, stream_delay=args.stream_delay, max_results=args.max_results,
+        enforce_limits=args.enforce_limits,
+    )
+    print(f"Mock backend listening on {server.base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
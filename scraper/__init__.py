@@ -0,0 +1,6 @@
+from .client import ApiClient, ApiError, get_client
+from .quota import TIERS, QuotaExceeded, QuotaScheduler, Throttled
+from .search import run_batch, run_search
+
+__all__ = ["ApiClient", "ApiError", "get_client", "TIERS", "QuotaExceeded", "QuotaScheduler", "Throttled",
+           "run_batch", "run_search"]
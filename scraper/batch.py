@@ -0,0 +1,94 @@
+"""Batch searches: many keyword × location × count rows fanned out to /scrape."""
+import csv
+import io
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+
+from .client import ApiError
+from .leads import lead_fingerprint
+
+REQUIRED_COLUMNS = ("keyword", "location")
+
+
+def parse_batch_csv(data, default_count=10, max_count=None):
+    """Parse an uploaded CSV into ``{"keyword", "location", "count"}`` rows.
+
+    ``count`` is optional per row and clamped to ``max_count`` (the tier cap).
+    Raises ``ValueError`` when the header is missing a required column.
+    """
+    if isinstance(data, bytes):
+        data = data.decode("utf-8-sig")
+    reader = csv.DictReader(io.StringIO(data))
+    columns = [c.strip().lower() for c in (reader.fieldnames or [])]
+    missing = [c for c in REQUIRED_COLUMNS if c not in columns]
+    if missing:
+        raise ValueError(f"CSV is missing column(s): {', '.join(missing)}")
+
+    rows = []
+    for raw in reader:
+        row = {(k or "").strip().lower(): (v or "").strip() for k, v in raw.items()}
+        if not row["keyword"] or not row["location"]:
+            continue
+        try:
+            count = int(row.get("count") or default_count)
+        except ValueError:
+            count = default_count
+        count = max(1, count)
+        if max_count:
+            count = min(count, max_count)
+        rows.append({"keyword": row["keyword"], "location": row["location"], "count": count})
+    return rows
+
+
+def merge_results(result_sets):
+    """Concatenate result lists, dropping exact repeats of the same business."""
+    seen = set()
+    merged = []
+    for results in result_sets:
+        for lead in results:
+            key = lead_fingerprint(lead)
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(lead)
+    return merged
+
+
+def _run_row(client, api_key, row, slot=None):
+    results, summary = [], {}
+    with slot() if slot is not None else nullcontext() as ticket:
+        for kind, payload in client.iter_scrape(api_key, row["keyword"], row["location"], row["count"], stream=False):
+            if kind == "lead":
+                results.append(payload)
+            else:
+                summary = payload
+        if ticket is not None:
+            ticket.usage = summary.get("usage")
+    return results, summary
+
+
+def iter_batch(client, api_key, rows, max_workers, slot=None):
+    """Run ``rows`` on a bounded thread pool, yielding each row as it finishes.
+
+    Yields ``(index, status)`` where ``status`` holds ``state`` ("done" or
+    "failed"), ``returned``, ``error``, ``results`` and ``summary``. Widgets
+    must only be touched from the caller, so progress is reported by yielding
+    back to the script thread rather than from the workers. ``slot``, if
+    given, returns a context manager each row holds while it calls /scrape
+    (see ``QuotaScheduler.slot``).
+    """
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {pool.submit(_run_row, client, api_key, row, slot): i for i, row in enumerate(rows)}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                results, summary = future.result()
+                status = {"state": "done", "returned": len(results), "error": "",
+                          "results": results, "summary": summary}
+            except ApiError as e:
+                status = {"state": "failed", "returned": 0, "error": f"HTTP {e.status_code}: {e.message}",
+                          "results": [], "summary": e.data}
+            except Exception as e:
+                status = {"state": "failed", "returned": 0, "error": str(e),
+                          "results": [], "summary": {}}
+            yield index, status
@@ -0,0 +1,109 @@
+"""On-disk cache of /scrape results for repeat searches.
+
+Entries are keyed by the normalized (keyword, location, tier); each row keeps
+the largest ``count`` fetched so far, so a smaller request is answered by
+slicing a cached larger one. Expired rows are ignored and the table is kept
+under ``max_entries`` by evicting the least recently used rows.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from .config import DATA_DIR
+
+DEFAULT_PATH = os.getenv("RESULT_CACHE_PATH", os.path.join(DATA_DIR, "cache.sqlite3"))
+DEFAULT_TTL = int(os.getenv("RESULT_CACHE_TTL", 24 * 3600))  # seconds
+DEFAULT_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", 500))
+
+
+def normalize(text):
+    return " ".join((text or "").lower().split())
+
+
+def cache_key(keyword, location, tier):
+    return f"{normalize(keyword)}|{normalize(location)}|{(tier or 'free').lower()}"
+
+
+class ResultCache:
+    def __init__(self, path=DEFAULT_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                count INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+        self._conn.commit()
+
+    def get(self, keyword, location, count, tier):
+        """Return ``(results, summary)`` for a fresh entry covering ``count``, else ``None``."""
+        key = cache_key(keyword, location, tier)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT count, payload, summary, created FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            cached_count, payload, summary, created = row
+            if now - created > self.ttl:
+                self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            results = json.loads(payload)
+            # A short cached answer (fewer leads than asked for) still covers
+            # larger requests: the backend had nothing more to give.
+            if cached_count < count and len(results) >= cached_count:
+                return None
+            self._conn.execute("UPDATE results SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return results[:count], json.loads(summary)
+
+    def put(self, keyword, location, count, tier, results, summary=None):
+        key = cache_key(keyword, location, tier)
+        now = time.time()
+        with self._lock:
+            existing = self._conn.execute(
+                "SELECT count, created FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            # Never replace a fresh larger result with a smaller one
+            if existing and existing[0] > count and now - existing[1] <= self.ttl:
+                return
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, count, payload, summary, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, count, json.dumps(results), json.dumps(summary or {}), now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        self._conn.execute("DELETE FROM results WHERE created < ?", (time.time() - self.ttl,))
+        self._conn.execute(
+            "DELETE FROM results WHERE key IN ("
+            "SELECT key FROM results ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM results")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
@@ -0,0 +1,266 @@
+"""Command-line searches without a Streamlit server.
+
+    python -m scraper search "dentist" "New York" -n 50 -o leads.csv
+    python -m scraper batch searches.csv -o leads.parquet
+    python -m scraper refresh "dentist" "New York" -o new_leads.csv
+    python -m scraper suppress do_not_contact.csv
+    python -m scraper status
+
+The API key comes from ``--api-key`` or ``API_KEY``. Searches go through the
+same result cache and lead index as the app, unless ``--no-cache`` /
+``--no-index`` are given. Indexed searches are also kept in the search
+history (as owner ``cli``), which ``refresh`` compares against to output only
+the leads that are new or changed since the last run. Leads on the
+suppression list (see ``suppress``) are left out of every output unless
+``--no-suppression`` is given, and ``--merge-duplicates`` collapses listings
+that look like the same business (see ``dedup``).
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+from .client import ApiError, get_client
+from .config import API_URL, DEFAULT_API_KEY
+from .export import FORMATS, available_formats, write_export
+from .quota import TIERS, QuotaExceeded, QuotaScheduler, Throttled, tier_limits
+from .search import batch_results, run_batch, run_refresh, run_search
+from .status import account_from_status
+
+
+def _output_format(path, fmt):
+    if fmt:
+        return fmt
+    ext = os.path.splitext(path or "")[1].lstrip(".").lower()
+    for name, spec in FORMATS.items():
+        if spec["ext"] == ext:
+            return name
+    return "csv"
+
+
+def _write(leads, path, fmt):
+    if fmt not in available_formats():
+        raise SystemExit(f"error: {fmt} export needs an optional package that isn't installed")
+    if not path or path == "-":
+        write_export(leads, fmt, sys.stdout.buffer)
+        sys.stdout.buffer.flush()
+        return
+    with open(path, "wb") as f:
+        write_export(leads, fmt, f)
+
+
+def _log(args, message):
+    if not args.quiet:
+        print(message, file=sys.stderr)
+
+
+def _account(client, args):
+    """``(tier, scheduler)`` for the key; ``--tier`` skips the /status call.
+
+    The scheduler is ``None`` when there is no usage to check against.
+    """
+    if args.tier:
+        return args.tier, None
+    resp = client.status(args.api_key)
+    account = account_from_status(resp.status_code, resp.json() if resp.content else {}, args.api_key)
+    if account is None:
+        return "free", None
+    if args.no_quota_check:
+        return account["tier"], None
+    scheduler = QuotaScheduler()
+    scheduler.observe(args.api_key, account["tier"], account["usage"], account["reset"])
+    return account["tier"], scheduler
+
+
+HISTORY_OWNER = "cli"
+
+
+def _stores(args):
+    cache = store = history = None
+    if not args.no_cache:
+        from .cache import ResultCache
+        cache = ResultCache()
+    if not args.no_index:
+        from .history import SearchHistory
+        from .leads import LeadStore
+        store = LeadStore()
+        history = SearchHistory()
+    return cache, store, history
+
+
+def _final(args, leads):
+    """``leads`` as written: suppression list applied, fuzzy duplicates merged if asked."""
+    if not args.no_suppression:
+        from .suppression import get_suppression_list
+        leads, _, suppressed = get_suppression_list().filter(leads)
+        if suppressed:
+            _log(args, f"{suppressed} leads on the suppression list left out")
+    if args.merge_duplicates:
+        from .dedup import merge_duplicates
+        outcome = merge_duplicates(leads)
+        leads = outcome["leads"]
+        _log(args, f"merged {outcome['duplicates']} duplicates into {len(outcome['clusters'])} businesses")
+    return leads
+
+
+# ─────────────────────────────────────────────
+# Commands
+def cmd_search(client, args):
+    tier, scheduler = _account(client, args)
+    count = args.count or tier_limits(tier)["default_count"]
+    cache, store, history = _stores(args)
+    outcome = run_search(client, args.api_key, args.keyword, args.location, count, tier,
+                         cache=cache, store=store, bypass_cache=args.refresh, stream=False,
+                         scheduler=scheduler)
+    if history is not None:
+        history.record(HISTORY_OWNER, args.keyword, args.location, count, outcome["results"],
+                       cached=outcome["cached"])
+    fmt = _output_format(args.output, args.format)
+    leads = _final(args, outcome["results"])
+    _write(leads, args.output, fmt)
+    source = "cache" if outcome["cached"] else "a shared search" if outcome["shared"] else "backend"
+    _log(args, f"{len(leads)} leads from {source} -> {args.output or 'stdout'} ({fmt})")
+    return 0
+
+
+def cmd_batch(client, args):
+    from .batch import parse_batch_csv
+
+    tier, scheduler = _account(client, args)
+    limits = tier_limits(tier)
+    with open(args.file, "rb") as f:
+        rows = parse_batch_csv(f.read(), default_count=limits["default_count"], max_count=limits["max_count"])
+    cache, store, history = _stores(args)
+
+    def on_row(index, status):
+        row = rows[index]
+        detail = status["error"] or f"{status['returned']} leads"
+        _log(args, f"[{status['state']}] {row['keyword']} in {row['location']}: {detail}")
+
+    statuses = run_batch(client, args.api_key, rows, tier, cache=cache, bypass_cache=args.refresh,
+                         max_workers=args.workers, scheduler=scheduler, on_row=on_row)
+    leads = batch_results(statuses)
+    if store is not None:
+        store.merge(leads, f"batch {os.path.basename(args.file)}")
+    if history is not None:
+        for row, status in zip(rows, statuses):
+            if status["state"] in ("done", "cached"):
+                history.record(HISTORY_OWNER, row["keyword"], row["location"], row["count"], status["results"],
+                               cached=status["state"] == "cached", source="batch")
+    fmt = _output_format(args.output, args.format)
+    leads = _final(args, leads)
+    _write(leads, args.output, fmt)
+    failed = sum(1 for status in statuses if status["state"] == "failed")
+    _log(args, f"{len(leads)} unique leads from {len(rows) - failed}/{len(rows)} searches "
+               f"-> {args.output or 'stdout'} ({fmt})")
+    return 1 if failed else 0
+
+
+def cmd_refresh(client, args):
+    if args.no_index:
+        raise SystemExit("error: refresh compares against the lead index; drop --no-index")
+    tier, scheduler = _account(client, args)
+    _, store, history = _stores(args)
+    previous = history.latest(HISTORY_OWNER, args.keyword, args.location)
+    count = args.count or (previous["requested"] if previous else tier_limits(tier)["default_count"])
+    since = datetime.fromtimestamp(previous["created"], timezone.utc).isoformat() if previous else None
+    outcome = run_refresh(client, args.api_key, args.keyword, args.location, count,
+                          previous["lead_keys"] if previous else [], tier, store=store, since=since,
+                          stream=False, scheduler=scheduler)
+    history.record(HISTORY_OWNER, args.keyword, args.location, count, outcome["fetched"], source="refresh",
+                   lead_keys=outcome["lead_keys"])
+    fmt = _output_format(args.output, args.format)
+    _write(_final(args, outcome["results"]), args.output, fmt)
+    changes = outcome["changes"]
+    removed = f", {changes['removed']} no longer listed" if changes["removed"] else ""
+    _log(args, f"{changes['new']} new and {changes['changed']} changed leads ({changes['unchanged']} unchanged"
+               f"{removed}) -> {args.output or 'stdout'} ({fmt})")
+    return 0
+
+
+def cmd_suppress(client, args):
+    from .suppression import get_suppression_list
+
+    suppression = get_suppression_list()
+    if args.clear:
+        suppression.clear()
+    elif args.file:
+        with open(args.file, "rb") as f:
+            suppression.build(f, os.path.basename(args.file))
+    print(json.dumps(suppression.info(), indent=2))
+    return 0
+
+
+def cmd_status(client, args):
+    resp = client.status(args.api_key)
+    data = resp.json() if resp.content else {}
+    account = account_from_status(resp.status_code, data, args.api_key)
+    print(json.dumps(account if account is not None else {"status": resp.status_code, **data}, indent=2))
+    return 0 if resp.status_code == 200 else 1
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m scraper", description="Cold Email Scraper command line")
+    parser.add_argument("--api-url", default=API_URL)
+    parser.add_argument("--api-key", default=os.getenv("API_KEY") or DEFAULT_API_KEY)
+    parser.add_argument("-q", "--quiet", action="store_true", help="no progress on stderr")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def search_options(p):
+        p.add_argument("-o", "--output", help="output file (default: stdout)")
+        p.add_argument("-f", "--format", choices=list(FORMATS), help="default: from the output extension, else csv")
+        p.add_argument("--tier", choices=list(TIERS),
+                       help="plan tier; skips the /status lookup and the local quota check")
+        p.add_argument("--refresh", action="store_true", help="ignore cached results (still updates the cache)")
+        p.add_argument("--no-cache", action="store_true", help="don't read or write the result cache")
+        p.add_argument("--no-index", action="store_true", help="don't add leads to the lead index")
+        p.add_argument("--no-quota-check", action="store_true", help="let the backend enforce plan limits")
+        p.add_argument("--no-suppression", action="store_true", help="keep leads that are on the suppression list")
+        p.add_argument("--merge-duplicates", action="store_true",
+                       help="merge listings of the same business under slightly different names")
+
+    p = sub.add_parser("search", help="run one search")
+    p.add_argument("keyword")
+    p.add_argument("location")
+    p.add_argument("-n", "--count", type=int, help="number of results (default: the plan default)")
+    search_options(p)
+    p.set_defaults(func=cmd_search)
+
+    p = sub.add_parser("batch", help="run every row of a keyword,location[,count] CSV")
+    p.add_argument("file")
+    p.add_argument("--workers", type=int, help="parallel searches (default: the plan's concurrency)")
+    search_options(p)
+    p.set_defaults(func=cmd_batch)
+
+    p = sub.add_parser("refresh", help="re-run a search, output only leads new or changed since its last run")
+    p.add_argument("keyword")
+    p.add_argument("location")
+    p.add_argument("-n", "--count", type=int, help="number of results (default: as last time)")
+    search_options(p)
+    p.set_defaults(func=cmd_refresh)
+
+    p = sub.add_parser("suppress", help="replace (or show) the do-not-contact list of emails, phones and domains")
+    p.add_argument("file", nargs="?", help="one entry per line, or CSV cells; without it the current list is shown")
+    p.add_argument("--clear", action="store_true", help="remove the list")
+    p.set_defaults(func=cmd_suppress)
+
+    p = sub.add_parser("status", help="show plan, usage and reset times")
+    p.set_defaults(func=cmd_status)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    client = get_client(args.api_url)
+    try:
+        return args.func(client, args)
+    except QuotaExceeded as e:
+        print(f"error: {e} ({e.needed} needed, {e.remaining} left)", file=sys.stderr)
+    except Throttled as e:
+        print(f"error: {e}", file=sys.stderr)
+    except ApiError as e:
+        print(f"error: API error ({e.status_code}): {e.message}", file=sys.stderr)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+    return 1
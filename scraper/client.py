@@ -0,0 +1,264 @@
+"""Shared HTTP client for the Cold Email Scraper backend.
+
+One pooled ``requests.Session`` per base URL is kept for the whole process, so
+Streamlit reruns (and every browser session on the same server) reuse the same
+keep-alive connections instead of paying a TLS handshake per call.
+"""
+import json
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .metrics import metrics as default_metrics
+
+# ─────────────────────────────────────────────
+# Config
+# (connect, read) timeouts in seconds, per endpoint
+TIMEOUTS = {
+    "status": (5, 10),
+    "activate": (5, 30),  # Gumroad validation can be slow
+    "login": (5, 30),
+    "logout": (5, 10),
+    "scrape": (5, 120),
+    "results": (5, 60),
+}
+DEFAULT_TIMEOUT = (5, 30)
+
+# Content types the backend may answer /scrape with
+NDJSON_TYPES = ("application/x-ndjson", "application/jsonl", "application/ndjson")
+SSE_TYPE = "text/event-stream"
+STREAM_ACCEPT = "application/x-ndjson, text/event-stream;q=0.9, application/json;q=0.5"
+
+POOL_SIZE = 20
+CONNECT_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+
+
+class ApiError(Exception):
+    """Non-2xx (or error payload) answer from the backend."""
+
+    def __init__(self, status_code, message, data=None, text=""):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+        self.data = data or {}
+        self.text = text
+
+
+class ApiClient:
+    def __init__(self, base_url, pool_size=POOL_SIZE, retries=CONNECT_RETRIES, backoff=BACKOFF_FACTOR,
+                 metrics=None):
+        self.base_url = base_url.rstrip("/")
+        self.metrics = metrics or default_metrics
+        self.session = requests.Session()
+
+        # Only retry failures where the request never reached the server, so
+        # a POST to /scrape or /activate can't be charged twice.
+        retry = Retry(
+            total=None,
+            connect=retries,
+            read=0,
+            status=0,
+            other=0,
+            backoff_factor=backoff,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def request(self, method, endpoint, api_key=None, timeout=None, **kwargs):
+        headers = kwargs.pop("headers", {})
+        if api_key:
+            headers["X-API-Key"] = api_key
+        if timeout is None:
+            timeout = TIMEOUTS.get(endpoint, DEFAULT_TIMEOUT)
+        start = time.perf_counter()
+        try:
+            resp = self.session.request(
+                method,
+                f"{self.base_url}/{endpoint}",
+                headers=headers,
+                timeout=timeout,
+                **kwargs
+            )
+        except requests.exceptions.RequestException as e:
+            self.metrics.record_request(endpoint, type(e).__name__, time.perf_counter() - start)
+            raise
+        # Streamed responses are timed to their headers here; see iter_scrape
+        self.metrics.record_request(endpoint, resp.status_code, time.perf_counter() - start)
+        return resp
+
+    # ─────────────────────────────────────────────
+    # Endpoints
+    def status(self, api_key):
+        return self.request("GET", "status", api_key=api_key)
+
+    def activate(self, license_key):
+        return self.request("POST", "activate", api_key=license_key, json={"key": license_key})
+
+    def login(self, premium_key):
+        return self.request("POST", "login", api_key=premium_key, json={"premium_key": premium_key})
+
+    def logout(self, api_key):
+        return self.request("POST", "logout", api_key=api_key)
+
+    def scrape(self, api_key, keyword, location, count):
+        return self.request(
+            "POST",
+            "scrape",
+            api_key=api_key,
+            json={"keyword": keyword, "location": location, "count": count}
+        )
+
+    def scrape_page(self, api_key, keyword, location, count, page_size):
+        """Start a cursor-paginated search and return its first page.
+
+        The answer carries ``results`` for the first ``page_size`` leads and a
+        ``next_cursor`` for ``results_page`` (absent once exhausted). A backend
+        without cursor support returns the whole list and no cursor.
+        """
+        resp = self.request(
+            "POST",
+            "scrape",
+            api_key=api_key,
+            json={"keyword": keyword, "location": location, "count": count, "page_size": page_size}
+        )
+        return _json_or_raise(resp)
+
+    def results_page(self, api_key, cursor):
+        resp = self.request("GET", "results", api_key=api_key, params={"cursor": cursor})
+        return _json_or_raise(resp)
+
+    def iter_scrape(self, api_key, keyword, location, count, stream=True, since=None):
+        """Run a search and yield ``(kind, payload)`` events as they arrive.
+
+        ``kind`` is ``"lead"`` for every result and ``"summary"`` exactly once
+        at the end (``requested``, ``returned``, ``message``, ``usage``). A
+        streaming backend answers with NDJSON or SSE records of the form
+        ``{"type": "lead" | "summary" | "error", ...}``; a plain JSON answer
+        (the original contract) is replayed through the same events.
+
+        ``since`` (an ISO timestamp) asks for only the leads added or changed
+        after it; a backend that honours it sets ``"delta": true`` in the
+        summary, others ignore it and return the full list.
+        """
+        headers = {"Accept": STREAM_ACCEPT} if stream else {}
+        payload = {"keyword": keyword, "location": location, "count": count, "stream": stream}
+        if since is not None:
+            payload["since"] = since
+        start = time.perf_counter()
+        resp = self.request(
+            "POST",
+            "scrape",
+            api_key=api_key,
+            headers=headers,
+            json=payload,
+            stream=stream
+        )
+        with resp:
+            content_type = resp.headers.get("Content-Type", "").split(";")[0].strip().lower()
+            if resp.status_code == 200 and content_type in NDJSON_TYPES:
+                records = _iter_ndjson(resp)
+            elif resp.status_code == 200 and content_type == SSE_TYPE:
+                records = _iter_sse(resp)
+            else:
+                yield from _replay_json(resp)
+                return
+
+            got_summary = False
+            returned = 0
+            for record in records:
+                kind = record.pop("type", "lead")
+                if kind == "error":
+                    raise ApiError(resp.status_code, record.get("error", "Unknown error"), record)
+                if kind == "summary":
+                    got_summary = True
+                    yield "summary", record
+                elif kind == "lead":
+                    returned += 1
+                    yield "lead", record.get("data", record)
+            self.metrics.record_stream("scrape", time.perf_counter() - start)
+            if not got_summary:
+                yield "summary", {"requested": count, "returned": returned}
+
+    def close(self):
+        self.session.close()
+
+
+# ─────────────────────────────────────────────
+# Response decoding
+def _json_or_raise(resp):
+    try:
+        data = resp.json()
+    except ValueError:
+        raise ApiError(resp.status_code, "Invalid JSON response from server.", text=resp.text)
+    if resp.status_code != 200 or "error" in data:
+        raise ApiError(resp.status_code, data.get("error", "Unknown error"), data, resp.text)
+    return data
+
+
+def _replay_json(resp):
+    data = _json_or_raise(resp)
+    for lead in data.get("results", []):
+        yield "lead", lead
+    yield "summary", {k: v for k, v in data.items() if k != "results"}
+
+
+def _iter_ndjson(resp):
+    for line in resp.iter_lines(decode_unicode=True):
+        if line and line.strip():
+            yield json.loads(line)
+
+
+def _iter_sse(resp):
+    event, data_lines = None, []
+    for line in resp.iter_lines(decode_unicode=True):
+        if line:
+            if line.startswith(":"):
+                continue
+            field, _, value = line.partition(":")
+            value = value[1:] if value.startswith(" ") else value
+            if field == "event":
+                event = value
+            elif field == "data":
+                data_lines.append(value)
+            continue
+        # Blank line terminates an event
+        if data_lines:
+            yield _sse_record(event, data_lines)
+        event, data_lines = None, []
+    if data_lines:
+        yield _sse_record(event, data_lines)
+
+
+def _sse_record(event, data_lines):
+    record = json.loads("\n".join(data_lines))
+    if not event:
+        return record
+    # The event name is the record's kind; a lead's own fields (it may well
+    # have a "type") are left alone
+    if event == "lead":
+        return {"type": "lead", "data": record}
+    return {**record, "type": event}
+
+
+# ─────────────────────────────────────────────
+# Process-wide instances
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(base_url):
+    """Return the shared client for ``base_url``, creating it on first use."""
+    client = _clients.get(base_url)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(base_url)
+            if client is None:
+                client = ApiClient(base_url)
+                _clients[base_url] = client
+    return client
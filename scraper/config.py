@@ -0,0 +1,16 @@
+"""Settings shared by the scraper modules, overridable through the environment."""
+import os
+
+# Where local databases (result cache, lead index, ...) live
+DATA_DIR = os.getenv("SCRAPER_DATA_DIR", os.path.join(os.path.expanduser("~"), ".cold_email_scraper"))
+
+# Backend the app and the CLI talk to; point it at bench/mock_backend.py to run offline
+API_URL = os.getenv("API_URL", "https://cold-email-scraper.fly.dev").rstrip("/")
+
+# Shared free-tier key used when no API key is configured
+DEFAULT_API_KEY = "free_tier_default_key_12345"
+
+# API keys allowed to replace or remove server-wide settings such as the
+# suppression list (comma-separated); the shared free-tier key never is
+ADMIN_API_KEYS = frozenset(key.strip() for key in os.getenv("ADMIN_API_KEYS", "").split(",")
+                           if key.strip() and key.strip() != DEFAULT_API_KEY)
@@ -0,0 +1,261 @@
+"""Fuzzy duplicate-business detection over a result set.
+
+Exact fingerprints (``leads.lead_fingerprint``) miss the same business listed
+as "Smile Dental NYC" in one search and "Smile Dental" in another. Here leads
+are only compared within blocks that share a registrable domain, a phone
+number or a postcode. Within a block, leads are sorted by name and each is
+compared with the next ``WINDOW`` only, so the work grows linearly, not with
+n².
+
+Names and streets are compared by character-trigram Dice similarity. Each
+text becomes a ``SKETCH_BITS``-bit set of its trigrams, so scoring a pair is
+an AND and a popcount over a few machine words, done for all pairs at once.
+Only the street is compared (the address up to its first comma, without the
+house number or words like "st" and "suite"): the city and state that follow
+are shared by every lead of a search and would make any two addresses look
+alike. A pair is never merged when both sides have a phone, a website, an
+email on a company domain, a street or a house number, and those differ.
+Otherwise it is the same business when the names are similar and either the
+phone is the same (businesses in one building can share a switchboard, hence
+the address checks), the streets are similar, or the website domain is the
+same and one side has no address (chains share a domain but not an address). Matching pairs are
+joined into clusters, and each cluster becomes its most complete lead with
+missing fields taken from the others.
+"""
+from .normalize import email_domains, normalize_emails, normalize_phones, registrable_domains
+
+WINDOW = 10
+NAME_WIDTH = 40  # characters compared; longer text is cut
+STREET_WIDTH = 32
+SKETCH_BITS = 512
+
+NAME_WITH_PHONE = 0.6
+NAME_WITH_STREET = 0.6
+STREET_MIN = 0.6
+NAME_WITH_DOMAIN = 0.6
+
+# Last US ZIP, UK or Canadian postcode in the address
+_POSTCODE = r"^.*\b(\d{5}|[a-z]{1,2}\d[a-z\d]? ?\d[a-z]{2}|[a-z]\d[a-z] ?\d[a-z]\d)\b.*$"
+_AFTER_STREET = r",.*$"
+_HOUSE_NUMBER = r"^(\d+)\b.*$"
+_LEADING_NUMBER = r"^\d+\b"
+_NAME_NOISE = r"\b(?:the|and|llc|inc|ltd|co|corp|company|pllc|pc|plc|gmbh)\b"
+_STREET_NOISE = (r"\b(?:street|st|avenue|ave|road|rd|boulevard|blvd|drive|dr|lane|ln|court|ct|place|pl|way|"
+                 r"highway|hwy|suite|ste|unit|apt|floor|fl|north|south|east|west|n|s|e|w)\b")
+
+# Webmail domains say nothing about which business an email belongs to
+WEBMAIL_DOMAINS = ("gmail.com", "googlemail.com", "yahoo.com", "hotmail.com", "outlook.com", "live.com",
+                   "msn.com", "aol.com", "icloud.com", "me.com", "mail.com", "gmx.com", "protonmail.com",
+                   "yahoo.co.uk", "hotmail.co.uk", "btinternet.com", "comcast.net", "verizon.net")
+
+COMPLETENESS_FIELDS = ("email", "phone", "website", "address", "rating")
+
+
+def _clean(series, noise=None):
+    text = series.astype("string").str.lower().str.replace(r"[^a-z0-9 ]+", " ", regex=True)
+    if noise:
+        text = text.str.replace(noise, " ", regex=True)
+    return text.str.replace(r"\s+", " ", regex=True).str.strip().fillna("")
+
+
+def _sketches(text, width):
+    """``(n, SKETCH_BITS // 64)`` uint64 bit sets of each text's character trigrams."""
+    import numpy as np
+
+    n = len(text)
+    padded = text.str.slice(0, width).str.pad(width, side="right", fillchar="\0")
+    chars = np.frombuffer(padded.str.cat().encode("ascii"), dtype=np.uint8).reshape(n, width).astype(np.uint64)
+    codes = (chars[:, :-2] << 16) | (chars[:, 1:-1] << 8) | chars[:, 2:]
+    # Multiplicative hash of each trigram to one bit of the sketch
+    bits = ((codes * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(32)) % np.uint64(SKETCH_BITS)
+    valid = chars[:, 2:] != 0
+    rows = np.broadcast_to(np.arange(n)[:, None], codes.shape)[valid]
+    bits = bits[valid]
+    sketches = np.zeros((n, SKETCH_BITS // 64), dtype=np.uint64)
+    np.bitwise_or.at(sketches, (rows, (bits >> np.uint64(6)).astype(np.intp)),
+                     np.left_shift(np.uint64(1), bits & np.uint64(63)))
+    return sketches
+
+
+def _popcount(words):
+    import numpy as np
+
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+    table = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+    return table[words.view(np.uint8)].reshape(*words.shape[:-1], -1).sum(axis=-1)
+
+
+def _dice(sketches, a, b):
+    """Trigram Dice similarity of rows ``a[i]`` and ``b[i]`` of ``sketches``."""
+    import numpy as np
+
+    sizes = _popcount(sketches)
+    total = sizes[a] + sizes[b]
+    shared = _popcount(sketches[a] & sketches[b])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(total > 0, 2 * shared / total, 0.0).astype(np.float32)
+
+
+def _capture(text, pattern):
+    """Group 1 of ``pattern`` where it matches ``text``, else ``<NA>``."""
+    return text.where(text.str.fullmatch(pattern).fillna(False).astype(bool)).str.replace(pattern, r"\1", regex=True)
+
+
+def _block_pairs(keys, name_rank):
+    """Pairs ``(a, b)``, ``a < b``, of rows with the same non-empty key and nearby names."""
+    import numpy as np
+    import pandas as pd
+
+    codes = pd.factorize(keys)[0]  # -1 for missing
+    present = np.flatnonzero(codes >= 0)
+    if len(present) < 2:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    order = present[np.lexsort((name_rank[present], codes[present]))]
+    codes = codes[order]
+    pairs_a, pairs_b = [], []
+    for step in range(1, min(WINDOW, len(order) - 1) + 1):
+        same = codes[:-step] == codes[step:]
+        pairs_a.append(order[:-step][same])
+        pairs_b.append(order[step:][same])
+    a, b = np.concatenate(pairs_a), np.concatenate(pairs_b)
+    return np.minimum(a, b), np.maximum(a, b)
+
+
+def _components(n, a, b):
+    """Cluster label per row: the smallest row index it is connected to."""
+    import numpy as np
+
+    labels = np.arange(n)
+    while True:
+        low = np.minimum(labels[a], labels[b])
+        before = labels.copy()
+        np.minimum.at(labels, a, low)
+        np.minimum.at(labels, b, low)
+        labels = labels[labels]
+        if np.array_equal(labels, before):
+            return labels
+
+
+def find_duplicates(df):
+    """Cluster label per row of a leads DataFrame (rows with the same label are one business).
+
+    ``domain``, ``phone_e164`` and ``email_norm`` (see ``normalize``) are
+    used when present, else derived from ``website``, ``phone`` and ``email``.
+
+    Returns ``(labels, pairs)``: ``pairs`` is a DataFrame of the matched row
+    pairs with their ``name_sim`` and ``street_sim``.
+    """
+    import numpy as np
+    import pandas as pd
+
+    df = df.reset_index(drop=True)
+    n = len(df)
+
+    def column(name):
+        return df[name] if name in df.columns else pd.Series(pd.NA, index=df.index, dtype="string")
+
+    names = _clean(column("name"), _NAME_NOISE)
+    addresses = _clean(column("address"))
+    postcodes = _capture(addresses, _POSTCODE).str.replace(" ", "", regex=False)
+    streets = _clean(column("address").astype("string").str.replace(_AFTER_STREET, "", regex=True))
+    numbers = pd.factorize(_capture(streets, _HOUSE_NUMBER))[0]  # -1 for none
+    streets = _clean(streets.str.replace(_LEADING_NUMBER, "", regex=True), _STREET_NOISE)
+    domains = df["domain"] if "domain" in df.columns else registrable_domains(column("website"))
+    phones = df["phone_e164"] if "phone_e164" in df.columns else normalize_phones(column("phone"))
+    emails = df["email_norm"] if "email_norm" in df.columns else normalize_emails(column("email"))[0]
+    mail_domains = email_domains(emails)
+    mail_domains = mail_domains.where(~mail_domains.isin(WEBMAIL_DOMAINS))
+
+    name_rank = pd.factorize(names, sort=True)[0]
+    blocks = [_block_pairs(keys, name_rank) for keys in (domains, phones, postcodes)]
+    a = np.concatenate([pair[0] for pair in blocks])
+    b = np.concatenate([pair[1] for pair in blocks])
+    if len(a):
+        keys = np.sort(a * n + b)
+        keys = keys[np.r_[True, keys[1:] != keys[:-1]]]
+        a, b = keys // n, keys % n
+    empty = pd.DataFrame({"a": a[:0], "b": b[:0], "name_sim": np.empty(0, np.float32),
+                          "street_sim": np.empty(0, np.float32)})
+    if not len(a):
+        return np.arange(n), empty
+
+    def compare(series):
+        """``(same, conflict)``: both known and equal / both known and different."""
+        codes = pd.factorize(series)[0]  # -1 for missing
+        known = (codes[a] >= 0) & (codes[b] >= 0)
+        return known & (codes[a] == codes[b]), known & (codes[a] != codes[b])
+
+    same_phone, other_phone = compare(phones)
+    same_domain, other_domain = compare(domains)
+    _, other_mail = compare(mail_domains)
+    other_number = (numbers[a] >= 0) & (numbers[b] >= 0) & (numbers[a] != numbers[b])
+    conflict = other_phone | other_domain | other_mail | other_number
+    name_sim = _dice(_sketches(names, NAME_WIDTH), a, b)
+    # Streets only matter for pairs that can still match
+    street_sim = np.zeros(len(a), dtype=np.float32)
+    close = (name_sim >= min(NAME_WITH_PHONE, NAME_WITH_STREET, NAME_WITH_DOMAIN)) & ~conflict
+    street_sim[close] = _dice(_sketches(streets, STREET_WIDTH), a[close], b[close])
+
+    has_address = (addresses != "").to_numpy()
+    has_street = (streets != "").to_numpy()
+    other_street = has_street[a] & has_street[b] & (street_sim < STREET_MIN)
+    match = close & ~other_street & (
+        (same_phone & (name_sim >= NAME_WITH_PHONE))
+        | ((street_sim >= STREET_MIN) & (name_sim >= NAME_WITH_STREET))
+        | (same_domain & ~(has_address[a] & has_address[b]) & (name_sim >= NAME_WITH_DOMAIN)))
+    pairs = pd.DataFrame({"a": a[match], "b": b[match], "name_sim": name_sim[match],
+                          "street_sim": street_sim[match]})
+    return _components(n, pairs["a"].to_numpy(), pairs["b"].to_numpy()), pairs
+
+
+def merge_duplicates(leads, df=None):
+    """Collapse fuzzy duplicates in ``leads``.
+
+    ``df`` is the leads' frame (``frame.build_frame``), when there is one:
+    its normalized ``domain`` and ``phone_e164`` columns are reused rather
+    than derived again.
+
+    Returns a dict with ``leads`` (in first-seen order, one per business),
+    ``kept`` (index into ``leads`` of each output lead's canonical row),
+    ``duplicates`` (rows merged away) and ``clusters`` (per merged business:
+    ``name``, ``count`` and the ``names`` it was listed under).
+    """
+    import numpy as np
+    import pandas as pd
+
+    if len(leads) < 2:
+        return {"leads": list(leads), "kept": list(range(len(leads))), "duplicates": 0, "clusters": []}
+    if df is None:
+        df = pd.DataFrame({field: pd.Series([lead.get(field) for lead in leads], dtype="string")
+                           for field in ("name", "email", "phone", "website", "address", "rating")})
+    labels, _ = find_duplicates(df)
+
+    n = len(leads)
+    filled = np.zeros(n, dtype=np.int64)
+    for field in COMPLETENESS_FIELDS:
+        if field in df.columns:
+            filled += df[field].notna().to_numpy()
+    # A cluster's label is its first-seen row; its canonical row is the most
+    # complete member (then the first seen)
+    order = np.lexsort((np.arange(n), -filled, labels))
+    starts = np.flatnonzero(np.r_[True, labels[order][1:] != labels[order][:-1]])
+    sizes = np.diff(np.r_[starts, n])
+    by_first_seen = np.argsort(labels[order][starts], kind="stable")
+    merged, kept, clusters = [], [], []
+    for start, size in zip(starts[by_first_seen], sizes[by_first_seen]):
+        best = int(order[start])
+        lead = leads[best]
+        if size > 1:
+            rows = sorted(order[start:start + size])
+            lead = dict(lead)
+            for row in rows:
+                for field, value in leads[row].items():
+                    if lead.get(field) in (None, "") and value not in (None, ""):
+                        lead[field] = value
+            clusters.append({"name": lead.get("name"), "count": int(size),
+                             "names": list(dict.fromkeys(leads[row].get("name") for row in rows))})
+        merged.append(lead)
+        kept.append(best)
+    clusters.sort(key=lambda cluster: cluster["count"], reverse=True)
+    return {"leads": merged, "kept": kept, "duplicates": n - len(merged), "clusters": clusters}
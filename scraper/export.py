@@ -0,0 +1,130 @@
+"""Lead exports: CSV, JSON Lines, Parquet and Excel.
+
+Serialization only happens when an export is actually requested. Text formats
+are generated in chunks so they can be streamed to a file without building the
+whole document in memory; ``ExportCache`` keeps the produced bytes per result
+set version so repeated downloads of the same results are free.
+"""
+import csv
+import io
+import json
+import threading
+from collections import OrderedDict
+
+FORMATS = {
+    "csv": {"label": "CSV", "ext": "csv", "mime": "text/csv"},
+    "jsonl": {"label": "JSON Lines", "ext": "jsonl", "mime": "application/x-ndjson"},
+    "parquet": {"label": "Parquet", "ext": "parquet", "mime": "application/vnd.apache.parquet"},
+    "xlsx": {"label": "Excel", "ext": "xlsx",
+             "mime": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"},
+}
+
+# Optional packages each format needs beyond pandas
+_REQUIRES = {"parquet": "pyarrow", "xlsx": "openpyxl"}
+
+CHUNK_ROWS = 5000
+
+
+def available_formats():
+    """Formats whose optional dependencies are installed, in display order."""
+    import importlib.util
+    return [fmt for fmt in FORMATS
+            if fmt not in _REQUIRES or importlib.util.find_spec(_REQUIRES[fmt]) is not None]
+
+
+def columns_for(leads):
+    """Union of lead keys in first-seen order, like ``pd.DataFrame(leads)``."""
+    seen = {}
+    for lead in leads:
+        for key in lead:
+            seen.setdefault(key, None)
+    return [c for c in seen if c != "#"]
+
+
+def _clean(value):
+    # NaN never equals itself; pandas writes missing values as empty cells
+    if value is None or value != value:
+        return None
+    return value
+
+
+def iter_csv(leads, columns=None, chunk_rows=CHUNK_ROWS):
+    columns = columns or columns_for(leads)
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=columns, extrasaction="ignore", lineterminator="\n")
+    writer.writeheader()
+    for i, lead in enumerate(leads, 1):
+        writer.writerow({c: _clean(lead.get(c)) for c in columns})
+        if i % chunk_rows == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+
+def iter_jsonl(leads, columns=None, chunk_rows=CHUNK_ROWS):
+    columns = columns or columns_for(leads)
+    lines = []
+    for lead in leads:
+        lines.append(json.dumps({c: _clean(lead.get(c)) for c in columns}, ensure_ascii=False, default=str))
+        if len(lines) >= chunk_rows:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def _frame(leads, columns):
+    import pandas as pd
+    return pd.DataFrame(leads, columns=columns)
+
+
+def write_export(leads, fmt, fp):
+    """Write ``leads`` as ``fmt`` to the binary file object ``fp``."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    columns = columns_for(leads)
+    if fmt == "csv":
+        for chunk in iter_csv(leads, columns):
+            fp.write(chunk.encode("utf-8"))
+    elif fmt == "jsonl":
+        for chunk in iter_jsonl(leads, columns):
+            fp.write(chunk.encode("utf-8"))
+    elif fmt == "parquet":
+        _frame(leads, columns).to_parquet(fp, index=False)
+    elif fmt == "xlsx":
+        _frame(leads, columns).to_excel(fp, index=False, sheet_name="Leads", engine="openpyxl")
+
+
+def export_bytes(leads, fmt):
+    buf = io.BytesIO()
+    write_export(leads, fmt, buf)
+    return buf.getvalue()
+
+
+class ExportCache:
+    """Produced export bytes keyed by (result set version, subset, format).
+
+    Bounded by total size; the least recently downloaded exports go first.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, build):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+        data = build()
+        with self._lock:
+            if key not in self._items and len(data) <= self.max_bytes:
+                self._items[key] = data
+                self._size += len(data)
+                while self._size > self.max_bytes:
+                    _, old = self._items.popitem(last=False)
+                    self._size -= len(old)
+        return data
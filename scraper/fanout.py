@@ -0,0 +1,90 @@
+"""Geographic fan-out: one broad search split into sub-area searches.
+
+A single /scrape is capped at the plan's ``max_count`` leads, so covering a
+metro area means searching its parts. ``split_location`` suggests sub-areas
+for a handful of large cities (extend or override them with a JSON file at
+``FANOUT_AREAS_PATH``: ``{"city": ["area", ...]}``); any list of
+neighbourhoods or postcodes can be supplied instead. The shards run as a
+batch (see ``search.run_fanout``) and ``shard_yield`` reports what each one
+added, so areas that only repeat their neighbours can be dropped next time.
+Areas whose search failed added nothing either, but only because they
+weren't searched: they are retried, never dropped.
+"""
+import json
+import os
+
+from .leads import lead_fingerprint, normalize_text
+
+AREAS_PATH = os.getenv("FANOUT_AREAS_PATH", "")
+
+AREAS = {
+    "new york": ["Manhattan", "Brooklyn", "Queens", "The Bronx", "Staten Island"],
+    "los angeles": ["Downtown", "Hollywood", "Santa Monica", "Pasadena", "Long Beach", "Burbank",
+                    "Glendale", "Koreatown", "Westwood", "Van Nuys"],
+    "chicago": ["The Loop", "Lincoln Park", "Lakeview", "Wicker Park", "Hyde Park", "Logan Square",
+                "River North", "Pilsen", "Evanston", "Oak Park"],
+    "houston": ["Downtown", "Midtown", "The Heights", "Montrose", "Galleria", "Memorial", "Bellaire",
+                "Pasadena", "Katy", "Sugar Land"],
+    "san francisco": ["Mission District", "SoMa", "Financial District", "Richmond District", "Sunset District",
+                      "Marina District", "Nob Hill", "Castro", "Noe Valley", "Bayview"],
+    "london": ["Westminster", "Camden", "Islington", "Hackney", "Tower Hamlets", "Southwark", "Lambeth",
+               "Kensington and Chelsea", "Hammersmith and Fulham", "Wandsworth", "Greenwich", "Croydon"],
+    "toronto": ["Downtown", "North York", "Scarborough", "Etobicoke", "East York", "York", "Mississauga"],
+}
+
+
+def known_areas():
+    """Built-in sub-areas, plus (and overridden by) those in ``FANOUT_AREAS_PATH``."""
+    areas = dict(AREAS)
+    if AREAS_PATH and os.path.exists(AREAS_PATH):
+        with open(AREAS_PATH, encoding="utf-8") as f:
+            areas.update({normalize_text(city): list(parts) for city, parts in json.load(f).items()})
+    return areas
+
+
+def split_location(location):
+    """Suggested sub-areas of ``location``, or ``[]`` when none are known."""
+    city = normalize_text(location).split(",")[0].strip()
+    return list(known_areas().get(city, []))
+
+
+def parse_areas(text):
+    """Sub-areas typed one per line (or separated by semicolons), blanks and repeats dropped."""
+    parts = [part.strip() for line in (text or "").splitlines() for part in line.split(";")]
+    return list(dict.fromkeys(part for part in parts if part))
+
+
+def shard_rows(keyword, location, count, areas):
+    """Batch rows (see ``batch.parse_batch_csv``), one per sub-area of ``location``."""
+    return [{"keyword": keyword, "location": f"{area}, {location}", "area": area, "count": count}
+            for area in areas]
+
+
+def shard_yield(rows, statuses):
+    """Per-shard report: leads returned, how many no earlier shard had, and emails among them.
+
+    Shards are credited in the order given, so ``unique`` answers "what
+    would be lost without this area" for all but the first overlapping one.
+    ``prunable`` is set only for shards that were searched and added nothing;
+    failed and skipped shards have no yield to judge.
+    """
+    seen = set()
+    report = []
+    for row, status in zip(rows, statuses):
+        results = status["results"] if status and status["state"] != "failed" else []
+        unique = emails = 0
+        for lead in results:
+            key = lead_fingerprint(lead)
+            if key in seen:
+                continue
+            seen.add(key)
+            unique += 1
+            if lead.get("email"):
+                emails += 1
+        state = status["state"] if status else "skipped"
+        report.append({"area": row.get("area", row["location"]), "state": state,
+                       "returned": len(results), "unique": unique, "emails": emails,
+                       "prunable": state not in ("failed", "skipped") and not unique,
+                       "unique_rate": unique / len(results) if results else 0.0,
+                       "error": status["error"] if status else ""})
+    return report
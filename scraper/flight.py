@@ -0,0 +1,73 @@
+"""Single-flight coalescing of identical in-flight searches.
+
+When several sessions start the same search while one is already running,
+they wait for that call instead of sending their own and all of them get its
+result. Only the first caller touches the backend and the plan quota. Only a
+successful result is shared: when the first call fails, each waiting caller
+makes its own, so an error (or an exception raised in the first caller's own
+session) never reaches anyone else. Nothing is remembered once the call
+returns; repeats after that are the result cache's job.
+"""
+import hashlib
+import threading
+
+from .cache import cache_key
+
+
+def flight_key(api_key, keyword, location, count, tier):
+    """Identical searches share a key: API key, normalized keyword/location, count and tier."""
+    # Keys show up in in_flight(); never keep the API key itself there
+    key_id = hashlib.sha1((api_key or "").encode("utf-8")).hexdigest()[:12]
+    return f"{key_id}|{cache_key(keyword, location, tier)}|{int(count)}"
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.ok = False
+        self.followers = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """Run ``fn()`` unless a call for ``key`` is in flight; returns ``(value, shared)``.
+
+        ``shared`` is ``True`` for callers that got another caller's result.
+        If the call they joined fails, they try again (joining or leading a
+        new call) rather than see its exception.
+        """
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+                else:
+                    call.followers += 1
+            if leader:
+                break
+            call.done.wait()
+            if call.ok:
+                return call.value, True
+
+        try:
+            call.value = fn()
+            call.ok = True
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value, False
+
+    def in_flight(self):
+        with self._lock:
+            return {key: call.followers for key, call in self._calls.items()}
+
+
+# Process-wide, so sessions, background jobs and tabs on this server coalesce
+inflight = SingleFlight()
@@ -0,0 +1,68 @@
+"""Typed, precomputed DataFrame over one result set.
+
+Built once per result set version; reruns and page flips only slice it.
+Normalized email / phone / domain columns are added in the same pass (see
+``normalize.normalize_frame``).
+"""
+from .normalize import normalize_frame
+
+# Repeated values across leads - stored once per distinct value
+CATEGORY_COLUMNS = ("city", "category", "state", "country", "type")
+FLOAT32_COLUMNS = ("rating",)
+INT_COLUMNS = ("reviews", "review_count")
+
+DISPLAY_FIRST = ["#", "name"]
+
+
+def _joined(value):
+    if isinstance(value, (list, tuple, set)):
+        return ", ".join(str(v) for v in value)
+    return value if value is None or isinstance(value, (str, int, float)) else str(value)
+
+
+def build_frame(leads, offset=0):
+    import numpy as np
+    import pandas as pd
+
+    df = pd.DataFrame(leads)
+    df = df.drop(columns="#", errors="ignore")
+    for col in df.columns:
+        if col in CATEGORY_COLUMNS:
+            try:
+                df[col] = df[col].astype("category")
+            except TypeError:
+                # Lists (a lead with several categories) become one comma-joined value
+                df[col] = df[col].map(_joined).astype("category")
+        elif col in FLOAT32_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float32")
+        elif col in INT_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("Int32")
+        elif df[col].dtype == object:
+            df[col] = df[col].astype("string")
+    df = normalize_frame(df)
+
+    # Global row numbers and display order are fixed at build time, so a page
+    # is a plain positional slice
+    df.insert(0, "#", np.arange(offset + 1, offset + len(df) + 1, dtype="int32"))
+    first = [c for c in DISPLAY_FIRST if c in df.columns]
+    return df[first + [c for c in df.columns if c not in first]]
+
+
+class ResultsFrame:
+    # Fully in memory, so the row count is exact
+    complete = True
+
+    def __init__(self, leads, version=None):
+        self.version = version
+        self.leads = leads
+        self.df = build_frame(leads)
+        self.total = len(self.df)
+        self.row_count = self.total
+        self.emails_found = int(self.df["email"].notna().sum()) if "email" in self.df.columns else 0
+        self.phones_found = int(self.df["phone"].notna().sum()) if "phone" in self.df.columns else 0
+
+    def page(self, start, end):
+        return self.df.iloc[start:end]
+
+    def iter_leads(self):
+        return iter(self.leads)
@@ -0,0 +1,167 @@
+"""Persistent search history with yield stats.
+
+Every search is recorded per ``owner`` (the app's per-browser id) with what it
+asked for and what came back: requested vs returned leads and how many had an
+email or phone. Past searches are found by keyword or location prefix through
+indexes, so type-ahead stays fast over thousands of entries.
+
+Results aren't copied here; each entry keeps the fingerprints of its leads
+(see ``leads.lead_fingerprint``), and ``LeadStore.get`` turns them back into
+leads, so a past search can be shown again without calling /scrape.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from .config import DATA_DIR
+from .leads import lead_fingerprint, normalize_text
+
+DEFAULT_PATH = os.getenv("SEARCH_HISTORY_PATH", os.path.join(DATA_DIR, "history.sqlite3"))
+DEFAULT_MAX_ENTRIES = int(os.getenv("SEARCH_HISTORY_MAX_ENTRIES", 5000))  # kept per owner
+
+_COLUMNS = ("id", "owner", "keyword", "location", "requested", "returned", "emails", "phones", "cached",
+            "source", "created")
+
+
+def _entry(row):
+    entry = dict(zip(_COLUMNS, row))
+    entry["email_rate"] = entry["emails"] / entry["returned"] if entry["returned"] else 0.0
+    return entry
+
+
+def _prefix_range(text):
+    # "abc" -> ("abc", "abc\uffff"): an index-friendly LIKE 'abc%'
+    return text, text + "\uffff"
+
+
+class SearchHistory:
+    def __init__(self, path=DEFAULT_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS searches (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                owner TEXT NOT NULL,
+                keyword TEXT NOT NULL,
+                location TEXT NOT NULL,
+                query TEXT NOT NULL,
+                norm_location TEXT NOT NULL,
+                requested INTEGER NOT NULL,
+                returned INTEGER NOT NULL,
+                emails INTEGER NOT NULL,
+                phones INTEGER NOT NULL,
+                cached INTEGER NOT NULL DEFAULT 0,
+                source TEXT NOT NULL,
+                created REAL NOT NULL,
+                lead_keys TEXT NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS searches_owner_created ON searches (owner, created)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS searches_owner_query ON searches (owner, query)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS searches_owner_location ON searches (owner, norm_location)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS searches_query ON searches (query)")
+        self._conn.commit()
+
+    def record(self, owner, keyword, location, requested, results, cached=False, source="search",
+               lead_keys=None):
+        """Add a search; ``lead_keys`` overrides the fingerprints of ``results`` (e.g. for a refresh)."""
+        keyword, location = keyword.strip(), location.strip()
+        if lead_keys is None:
+            lead_keys = [lead_fingerprint(lead) for lead in results]
+        norm_keyword, norm_location = normalize_text(keyword), normalize_text(location)
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO searches (owner, keyword, location, query, norm_location, requested, returned, "
+                "emails, phones, cached, source, created, lead_keys) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (owner, keyword, location, f"{norm_keyword} in {norm_location}", norm_location, int(requested),
+                 len(results), sum(1 for lead in results if lead.get("email")),
+                 sum(1 for lead in results if lead.get("phone")), int(cached), source, time.time(),
+                 json.dumps(lead_keys))
+            )
+            self._conn.execute(
+                "DELETE FROM searches WHERE owner = ? AND id NOT IN "
+                "(SELECT id FROM searches WHERE owner = ? ORDER BY created DESC LIMIT ?)",
+                (owner, owner, self.max_entries)
+            )
+            self._conn.commit()
+        return cursor.lastrowid
+
+    def recent(self, owner, limit=10):
+        """The owner's latest run of each of their most recent distinct searches."""
+        return self.search(owner, "", limit)
+
+    def search(self, owner, text, limit=20):
+        """Past searches whose keyword or location starts with ``text``, latest run of each, newest first."""
+        text = normalize_text(text)
+        where, params = "owner = ?", [owner]
+        if text:
+            where += " AND ((query >= ? AND query < ?) OR (norm_location >= ? AND norm_location < ?))"
+            params += [*_prefix_range(text), *_prefix_range(text)]
+        with self._lock:
+            # SQLite takes the bare columns from the row holding MAX(created)
+            rows = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS[:-1])}, MAX(created) FROM searches WHERE {where} "
+                f"GROUP BY query ORDER BY MAX(created) DESC LIMIT ?",
+                (*params, limit)
+            ).fetchall()
+        return [_entry(row) for row in rows]
+
+    def get(self, entry_id, owner):
+        """One entry with its ``lead_keys``, or ``None``."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)}, lead_keys FROM searches WHERE id = ? AND owner = ?",
+                (entry_id, owner)
+            ).fetchone()
+        if row is None:
+            return None
+        entry = _entry(row[:-1])
+        entry["lead_keys"] = json.loads(row[-1])
+        return entry
+
+    def latest(self, owner, keyword, location):
+        """The owner's most recent run of exactly this search (with ``lead_keys``), or ``None``."""
+        query = f"{normalize_text(keyword)} in {normalize_text(location)}"
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM searches WHERE owner = ? AND query = ? ORDER BY created DESC LIMIT 1", (owner, query)
+            ).fetchone()
+        return self.get(row[0], owner) if row else None
+
+    def stats(self, keyword=None, location=None, owner=None):
+        """Yield of a search over every recorded run (every owner's unless ``owner`` is given).
+
+        Without ``keyword`` / ``location`` it's the yield of all searches.
+        """
+        where, params = "1 = 1", []
+        if keyword is not None or location is not None:
+            where, params = "query = ?", [f"{normalize_text(keyword)} in {normalize_text(location)}"]
+        if owner is not None:
+            where += " AND owner = ?"
+            params.append(owner)
+        with self._lock:
+            runs, requested, returned, emails, last = self._conn.execute(
+                f"SELECT COUNT(*), SUM(requested), SUM(returned), SUM(emails), MAX(created) "
+                f"FROM searches WHERE {where}", params
+            ).fetchone()
+        if not runs:
+            return None
+        return {"runs": runs, "requested": requested, "returned": returned, "emails": emails,
+                "fill_rate": returned / requested if requested else 0.0,
+                "email_rate": emails / returned if returned else 0.0, "last_run": last}
+
+    def clear(self, owner):
+        with self._lock:
+            self._conn.execute("DELETE FROM searches WHERE owner = ?", (owner,))
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM searches").fetchone()[0]
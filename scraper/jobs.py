@@ -0,0 +1,277 @@
+"""Background scrape jobs that outlive the script run that started them.
+
+A job is one search submitted to a process-wide worker pool. Its state,
+progress and results are kept in SQLite, so a browser reload or a rerun only
+loses the page, not the search. Jobs belong to an ``owner`` (the app uses a
+per-browser id kept in the URL) and are listed newest first.
+
+A job stays ``queued`` until its search has a slot (or an answer from the
+cache) and can be cancelled until then. API keys are held in memory for
+queued jobs only and never written to disk.
+
+Each runner holds a lease on its active jobs, renewed every
+``HEARTBEAT_INTERVAL`` seconds. Jobs whose lease ran out (their process
+stopped) are marked ``interrupted``, so several app processes can share one
+job store without touching each other's jobs.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from .client import ApiError
+from .config import DATA_DIR
+from .search import Cancelled, run_search
+
+DEFAULT_PATH = os.getenv("JOB_STORE_PATH", os.path.join(DATA_DIR, "jobs.sqlite3"))
+MAX_WORKERS = int(os.getenv("JOB_WORKERS", 4))
+RETENTION = int(os.getenv("JOB_RETENTION", 7 * 24 * 3600))  # seconds finished jobs are kept
+PROGRESS_INTERVAL = 1.0  # seconds between progress writes while leads stream in
+SLOT_WAIT = int(os.getenv("JOB_SLOT_WAIT", 15 * 60))  # seconds a job may wait for a search slot
+HEARTBEAT_INTERVAL = 30.0
+LEASE = int(os.getenv("JOB_LEASE", 120))  # seconds without a heartbeat before a job counts as orphaned
+
+ACTIVE_STATES = ("queued", "running")
+
+_COLUMNS = ("id", "owner", "keyword", "location", "count", "tier", "state", "progress", "returned",
+            "cached", "error", "created", "started", "finished")
+
+
+class JobStore:
+    def __init__(self, path=DEFAULT_PATH, retention=RETENTION):
+        self.path = path
+        self.retention = retention
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                keyword TEXT NOT NULL,
+                location TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                tier TEXT NOT NULL,
+                state TEXT NOT NULL,
+                progress INTEGER NOT NULL DEFAULT 0,
+                returned INTEGER,
+                cached INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                created REAL NOT NULL,
+                started REAL,
+                finished REAL,
+                results TEXT,
+                lead_states TEXT,
+                summary TEXT,
+                worker TEXT,
+                heartbeat REAL
+            )
+        """)
+        # Stores created before leases existed
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("worker", "TEXT"), ("heartbeat", "REAL")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_owner ON jobs (owner, created)")
+        self._conn.commit()
+
+    def create(self, owner, keyword, location, count, tier, worker=None):
+        job_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, owner, keyword, location, count, tier, state, created, worker, heartbeat) "
+                "VALUES (?, ?, ?, ?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, owner, keyword, location, count, tier, now, worker, now)
+            )
+            self._conn.commit()
+        return job_id
+
+    def update(self, job_id, **fields):
+        for key in ("results", "lead_states", "summary"):
+            if key in fields:
+                fields[key] = json.dumps(fields[key])
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+            self._conn.commit()
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return dict(zip(_COLUMNS, row)) if row else None
+
+    def list(self, owner, limit=20):
+        """The owner's most recent jobs, newest first, without their results."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE owner = ? ORDER BY created DESC LIMIT ?",
+                (owner, limit)
+            ).fetchall()
+        return [dict(zip(_COLUMNS, row)) for row in rows]
+
+    def results(self, job_id):
+        """``(results, lead_states, summary)`` of a finished job, or ``None``."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT results, lead_states, summary FROM jobs WHERE id = ? AND state = 'done'", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return tuple(json.loads(value) if value else None for value in row)
+
+    def delete(self, job_id, owner):
+        with self._lock:
+            self._conn.execute(
+                f"DELETE FROM jobs WHERE id = ? AND owner = ? AND state NOT IN {ACTIVE_STATES}", (job_id, owner)
+            )
+            self._conn.commit()
+
+    def heartbeat(self, worker):
+        """Renew ``worker``'s lease on its active jobs."""
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET heartbeat = ? WHERE worker = ? AND state IN {ACTIVE_STATES}",
+                               (time.time(), worker))
+            self._conn.commit()
+
+    def recover(self, lease=LEASE):
+        """Mark active jobs whose lease ran out ``interrupted`` and drop expired ones."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET state = 'interrupted', error = 'Server restarted before the job finished', "
+                f"finished = ? WHERE state IN {ACTIVE_STATES} AND (heartbeat IS NULL OR heartbeat < ?)",
+                (now, now - lease)
+            )
+            self._conn.execute("DELETE FROM jobs WHERE finished IS NOT NULL AND finished < ?",
+                               (now - self.retention,))
+            self._conn.commit()
+
+
+class JobRunner:
+    """Runs jobs from a ``JobStore`` on a bounded thread pool.
+
+    ``on_finish(api_key, job_id)`` is called from the worker after each job
+    that made its own backend call, e.g. to invalidate that key's cached
+    /status.
+    With a ``scheduler`` (a ``QuotaScheduler``, scoped to each job's owner)
+    a job stays queued until its key has a search slot, for up to
+    ``slot_wait`` seconds; with a
+    ``history`` (a ``SearchHistory``) finished jobs are recorded under their
+    owner.
+    """
+
+    def __init__(self, client, store, cache=None, lead_store=None, max_workers=MAX_WORKERS, on_finish=None,
+                 scheduler=None, history=None, slot_wait=SLOT_WAIT, heartbeat_interval=HEARTBEAT_INTERVAL):
+        self.client = client
+        self.store = store
+        self.cache = cache
+        self.lead_store = lead_store
+        self.scheduler = scheduler
+        self.history = history
+        self.on_finish = on_finish
+        self.slot_wait = slot_wait
+        self.worker = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scrape-job")
+        self._futures = {}
+        self._waiting = {}  # job id -> cancel Event, until its search starts
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        store.recover()
+        threading.Thread(target=self._keep_leases, args=(heartbeat_interval,), daemon=True,
+                         name="scrape-job-lease").start()
+
+    def _keep_leases(self, interval):
+        while not self._stopped.wait(interval):
+            try:
+                self.store.heartbeat(self.worker)
+                self.store.recover()
+            except Exception:
+                pass  # try again on the next beat
+
+    def close(self):
+        self._stopped.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, owner, api_key, keyword, location, count, tier="free", bypass_cache=False, stream=True):
+        job_id = self.store.create(owner, keyword, location, count, tier, worker=self.worker)
+        with self._lock:
+            self._waiting[job_id] = threading.Event()
+            future = self._executor.submit(self._run, job_id, owner, api_key, keyword, location, count, tier,
+                                           bypass_cache, stream)
+            self._futures[job_id] = future
+        future.add_done_callback(lambda _: self._forget(job_id))
+        return job_id
+
+    def _forget(self, job_id):
+        with self._lock:
+            self._futures.pop(job_id, None)
+            self._waiting.pop(job_id, None)
+
+    def cancel(self, job_id):
+        """Cancel a job whose search hasn't started; running searches can't be stopped."""
+        with self._lock:
+            cancel = self._waiting.pop(job_id, None)
+            if cancel is None:
+                return False
+            cancel.set()
+            future = self._futures.get(job_id)
+            if future is not None:
+                future.cancel()
+        self.store.update(job_id, state="cancelled", finished=time.time())
+        return True
+
+    def _start(self, job_id):
+        with self._lock:
+            cancel = self._waiting.pop(job_id, None)
+        if cancel is None or cancel.is_set():
+            raise Cancelled()
+        self.store.update(job_id, state="running", started=time.time())
+
+    def active(self, owner):
+        return [job for job in self.store.list(owner) if job["state"] in ACTIVE_STATES]
+
+    def _run(self, job_id, owner, api_key, keyword, location, count, tier, bypass_cache, stream):
+        with self._lock:
+            cancel = self._waiting.get(job_id)
+        if cancel is None:
+            return  # cancelled before a worker picked it up
+        last_write = [time.monotonic()]
+
+        def on_lead(results):
+            if time.monotonic() - last_write[0] >= PROGRESS_INTERVAL:
+                self.store.update(job_id, progress=len(results))
+                last_write[0] = time.monotonic()
+
+        scheduler = self.scheduler.scoped(owner) if self.scheduler is not None else None
+        outcome = None
+        try:
+            outcome = run_search(self.client, api_key, keyword, location, count, tier, cache=self.cache,
+                                 store=self.lead_store, bypass_cache=bypass_cache, stream=stream,
+                                 scheduler=scheduler, wait=self.slot_wait, on_lead=on_lead,
+                                 on_start=lambda: self._start(job_id), cancel=cancel)
+        except Cancelled:
+            return  # cancel() has already recorded it
+        except ApiError as e:
+            self.store.update(job_id, state="failed", error=f"HTTP {e.status_code}: {e.message}",
+                              finished=time.time())
+        except Exception as e:
+            self.store.update(job_id, state="failed", error=str(e), finished=time.time())
+        else:
+            results = outcome["results"]
+            self.store.update(job_id, state="done", progress=len(results), returned=len(results),
+                              cached=int(outcome["cached"]), results=results,
+                              lead_states=outcome["lead_states"], summary=outcome["summary"],
+                              finished=time.time())
+            if self.history is not None:
+                self.history.record(owner, keyword, location, count, results, cached=outcome["cached"],
+                                    source="job")
+        if self.on_finish is not None and (outcome is None or not (outcome["cached"] or outcome["shared"])):
+            self.on_finish(api_key, job_id)
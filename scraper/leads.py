@@ -0,0 +1,208 @@
+"""Persistent lead index shared across searches and sessions.
+
+Every result set is merged into one SQLite table. Each lead is identified by
+a hash of its normalized name plus website domain and E.164 phone (address
+when neither is known), so the same business returned by overlapping searches
+is stored once. Lookups by normalized email, phone and domain are indexed.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit
+
+from .config import DATA_DIR
+
+DEFAULT_PATH = os.getenv("LEAD_STORE_PATH", os.path.join(DATA_DIR, "leads.sqlite3"))
+DEFAULT_COUNTRY_CODE = os.getenv("DEFAULT_COUNTRY_CODE", "1")  # assumed for national numbers
+
+_NON_DIGITS = re.compile(r"\D")
+_SPACES = re.compile(r"\s+")
+_EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+# SQLite caps bound parameters per statement; look keys up in chunks
+_CHUNK = 500
+
+
+# ─────────────────────────────────────────────
+# Normalization
+def normalize_text(value):
+    return _SPACES.sub(" ", str(value or "")).strip().lower()
+
+
+def normalize_email(value):
+    email = str(value or "").strip().lower()
+    return email if _EMAIL.match(email) else ""
+
+
+def normalize_phone(value, country_code=DEFAULT_COUNTRY_CODE):
+    """Best-effort E.164 (``+15551234567``); empty when it can't be a phone number."""
+    raw = str(value or "").strip()
+    digits = _NON_DIGITS.sub("", raw)
+    if len(digits) < 7:
+        return ""
+    if raw.startswith("+"):
+        return "+" + digits
+    if raw.startswith("00"):
+        return "+" + digits[2:]
+    if country_code == "1" and len(digits) == 11 and digits.startswith("1"):
+        return "+" + digits
+    return "+" + country_code + digits.lstrip("0")
+
+
+def website_domain(value):
+    url = str(value or "").strip().lower()
+    if not url:
+        return ""
+    if "://" not in url:
+        url = "http://" + url
+    host = urlsplit(url).hostname or ""
+    return host[4:] if host.startswith("www.") else host
+
+
+def lead_fingerprint(lead):
+    """Stable identity hash for a business across searches."""
+    name = normalize_text(lead.get("name"))
+    domain = website_domain(lead.get("website"))
+    phone = normalize_phone(lead.get("phone"))
+    anchor = f"{domain}|{phone}" if domain or phone else normalize_text(lead.get("address"))
+    return hashlib.sha1(f"{name}|{anchor}".encode("utf-8")).hexdigest()
+
+
+def content_hash(lead):
+    return hashlib.sha1(json.dumps(lead, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+# ─────────────────────────────────────────────
+# Store
+class LeadStore:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS leads (
+                key TEXT PRIMARY KEY,
+                name TEXT,
+                email TEXT,
+                phone TEXT,
+                domain TEXT,
+                data TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL,
+                seen_count INTEGER NOT NULL DEFAULT 1,
+                source TEXT
+            )
+        """)
+        for column in ("email", "phone", "domain", "first_seen"):
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS leads_{column} ON leads ({column})")
+        self._conn.commit()
+
+    def _existing(self, keys):
+        found = {}
+        for i in range(0, len(keys), _CHUNK):
+            chunk = keys[i:i + _CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            for key, digest in self._conn.execute(
+                f"SELECT key, content_hash FROM leads WHERE key IN ({placeholders})", chunk
+            ):
+                found[key] = digest
+        return found
+
+    def merge(self, leads, source=""):
+        """Upsert ``leads`` and report which of them were already known.
+
+        Returns a list aligned with ``leads``: ``"new"`` for businesses never
+        stored before, ``"changed"`` when a known lead came back with different
+        details, and ``"seen"`` otherwise.
+        """
+        now = time.time()
+        keys = [lead_fingerprint(lead) for lead in leads]
+        digests = [content_hash(lead) for lead in leads]
+        with self._lock:
+            existing = self._existing(list(set(keys)))
+            states = []
+            rows = []
+            batch_seen = {}
+            for lead, key, digest in zip(leads, keys, digests):
+                if key in batch_seen:
+                    states.append(batch_seen[key])
+                    continue
+                if key not in existing:
+                    state = "new"
+                elif existing[key] != digest:
+                    state = "changed"
+                else:
+                    state = "seen"
+                batch_seen[key] = state
+                states.append(state)
+                rows.append((
+                    key, lead.get("name"), normalize_email(lead.get("email")) or None,
+                    normalize_phone(lead.get("phone")) or None, website_domain(lead.get("website")) or None,
+                    json.dumps(lead, default=str), digest, now, now, source
+                ))
+            self._conn.executemany("""
+                INSERT INTO leads (key, name, email, phone, domain, data, content_hash, first_seen, last_seen, source)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    name = excluded.name,
+                    email = COALESCE(excluded.email, leads.email),
+                    phone = COALESCE(excluded.phone, leads.phone),
+                    domain = COALESCE(excluded.domain, leads.domain),
+                    data = excluded.data,
+                    content_hash = excluded.content_hash,
+                    last_seen = excluded.last_seen,
+                    seen_count = leads.seen_count + 1
+            """, rows)
+            self._conn.commit()
+        return states
+
+    def hashes(self, keys):
+        """``{key: content_hash}`` for the fingerprint ``keys`` already stored."""
+        with self._lock:
+            return self._existing(list(set(keys)))
+
+    def get(self, keys):
+        """Stored leads for fingerprint ``keys``, in that order; unknown keys are skipped."""
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            for i in range(0, len(unique), _CHUNK):
+                chunk = unique[i:i + _CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                for key, data in self._conn.execute(
+                    f"SELECT key, data FROM leads WHERE key IN ({placeholders})", chunk
+                ):
+                    found[key] = data
+        return [json.loads(found[key]) for key in keys if key in found]
+
+    def find(self, email=None, phone=None, domain=None):
+        """Stored leads matching any of the given (raw) email, phone or website."""
+        clauses, params = [], []
+        if email and normalize_email(email):
+            clauses.append("email = ?")
+            params.append(normalize_email(email))
+        if phone and normalize_phone(phone):
+            clauses.append("phone = ?")
+            params.append(normalize_phone(phone))
+        if domain and website_domain(domain):
+            clauses.append("domain = ?")
+            params.append(website_domain(domain))
+        if not clauses:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT data FROM leads WHERE {' OR '.join(clauses)}", params
+            ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM leads").fetchone()[0]
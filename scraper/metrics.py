@@ -0,0 +1,226 @@
+"""Opt-in timings for reruns and backend calls.
+
+Set ``SCRAPER_METRICS=1`` to turn recording on. While it is off every hook is
+a no-op, so the instrumentation costs nothing in production.
+
+Each metric is a histogram per label set (e.g. ``endpoint="scrape",
+status="200"``): cumulative buckets, count and sum for Prometheus, plus the
+most recent samples for exact p50/p95/p99. ``dump`` writes the registry as
+Prometheus text (``.prom``, suitable for node_exporter's textfile collector)
+or JSON (any other extension).
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+ENABLED = os.getenv("SCRAPER_METRICS", "").lower() not in ("", "0", "false", "no")
+DUMP_PATH = os.getenv("SCRAPER_METRICS_PATH", "")  # rewritten after every rerun when set
+
+PREFIX = "scraper_"
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)  # seconds
+WINDOW = 2048  # samples kept per histogram for quantiles
+QUANTILES = (0.5, 0.95, 0.99)
+
+HELP = {
+    "api_request_seconds": "Backend call time to response headers, by endpoint and status code",
+    "api_stream_seconds": "Backend call time until a streamed response was fully read",
+    "rerun_seconds": "Full script rerun time",
+    "phase_seconds": "Time spent in one phase of a rerun",
+    "export_seconds": "Time to serialize a download, by format",
+}
+
+
+def _quantile(ordered, q):
+    if not ordered:
+        return None
+    pos = q * (len(ordered) - 1)
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def _labels(labels, **extra):
+    items = list(labels) + [(k, str(v)) for k, v in extra.items()]
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS, window=WINDOW):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, seconds):
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += seconds
+        self.recent.append(seconds)
+
+    def quantiles(self):
+        ordered = sorted(self.recent)
+        return {q: _quantile(ordered, q) for q in QUANTILES}
+
+
+class Metrics:
+    def __init__(self, enabled=ENABLED, buckets=BUCKETS, window=WINDOW):
+        self.enabled = enabled
+        self.buckets = buckets
+        self.window = window
+        self._histograms = {}  # (name, sorted label items) -> Histogram
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets, self.window)
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def record_request(self, endpoint, status, seconds):
+        # status is the HTTP code, or the exception name when no response came back
+        self.observe("api_request_seconds", seconds, endpoint=endpoint, status=status)
+
+    def record_stream(self, endpoint, seconds):
+        self.observe("api_stream_seconds", seconds, endpoint=endpoint)
+
+    def rerun(self):
+        return RerunProfile(self)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    # ─────────────────────────────────────────────
+    # Export
+    def summary(self, name=None):
+        """One row per histogram: metric, labels, count, mean and p50/p95/p99 in ms."""
+        with self._lock:
+            items = [(key, h.count, h.sum, h.quantiles()) for key, h in self._histograms.items()
+                     if name is None or key[0] == name]
+        rows = []
+        for (metric, labels), count, total, quantiles in sorted(items):
+            row = {"metric": metric, **dict(labels), "count": count,
+                   "mean_ms": round(total / count * 1000, 1) if count else None}
+            for q, value in quantiles.items():
+                row[f"p{int(q * 100)}_ms"] = None if value is None else round(value * 1000, 1)
+            rows.append(row)
+        return rows
+
+    def to_json(self):
+        return json.dumps({"generated": time.time(), "metrics": self.summary()}, indent=2)
+
+    def to_prometheus(self):
+        with self._lock:
+            snapshot = [(key, list(h.counts), h.count, h.sum, h.quantiles())
+                        for key, h in sorted(self._histograms.items())]
+        families = {}
+        for (name, labels), *values in snapshot:
+            families.setdefault(name, []).append((labels, *values))
+
+        lines = []
+        for name, series in families.items():
+            metric = PREFIX + name
+            lines.append(f"# HELP {metric} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {metric} histogram")
+            for labels, counts, count, total, _ in series:
+                cumulative = 0
+                for bound, n in zip(self.buckets, counts):
+                    cumulative += n
+                    lines.append(f"{metric}_bucket{_labels(labels, le=bound)} {cumulative}")
+                lines.append(f"{metric}_bucket{_labels(labels, le='+Inf')} {count}")
+                lines.append(f"{metric}_count{_labels(labels)} {count}")
+                lines.append(f"{metric}_sum{_labels(labels)} {total:.6f}")
+            # Exact quantiles over the recent window, as their own gauge family
+            lines.append(f"# HELP {metric}_recent {HELP.get(name, name)}, last {self.window} samples")
+            lines.append(f"# TYPE {metric}_recent gauge")
+            for labels, _, _, _, quantiles in series:
+                for q, value in quantiles.items():
+                    if value is not None:
+                        lines.append(f"{metric}_recent{_labels(labels, quantile=q)} {value:.6f}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path=DUMP_PATH):
+        """Atomically write the registry to ``path`` (Prometheus text for ``.prom``, else JSON)."""
+        if not path or not self.enabled:
+            return
+        text = self.to_prometheus() if path.endswith(".prom") else self.to_json()
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+
+class RerunProfile:
+    """Phase timings for one script run; each phase also feeds ``phase_seconds``."""
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self.started = time.perf_counter()
+        self.phases = []  # (name, start offset, seconds); phases may nest
+        self.total = None
+        self._lap = None
+
+    @contextmanager
+    def phase(self, name):
+        if not self.metrics.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, start, time.perf_counter())
+
+    def lap(self, name):
+        """End the running top-level phase, if any, and start ``name`` (``None`` to just end it)."""
+        if not self.metrics.enabled:
+            return
+        now = time.perf_counter()
+        if self._lap is not None:
+            self._record(self._lap[0], self._lap[1], now)
+        self._lap = (name, now) if name else None
+
+    def _record(self, name, start, end):
+        # Phases timed after finish() (fragment reruns) still feed the histogram
+        if self.total is None:
+            self.phases.append((name, start - self.started, end - start))
+        self.metrics.observe("phase_seconds", end - start, phase=name)
+
+    def rows(self):
+        return [{"phase": name, "start_ms": round(offset * 1000, 1), "ms": round(seconds * 1000, 1)}
+                for name, offset, seconds in sorted(self.phases, key=lambda p: p[1])]
+
+    def finish(self):
+        if self.total is None:
+            self.lap(None)
+            self.total = time.perf_counter() - self.started
+            self.metrics.observe("rerun_seconds", self.total)
+        return self
+
+
+# Process-wide registry used by the shared API clients and the app
+metrics = Metrics()
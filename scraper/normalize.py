@@ -0,0 +1,161 @@
+"""Vectorized normalization of a results frame.
+
+``normalize_frame`` adds derived columns in bulk with pandas string ops, so a
+100k-lead frame takes a fraction of a second rather than a Python loop per
+row:
+
+- ``email_norm``: lowercased email, ``<NA>`` when the syntax is invalid
+- ``role_email``: the address is a role mailbox (info@, sales@, ...)
+- ``phone_e164``: ``+<country code><number>``, ``<NA>`` when it can't be one
+- ``domain``: registrable domain of ``website`` (``shop.example.co.uk`` ->
+  ``example.co.uk``)
+
+National phone numbers are read with the lead's ``country`` when the frame
+has one, else ``DEFAULT_COUNTRY_CODE``. The registrable domain uses a short
+list of common two-level suffixes, not the full public suffix list.
+
+These columns are for matching within a result set (fuzzy dedup and the
+suppression list). They are stricter than the scalar helpers in ``leads``,
+which stay the one source of a lead's identity across searches
+(``leads.lead_fingerprint``, used by the lead index, history and batch
+merging).
+"""
+import re
+
+from .leads import DEFAULT_COUNTRY_CODE
+
+NORMALIZED_COLUMNS = ("email_norm", "role_email", "phone_e164", "domain")
+
+# Patterns are kept as strings: pandas hands them to pyarrow's regex engine,
+# which compiles each once per column (a compiled ``re.Pattern`` would force
+# a Python loop over the rows)
+_EMAIL = r"[^@\s]+@[^@\s]+\.[^@\s]+"
+_SCHEME = r"^[a-z][a-z0-9+.-]*://"
+_AFTER_HOST = r"[/?#:\s].*$"
+_USER_AND_WWW = r"^(?:.*@)?(?:www\d*\.)?"
+
+ROLE_MAILBOXES = ("info", "sales", "contact", "admin", "support", "hello", "office", "team", "enquiries",
+                  "enquiry", "inquiries", "inquiry", "marketing", "billing", "accounts", "help", "noreply",
+                  "no-reply", "webmaster", "hr", "jobs", "careers", "press", "media", "reception", "booking",
+                  "bookings", "service", "customerservice", "frontdesk", "appointments", "mail", "general")
+_ROLE = rf"(?:{'|'.join(re.escape(m) for m in ROLE_MAILBOXES)})(?:[._+-].*)?@.*"
+
+MULTI_PART_SUFFIXES = ("co.uk", "org.uk", "ac.uk", "gov.uk", "me.uk", "ltd.uk", "com.au", "net.au", "org.au",
+                       "co.nz", "org.nz", "co.jp", "com.br", "co.in", "co.za", "com.mx", "com.sg", "co.kr",
+                       "com.cn", "com.tr", "com.ar", "co.il", "com.hk", "com.my", "com.ph")
+# Lazy prefix, so the shortest suffix that leaves a name label wins:
+# shop.example.co.uk -> example.co.uk, a.b.example.com -> example.com
+_REGISTRABLE = rf"^.*?([^.]+\.(?:{'|'.join(re.escape(s) for s in MULTI_PART_SUFFIXES)}|[^.]+))$"
+
+# Calling codes for the country names / ISO codes a lead may carry
+COUNTRY_CODES = {
+    "us": "1", "usa": "1", "united states": "1", "ca": "1", "canada": "1",
+    "gb": "44", "uk": "44", "united kingdom": "44", "ie": "353", "ireland": "353",
+    "au": "61", "australia": "61", "nz": "64", "new zealand": "64",
+    "de": "49", "germany": "49", "fr": "33", "france": "33", "es": "34", "spain": "34",
+    "it": "39", "italy": "39", "nl": "31", "netherlands": "31", "in": "91", "india": "91",
+}
+
+# National number (digits only) -> subscriber part, per calling code; the
+# trunk prefix (a leading 0, or 1 in North America) is dropped
+NATIONAL_PATTERNS = {
+    "1": r"^1?([2-9]\d{9})$",
+    "44": r"^0?(\d{9,10})$",
+    "353": r"^0?(\d{7,9})$",
+    "61": r"^0?(\d{9})$",
+    "64": r"^0?(\d{8,9})$",
+    "49": r"^0?(\d{6,13})$",
+    "33": r"^0?(\d{9})$",
+    "34": r"^(\d{9})$",
+    "39": r"^(\d{6,11})$",  # Italian numbers keep their leading 0
+    "31": r"^0?(\d{9})$",
+    "91": r"^0?(\d{10})$",
+}
+_NATIONAL_FALLBACK = r"^0*(\d{6,14})$"
+_E164 = r"\+[1-9]\d{7,14}"
+
+
+def _string_dtype():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return "string"
+    return "string[pyarrow]"
+
+
+def _text(series):
+    return series.astype(_string_dtype()).str.strip()
+
+
+def _flag(matches):
+    return matches.fillna(False).astype(bool)
+
+
+def normalize_emails(emails):
+    """``(email_norm, role_email)`` for a Series of raw emails."""
+    email = _text(emails).str.lower()
+    email = email.where(_flag(email.str.fullmatch(_EMAIL)))
+    return email, _flag(email.str.fullmatch(_ROLE))
+
+
+def normalize_phones(phones, countries=None, default_code=DEFAULT_COUNTRY_CODE):
+    """E.164 phones for a Series of raw phones; ``countries`` (names or ISO codes) picks each national format."""
+    import pandas as pd
+
+    raw = _text(phones)
+    digits = raw.str.replace(r"\D", "", regex=True)
+    plus = _flag(raw.str.startswith("+"))
+    double_zero = ~plus & _flag(digits.str.startswith("00"))
+    out = pd.Series(pd.NA, index=phones.index, dtype=_string_dtype())
+    out[plus] = "+" + digits[plus]
+    out[double_zero] = "+" + digits[double_zero].str[2:]
+
+    national = ~(plus | double_zero) & digits.notna()
+    if countries is not None:
+        codes = _text(countries).str.lower().map(COUNTRY_CODES).fillna(default_code)
+    else:
+        codes = pd.Series(default_code, index=phones.index)
+    for code in codes[national].unique():
+        mask = national & (codes == code)
+        # Numbers that don't fit the pattern keep their bare digits and fail the check below
+        out[mask] = digits[mask].str.replace(NATIONAL_PATTERNS.get(code, _NATIONAL_FALLBACK), f"+{code}\\1",
+                                             regex=True)
+    return out.where(_flag(out.str.fullmatch(_E164)))
+
+
+def registrable_domains(websites):
+    """Registrable domain of each URL or bare host, ``<NA>`` when there is none."""
+    host = (_text(websites).str.lower()
+            .str.replace(_SCHEME, "", regex=True)
+            .str.replace(_AFTER_HOST, "", regex=True)
+            .str.replace(_USER_AND_WWW, "", regex=True)
+            .str.rstrip("."))
+    return _registrable(host)
+
+
+def email_domains(emails):
+    """Registrable domain after the ``@`` of each (normalized) email."""
+    return _registrable(emails.str.replace(r"^[^@]*@", "", regex=True))
+
+
+def _registrable(host):
+    host = host.where(_flag(host.str.contains(".", regex=False)) & ~_flag(host.str.startswith(".")))
+    # Most hosts are already "name.tld"; only deeper ones need the suffix match
+    deep = _flag(host.str.count(r"\.") > 1)
+    host[deep] = host[deep].str.replace(_REGISTRABLE, r"\1", regex=True)
+    return host.where(_flag(host.str.fullmatch(_REGISTRABLE)))
+
+
+def normalize_frame(df, default_code=DEFAULT_COUNTRY_CODE):
+    """``df`` with the ``NORMALIZED_COLUMNS`` added (columns it lacks count as empty)."""
+    import pandas as pd
+
+    def column(name):
+        return df[name] if name in df.columns else pd.Series(pd.NA, index=df.index, dtype="string")
+
+    df = df.copy()
+    df["email_norm"], df["role_email"] = normalize_emails(column("email"))
+    df["phone_e164"] = normalize_phones(column("phone"), df["country"] if "country" in df.columns else None,
+                                        default_code)
+    df["domain"] = registrable_domains(column("website"))
+    return df
@@ -0,0 +1,181 @@
+"""Cursor-paginated result sets too large to hold in memory at once.
+
+Server pages are fetched on demand with the ``next_cursor`` token from the
+page before. Cursors are kept for every page seen (they are small), but only
+the ``window`` most recently used pages of leads stay in memory; an evicted
+page is fetched again from its cursor when needed. The first page came from
+the (quota-charged) /scrape call itself and is never evicted. After each page
+is served the next one is prefetched on a background thread.
+
+``keep`` filters each page as it arrives (e.g. against the suppression list).
+Filtered pages are shorter than ``page_size``, so rows are numbered through
+the count of kept leads on each page fetched so far: ``rows()`` slices stay
+contiguous and ``total`` counts kept leads only (the backend's own count is
+``server_total``, the left-out leads ``suppressed``). Until the last page is
+known ``row_count`` is an upper bound.
+"""
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from .frame import build_frame
+
+
+class CursorPager:
+    def __init__(self, client, api_key, first_page, page_size, window=8, on_page=None, keep=None):
+        self.client = client
+        self.on_page = on_page  # called once with each page's leads, e.g. to index them
+        self.keep = keep  # leads -> the ones to show and export
+        self.api_key = api_key
+        self.page_size = page_size
+        self.window = window
+        self.summary = {k: v for k, v in first_page.items() if k != "results"}
+        self.server_total = first_page.get("total")  # leads before filtering; may be unknown
+        # Leads to page through; without a filter the backend's count is exact
+        self.total = self.server_total if keep is None else None
+        self.last_page = None
+
+        self._pages = OrderedDict()
+        self._cursors = {0: None}  # page index -> cursor that fetches it
+        self._kept = {}  # page index -> leads kept on it, for every page fetched once
+        self.fetched = 0
+        self.emails_found = 0
+        self.phones_found = 0
+        self.suppressed = 0
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._store(0, first_page)
+
+    # ─────────────────────────────────────────────
+    # Page bookkeeping
+    @property
+    def known_pages(self):
+        """Server pages known to exist: all of them once the backend's count or the end is known."""
+        if self.last_page is not None:
+            return self.last_page + 1
+        if self.server_total is not None:
+            return max(1, -(-self.server_total // self.page_size))
+        return max(self._cursors) + 1
+
+    @property
+    def exhausted(self):
+        return self.total is not None
+
+    # Same surface as frame.ResultsFrame, so the results view can page either
+    @property
+    def complete(self):
+        return self.exhausted
+
+    @property
+    def row_count(self):
+        """Rows that can be paged through so far; exact once exhausted."""
+        if self.total is not None:
+            return self.total
+        with self._lock:
+            kept = sum(self._kept.values())
+            unseen = max(self.known_pages - len(self._kept), 0)
+        return kept + unseen * self.page_size
+
+    def _store(self, index, data):
+        results = data.get("results", [])
+        shown = self.keep(results) if self.keep is not None else results
+        with self._lock:
+            next_cursor = data.get("next_cursor")
+            if next_cursor:
+                self._cursors[index + 1] = next_cursor
+            first_time = index not in self._kept
+            if first_time:
+                self._kept[index] = len(shown)
+                self.fetched += len(shown)
+                self.suppressed += len(results) - len(shown)
+                self.emails_found += sum(1 for lead in shown if lead.get("email") is not None)
+                self.phones_found += sum(1 for lead in shown if lead.get("phone") is not None)
+            if not next_cursor and self.last_page is None:
+                # Pages are first fetched in order, so every earlier one is counted
+                self.last_page = index
+                if self.server_total is None and self.keep is None:
+                    self.server_total = index * self.page_size + len(results)
+                self.total = sum(self._kept.values())
+            self._pages[index] = shown
+            self._pages.move_to_end(index)
+            while len(self._pages) > max(self.window, 1):
+                oldest = next(i for i in self._pages if i != 0)
+                del self._pages[oldest]
+        if first_time and self.on_page is not None:
+            self.on_page(results)
+        return shown
+
+    def _fetch(self, index):
+        if index == 0:
+            return self._pages[0]
+        return self._store(index, self.client.results_page(self.api_key, self._cursors[index]))
+
+    # ─────────────────────────────────────────────
+    # Access
+    def get_page(self, index):
+        """Return the leads on server page ``index``, fetching up to it if needed."""
+        with self._lock:
+            if index in self._pages:
+                self._pages.move_to_end(index)
+                results = self._pages[index]
+            else:
+                results = None
+            future = self._inflight.get(index)
+        if results is None:
+            if future is not None:
+                results = future.result()
+            else:
+                # Walk forward from the last page whose cursor we know
+                i = max(k for k in self._cursors if k <= index)
+                while i < index:
+                    self._fetch(i)
+                    if i + 1 not in self._cursors:
+                        return []  # ran off the end
+                    i += 1
+                results = self._fetch(index)
+        self.prefetch(index + 1)
+        return results
+
+    def prefetch(self, index):
+        with self._lock:
+            if index in self._pages or index in self._inflight or index not in self._cursors:
+                return
+            future = self._executor.submit(self._fetch, index)
+            self._inflight[index] = future
+        future.add_done_callback(lambda _: self._inflight.pop(index, None))
+
+    def rows(self, start, end):
+        """Kept leads ``start`` to ``end`` (0-based, end exclusive) across server pages."""
+        rows = []
+        index, offset = 0, 0  # offset: row number of the first lead kept on page ``index``
+        while offset < end and index in self._cursors:
+            page = None
+            if index not in self._kept:
+                page = self.get_page(index)
+                if index not in self._kept:
+                    break  # ran off the end
+            kept = self._kept[index]
+            if offset + kept > start:
+                if page is None:
+                    page = self.get_page(index)
+                rows.extend(page[max(start - offset, 0):end - offset])
+            offset += kept
+            index += 1
+        return rows
+
+    def page(self, start, end):
+        return build_frame(self.rows(start, end), offset=start)
+
+    def iter_leads(self):
+        return self.iter_all()
+
+    def iter_all(self):
+        """Every lead in order, for exports; pages outside the window are refetched."""
+        index = 0
+        while index in self._cursors:
+            yield from self.get_page(index)
+            index += 1
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
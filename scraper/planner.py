@@ -0,0 +1,116 @@
+"""Spend plan searches where past searches say the leads are.
+
+Every search costs one unit of quota whatever its ``count``, so the planner
+asks each keyword/location pair for as many leads as the plan allows and runs
+the pairs with the best expected yield first. Expected yield comes from the
+search history: the share of requested leads a query returned (``fill``) and
+the share of those with an email, shrunk towards the average of all searches
+while a query has little history, so one lucky run doesn't dominate.
+
+Searches that don't fit in today's remaining quota are scheduled on the days
+after the daily reset, within what the month has left (renewed at the
+monthly reset); the rest of the target is reported as a shortfall.
+Repeating a query returns the same businesses, so each pair is planned at
+most once.
+"""
+import math
+from datetime import timedelta
+
+from .quota import tier_limits
+
+# Assumed for a first search when the history has nothing at all
+PRIOR_FILL = 0.8
+PRIOR_EMAIL = 0.4
+PRIOR_WEIGHT = 50  # leads of evidence the average counts for against a query's own history
+MIN_COUNT = 5
+MAX_DAYS = 31
+
+
+def _shrunk(hits, total, prior):
+    return (hits + prior * PRIOR_WEIGHT) / (total + PRIOR_WEIGHT)
+
+
+def expected_yield(history, keyword, location, prior=None):
+    """``{"fill", "email", "runs"}`` for a query, from ``history`` (a ``SearchHistory``)."""
+    if prior is None:
+        prior = overall_rates(history)
+    stats = history.stats(keyword, location) if history is not None else None
+    if not stats:
+        return {"fill": prior["fill"], "email": prior["email"], "runs": 0}
+    return {"fill": min(_shrunk(stats["returned"], stats["requested"], prior["fill"]), 1.0),
+            "email": _shrunk(stats["emails"], stats["returned"], prior["email"]),
+            "runs": stats["runs"]}
+
+
+def overall_rates(history):
+    stats = history.stats() if history is not None else None
+    if not stats or not stats["requested"]:
+        return {"fill": PRIOR_FILL, "email": PRIOR_EMAIL}
+    return {"fill": stats["fill_rate"], "email": stats["email_rate"] if stats["returned"] else PRIOR_EMAIL}
+
+
+def plan_searches(pairs, target, tier, remaining, resets=None, history=None, want="leads"):
+    """Choose which ``(keyword, location)`` pairs to search, when, and for how many leads.
+
+    ``remaining`` is the plan's ``{"daily", "monthly"}`` searches left (see
+    ``QuotaScheduler.remaining``) and ``resets`` the matching reset times
+    (``QuotaScheduler.resets``). ``want`` is ``"leads"`` or ``"emails"``.
+
+    Returns a dict with ``steps`` (best first; each with ``keyword``,
+    ``location``, ``count``, ``expected_leads``, ``expected_emails``,
+    ``fill``, ``email``, ``runs``, ``day`` (0 = now) and ``at``, the time
+    its day starts or ``None`` for now), ``expected`` (of ``want``),
+    ``searches``, ``shortfall`` and ``skipped`` (pairs not needed or with no
+    quota left for them).
+    """
+    limits = tier_limits(tier)
+    max_count = limits["max_count"]
+    prior = overall_rates(history)
+
+    candidates = []
+    for keyword, location in dict.fromkeys((k.strip(), l.strip()) for k, l in pairs if k.strip() and l.strip()):
+        rates = expected_yield(history, keyword, location, prior)
+        per_lead = rates["fill"] * (rates["email"] if want == "emails" else 1.0)
+        candidates.append((per_lead * max_count, keyword, location, rates))
+    candidates.sort(key=lambda c: c[0], reverse=True)
+
+    def day_start(day):
+        if not day or not resets or resets.get("daily") is None:
+            return None
+        return resets["daily"] + timedelta(days=day - 1)
+
+    monthly_left = remaining.get("monthly", 0)
+    renewed = False
+    day, day_left = 0, min(remaining.get("daily", 0), monthly_left)
+    steps, skipped = [], []
+    expected = 0.0
+    for value, keyword, location, rates in candidates:
+        if expected >= target or value <= 0:
+            skipped.append({"keyword": keyword, "location": location, "reason": "not needed"})
+            continue
+        while day_left <= 0 and day < MAX_DAYS:
+            day += 1
+            start = day_start(day)
+            if not renewed and start is not None and resets.get("monthly") is not None and start >= resets["monthly"]:
+                monthly_left, renewed = limits["monthly"], True
+            day_left = min(limits["daily"], monthly_left)
+        if day_left <= 0:
+            skipped.append({"keyword": keyword, "location": location, "reason": "no quota left"})
+            continue
+
+        # The last search only asks for what the target still needs
+        count = max_count
+        if expected + value > target:
+            count = min(max_count, max(MIN_COUNT, math.ceil((target - expected) / (value / max_count))))
+        leads = rates["fill"] * count
+        emails = leads * rates["email"]
+        expected += emails if want == "emails" else leads
+        at = day_start(day)
+        steps.append({"keyword": keyword, "location": location, "count": count,
+                      "expected_leads": round(leads, 1), "expected_emails": round(emails, 1),
+                      "fill": rates["fill"], "email": rates["email"], "runs": rates["runs"], "day": day, "at": at})
+        day_left -= 1
+        monthly_left -= 1
+
+    return {"steps": steps, "expected": round(expected, 1), "searches": len(steps),
+            "shortfall": max(round(target - expected, 1), 0), "skipped": skipped, "want": want}
@@ -0,0 +1,274 @@
+"""Plan limits and a process-wide, quota-aware scheduler for /scrape calls.
+
+Every session, tab, background job and batch row on this server that uses the
+same API key shares one ``QuotaScheduler`` entry. It tracks the key's usage
+(from /status and /scrape answers, plus searches still in flight) against the
+plan's daily and monthly limits and rolls the counters over at the reset
+times /status reports. Searches that can't fit are rejected locally instead
+of costing a round-trip that ends in an error.
+
+Bursts are smoothed with a token bucket per key that holds up to
+``concurrency`` searches and refills at ``rate`` per minute, and at most
+``concurrency`` searches per key are in flight. A search that has to wait
+for either is queued until a slot frees up or its timeout runs out.
+
+The shared free-tier key (``DEFAULT_API_KEY``) belongs to every free user
+at once, so it is scheduled per user instead: callers go through
+``QuotaScheduler.scoped(user)``, which gives each user their own counters,
+bucket and concurrency for that key. Other keys are scheduled per key
+whatever the scope.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from .config import DEFAULT_API_KEY
+
+# "concurrency" is how many searches per key run against /scrape at once
+# (also batch-search parallelism), "rate" the sustained searches per minute,
+# "exports" the download formats offered (see scraper.export.FORMATS),
+# "max_count" / "default_count" the per-search result count cap and default,
+# "max_paged_count" the cap for a server-paged search (see scraper.pager)
+TIERS = {
+    "free": {"daily": 3, "monthly": 10, "concurrency": 1, "rate": 6, "exports": ["csv"],
+             "max_count": 20, "default_count": 10, "max_paged_count": 100},
+    "starter": {"daily": 50, "monthly": 300, "concurrency": 2, "rate": 12, "exports": ["csv"],
+                "max_count": 50, "default_count": 25, "max_paged_count": 1000},
+    "pro": {"daily": 100, "monthly": 1000, "concurrency": 4, "rate": 30, "exports": ["csv"],
+            "max_count": 100, "default_count": 50, "max_paged_count": 5000},
+    "enterprise": {"daily": 500, "monthly": 5000, "concurrency": 8, "rate": 60,  # Updated from unlimited to reasonable limits
+                   "exports": ["csv", "jsonl", "parquet", "xlsx"], "max_count": 200, "default_count": 100,
+                   "max_paged_count": 10000},
+}
+
+PERIODS = ("daily", "monthly")
+CANCEL_POLL = 0.5  # seconds between cancel checks while waiting for a slot
+
+
+def tier_limits(tier):
+    return TIERS.get(tier, TIERS["free"])
+
+
+def cap_count(count, tier, paged=False):
+    """``count`` bounded to 1 .. the plan's ``max_count`` (``max_paged_count`` if ``paged``)."""
+    return max(1, min(int(count), tier_limits(tier)["max_paged_count" if paged else "max_count"]))
+
+
+class QuotaExceeded(Exception):
+    """More searches were needed than the plan has left in ``period``."""
+
+    def __init__(self, period, limit, needed=1, remaining=0):
+        super().__init__(f"{period.title()} limit of {limit} searches reached")
+        self.period = period
+        self.limit = limit
+        self.needed = needed
+        self.remaining = remaining
+
+
+class Throttled(Exception):
+    """No search slot freed up for this key within the wait timeout."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Too many searches at once - try again in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class Cancelled(Exception):
+    """The caller gave up on a search before it started."""
+
+    def __init__(self):
+        super().__init__("Cancelled before the search started")
+
+
+def _parse_time(value):
+    try:
+        dt = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def _default_reset(period, now):
+    # Used until /status reports the real reset times: UTC midnight / 1st of the month
+    if period == "daily":
+        return (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (now.replace(day=1) + timedelta(days=32)).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+class _KeyState:
+    def __init__(self, tier, now):
+        self.tier = tier
+        self.used = {"daily": 0, "monthly": 0}
+        self.reset = {period: _default_reset(period, now) for period in PERIODS}
+        self.in_flight = 0
+        self.tokens = float(tier_limits(tier)["concurrency"])
+        self.refilled = time.monotonic()
+
+
+class Ticket:
+    """One admitted search; set ``usage`` from the /scrape summary if it has one."""
+
+    def __init__(self, api_key):
+        self.api_key = api_key
+        self.usage = None
+
+
+class QuotaScheduler:
+    def __init__(self, tiers=TIERS, shared_keys=(DEFAULT_API_KEY,)):
+        self.tiers = tiers
+        self.shared_keys = frozenset(shared_keys)
+        self._keys = {}
+        self._cond = threading.Condition()
+
+    def scoped(self, scope):
+        """This scheduler as seen by one user (e.g. a browser session id); see the module docstring."""
+        return ScopedScheduler(self, scope)
+
+    def _state(self, api_key, tier=None):
+        now = datetime.now(timezone.utc)
+        state = self._keys.get(api_key)
+        if state is None:
+            state = self._keys[api_key] = _KeyState(tier or "free", now)
+        elif tier and tier != state.tier:
+            state.tier = tier
+        for period in PERIODS:
+            if now >= state.reset[period]:
+                state.used[period] = 0
+                state.reset[period] = _default_reset(period, now)
+        return state
+
+    def _limits(self, state):
+        return self.tiers.get(state.tier, self.tiers["free"])
+
+    def _refill(self, state):
+        limits = self._limits(state)
+        now = time.monotonic()
+        state.tokens = min(float(limits["concurrency"]),
+                           state.tokens + (now - state.refilled) * limits["rate"] / 60)
+        state.refilled = now
+
+    # ─────────────────────────────────────────────
+    # Usage
+    def observe(self, api_key, tier=None, usage=None, reset=None):
+        """Record what the backend reported (/status or a /scrape summary)."""
+        with self._cond:
+            state = self._state(api_key, tier)
+            for period in PERIODS:
+                reset_at = _parse_time((reset or {}).get(period))
+                if reset_at is not None:
+                    state.reset[period] = reset_at
+                if usage and period in usage:
+                    state.used[period] = usage[period]
+            self._cond.notify_all()
+
+    def remaining(self, api_key, tier=None):
+        """Searches left per period, counting the ones still in flight."""
+        with self._cond:
+            state = self._state(api_key, tier)
+            limits = self._limits(state)
+            return {period: max(limits[period] - state.used[period] - state.in_flight, 0) for period in PERIODS}
+
+    def resets(self, api_key, tier=None):
+        """When the daily and monthly counters next roll over (UTC datetimes)."""
+        with self._cond:
+            return dict(self._state(api_key, tier).reset)
+
+    def check(self, api_key, tier=None, needed=1):
+        """Raise ``QuotaExceeded`` unless ``needed`` more searches fit today and this month."""
+        with self._cond:
+            self._check(self._state(api_key, tier), needed)
+
+    def _check(self, state, needed):
+        limits = self._limits(state)
+        for period in PERIODS:
+            remaining = limits[period] - state.used[period] - state.in_flight
+            if needed > remaining:
+                raise QuotaExceeded(period, limits[period], needed, max(remaining, 0))
+
+    # ─────────────────────────────────────────────
+    # Admission
+    def acquire(self, api_key, tier=None, timeout=None, cancel=None):
+        """Wait for a search slot; raises ``QuotaExceeded`` or ``Throttled``.
+
+        ``cancel`` is a ``threading.Event``; once it is set the wait ends with
+        ``Cancelled``.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if cancel is not None and cancel.is_set():
+                    raise Cancelled()
+                state = self._state(api_key, tier)
+                self._check(state, 1)
+                self._refill(state)
+                limits = self._limits(state)
+                if state.in_flight < limits["concurrency"] and state.tokens >= 1:
+                    state.tokens -= 1
+                    state.in_flight += 1
+                    return Ticket(api_key)
+                # Wake up when a token is due, or earlier if a slot is released
+                wait = (1 - state.tokens) * 60 / limits["rate"] if state.tokens < 1 else None
+                if deadline is not None:
+                    left = deadline - time.monotonic()
+                    if left <= 0:
+                        raise Throttled(wait or 1)
+                    wait = left if wait is None else min(wait, left)
+                if cancel is not None:
+                    wait = CANCEL_POLL if wait is None else min(wait, CANCEL_POLL)
+                self._cond.wait(wait)
+
+    def release(self, ticket, charged=True):
+        with self._cond:
+            state = self._state(ticket.api_key)
+            state.in_flight = max(state.in_flight - 1, 0)
+            if charged:
+                for period in PERIODS:
+                    if ticket.usage and period in ticket.usage:
+                        state.used[period] = max(state.used[period], ticket.usage[period])
+                    else:
+                        state.used[period] += 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, api_key, tier=None, timeout=None, cancel=None):
+        """Hold a search slot for the ``with`` block; a failed search isn't counted."""
+        ticket = self.acquire(api_key, tier, timeout, cancel)
+        try:
+            yield ticket
+        except BaseException:
+            self.release(ticket, charged=False)
+            raise
+        self.release(ticket)
+
+
+class ScopedScheduler:
+    """``QuotaScheduler`` surface that schedules the shared keys per ``scope``."""
+
+    def __init__(self, scheduler, scope):
+        self.scheduler = scheduler
+        self.scope = scope
+
+    def _key(self, api_key):
+        return f"{api_key}#{self.scope}" if api_key in self.scheduler.shared_keys else api_key
+
+    def observe(self, api_key, tier=None, usage=None, reset=None):
+        self.scheduler.observe(self._key(api_key), tier, usage, reset)
+
+    def remaining(self, api_key, tier=None):
+        return self.scheduler.remaining(self._key(api_key), tier)
+
+    def resets(self, api_key, tier=None):
+        return self.scheduler.resets(self._key(api_key), tier)
+
+    def check(self, api_key, tier=None, needed=1):
+        self.scheduler.check(self._key(api_key), tier, needed)
+
+    def acquire(self, api_key, tier=None, timeout=None, cancel=None):
+        return self.scheduler.acquire(self._key(api_key), tier, timeout, cancel)
+
+    def release(self, ticket, charged=True):
+        self.scheduler.release(ticket, charged)
+
+    def slot(self, api_key, tier=None, timeout=None, cancel=None):
+        return self.scheduler.slot(self._key(api_key), tier, timeout, cancel)
@@ -0,0 +1,280 @@
+"""Result sets shared by every session, under one memory budget.
+
+Sessions keep only a handle (their ``results_version``); the leads, their
+lead-index states and the typed frames built over them live here. When the
+frames and lead lists held in memory grow past ``budget`` bytes, the least
+recently used ones are dropped, and a set's leads are first spilled to an
+Arrow IPC file under ``spill_dir`` (JSON Lines without pyarrow). A spilled
+set is served from a memory-mapped ``ArrowFrame`` that reads only the rows of
+the page being shown, so it costs page cache rather than heap.
+
+Sets not touched for ``retention`` seconds (sessions that went away) are
+released, along with their spill files.
+"""
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from .config import DATA_DIR
+from .frame import ResultsFrame, build_frame
+
+MEMORY_BUDGET = int(os.getenv("RESULT_STORE_MEMORY_MB", 256)) * 1024 * 1024
+SPILL_DIR = os.getenv("RESULT_STORE_SPILL_DIR", os.path.join(DATA_DIR, "spill"))
+RETENTION = int(os.getenv("RESULT_STORE_RETENTION", 6 * 3600))  # seconds an untouched set is kept
+
+CHUNK_ROWS = 5000
+SIZE_SAMPLE = 200  # leads measured to estimate a list's size
+
+
+def estimate_bytes(leads):
+    """Rough heap size of a list of lead dicts, from a sample."""
+    if not leads:
+        return 0
+    sample = leads[::max(len(leads) // SIZE_SAMPLE, 1)]
+    per_lead = sum(sys.getsizeof(lead) + sum(sys.getsizeof(v) for v in lead.values()) for lead in sample)
+    return int(per_lead / len(sample) * len(leads)) + sys.getsizeof(leads)
+
+
+class ArrowFrame:
+    """``ResultsFrame`` surface over a spilled, memory-mapped Arrow file."""
+
+    complete = True
+
+    def __init__(self, path, version=None):
+        import pyarrow as pa
+
+        self.version = version
+        self.path = path
+        self.table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+        self.total = self.row_count = self.table.num_rows
+        self.emails_found = self._present("email")
+        self.phones_found = self._present("phone")
+
+    def _present(self, column):
+        if column not in self.table.column_names:
+            return 0
+        col = self.table.column(column)
+        return len(col) - col.null_count
+
+    def page(self, start, end):
+        return build_frame(self.table.slice(start, max(end - start, 0)).to_pylist(), offset=start)
+
+    def iter_leads(self):
+        for batch in self.table.to_batches(max_chunksize=CHUNK_ROWS):
+            yield from batch.to_pylist()
+
+    def take(self, indices):
+        return self.table.take(indices).to_pylist()
+
+
+class _ResultSet:
+    def __init__(self, leads, lead_states):
+        self.leads = leads  # until a frame takes them over or they are spilled
+        self.lead_states = lead_states
+        self.count = len(leads)
+        self.path = None
+        self.frames = {}  # "all" / "new" -> frame
+        self.touched = time.monotonic()
+
+
+class ResultStore:
+    def __init__(self, budget=MEMORY_BUDGET, spill_dir=SPILL_DIR, retention=RETENTION):
+        self.budget = budget
+        self.retention = retention
+        self._prune_spill_dirs(spill_dir)
+        # Each process spills into its own directory; handles don't outlive it
+        self.spill_dir = os.path.join(spill_dir, uuid.uuid4().hex[:12])
+        os.makedirs(self.spill_dir, exist_ok=True)
+        self._sets = {}
+        self._resident = OrderedDict()  # (handle, part) -> bytes, least recently used first
+        self.used = 0
+        self.spills = 0
+        self._lock = threading.RLock()
+
+    def _prune_spill_dirs(self, spill_dir):
+        if not os.path.isdir(spill_dir):
+            return
+        cutoff = time.time() - self.retention
+        for name in os.listdir(spill_dir):
+            path = os.path.join(spill_dir, name)
+            if os.path.isdir(path) and os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+
+    # ─────────────────────────────────────────────
+    # Sets
+    def put(self, handle, leads, lead_states=None):
+        with self._lock:
+            self._expire()
+            self._drop(handle)
+            self._sets[handle] = _ResultSet(leads, lead_states)
+            self._admit((handle, "leads"), estimate_bytes(leads))
+        return handle
+
+    def release(self, handle):
+        with self._lock:
+            self._drop(handle)
+
+    def __contains__(self, handle):
+        return handle in self._sets
+
+    def count(self, handle):
+        result_set = self._sets.get(handle)
+        return result_set.count if result_set is not None else 0
+
+    def lead_states(self, handle):
+        result_set = self._sets.get(handle)
+        return result_set.lead_states if result_set is not None else None
+
+    def frame(self, handle, only_new=False):
+        """The typed frame over a set (its "new" leads only with ``only_new``), or ``None``."""
+        part = "new" if only_new else "all"
+        with self._lock:
+            result_set = self._sets.get(handle)
+            if result_set is None:
+                return None
+            result_set.touched = time.monotonic()
+            frame = result_set.frames.get(part)
+            if frame is not None:
+                if (handle, part) in self._resident:
+                    self._resident.move_to_end((handle, part))
+                return frame
+            leads, path = self._leads_or_path(result_set)
+
+        # Built outside the lock: a large frame takes a while and other
+        # sessions shouldn't wait on it
+        version = handle + (":new" if only_new else "")
+        resident = True
+        if only_new:
+            indices = [i for i, state in enumerate(result_set.lead_states or []) if state == "new"]
+            if leads is not None:
+                frame = ResultsFrame([leads[i] for i in indices], version)
+            elif path.endswith(".arrow"):
+                frame = ResultsFrame(ArrowFrame(path).take(indices), version)
+            else:
+                all_leads = self._read_jsonl(path)
+                frame = ResultsFrame([all_leads[i] for i in indices], version)
+        elif leads is not None:
+            frame = ResultsFrame(leads, version)
+        elif path.endswith(".arrow"):
+            frame, resident = ArrowFrame(path, version), False
+        else:
+            frame = ResultsFrame(self._read_jsonl(path), version)
+
+        with self._lock:
+            if self._sets.get(handle) is not result_set:
+                return frame  # released meanwhile; serve this rerun anyway
+            if part in result_set.frames:
+                return result_set.frames[part]
+            result_set.frames[part] = frame
+            if resident:
+                # The frame holds its lead list; for the full set that list
+                # is the one counted under "leads" until now
+                leads_bytes = None
+                if part == "all" and (handle, "leads") in self._resident:
+                    leads_bytes = self._resident.pop((handle, "leads"))
+                    self.used -= leads_bytes
+                    result_set.leads = None
+                if leads_bytes is None:
+                    leads_bytes = estimate_bytes(frame.leads)
+                self._admit((handle, part), int(frame.df.memory_usage(deep=True).sum()) + leads_bytes)
+        return frame
+
+    def stats(self):
+        with self._lock:
+            return {"sets": len(self._sets), "resident": len(self._resident), "used_bytes": self.used,
+                    "budget_bytes": self.budget, "spills": self.spills}
+
+    # ─────────────────────────────────────────────
+    # Memory budget
+    def _leads_or_path(self, result_set):
+        if result_set.leads is not None:
+            return result_set.leads, None
+        full = result_set.frames.get("all")
+        if isinstance(full, ResultsFrame):
+            return full.leads, None
+        return None, result_set.path
+
+    def _admit(self, key, size):
+        self._resident[key] = size
+        self.used += size
+        while self.used > self.budget and len(self._resident) > 1:
+            victim = next(iter(self._resident))
+            self._evict(victim)
+
+    def _evict(self, key):
+        handle, part = key
+        self.used -= self._resident.pop(key)
+        result_set = self._sets[handle]
+        if part == "leads":
+            self._spill(handle, result_set, result_set.leads)
+            result_set.leads = None
+        else:
+            frame = result_set.frames.pop(part)
+            if part == "all":
+                self._spill(handle, result_set, frame.leads)
+
+    def _spill(self, handle, result_set, leads):
+        if result_set.path is not None:
+            return
+        base = os.path.join(self.spill_dir, handle)
+        try:
+            import pyarrow as pa
+        except ImportError:
+            pa = None
+        if pa is not None:
+            try:
+                table = pa.Table.from_pylist(leads)
+                with pa.OSFile(base + ".arrow.tmp", "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+                os.replace(base + ".arrow.tmp", base + ".arrow")
+                result_set.path = base + ".arrow"
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                pass  # mixed value types in a column; fall back to JSON Lines
+        if result_set.path is None:
+            with open(base + ".jsonl.tmp", "w") as f:
+                for lead in leads:
+                    f.write(json.dumps(lead) + "\n")
+            os.replace(base + ".jsonl.tmp", base + ".jsonl")
+            result_set.path = base + ".jsonl"
+        self.spills += 1
+
+    @staticmethod
+    def _read_jsonl(path):
+        with open(path) as f:
+            return [json.loads(line) for line in f]
+
+    def _drop(self, handle):
+        result_set = self._sets.pop(handle, None)
+        if result_set is None:
+            return
+        for part in ("leads", "all", "new"):
+            self.used -= self._resident.pop((handle, part), 0)
+        if result_set.path is not None:
+            try:
+                os.remove(result_set.path)
+            except OSError:
+                pass
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.retention
+        for handle in [h for h, s in self._sets.items() if s.touched < cutoff]:
+            self._drop(handle)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_result_store():
+    """The process-wide result store, created on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ResultStore()
+    return _store
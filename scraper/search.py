@@ -0,0 +1,221 @@
+"""Search workflows shared by the Streamlit app and the CLI.
+
+Single, batch and paged searches that answer from the result cache when they can,
+go through the quota scheduler when they can't, and index what they fetch.
+Identical single searches already in flight are joined rather than repeated,
+saved searches can be refreshed incrementally, keeping only what changed, and
+broad locations can be fanned out over their sub-areas. Every search asks
+for at most the plan's ``max_count`` leads (``max_paged_count`` for a paged
+search), whatever the caller passed.
+Nothing here imports Streamlit or pandas.
+"""
+from contextlib import nullcontext
+
+from .batch import iter_batch, merge_results
+from .fanout import shard_rows, shard_yield
+from .flight import flight_key, inflight
+from .leads import content_hash, lead_fingerprint
+from .quota import TIERS, Cancelled, QuotaExceeded, Throttled, cap_count, tier_limits  # noqa: F401 - re-exported
+
+
+def _fetch(client, api_key, keyword, location, count, tier, stream, scheduler, wait, on_lead, since=None,
+           on_start=None, cancel=None):
+    results, summary = [], {}
+    slot = scheduler.slot(api_key, tier, timeout=wait, cancel=cancel) if scheduler is not None else nullcontext()
+    with slot as ticket:
+        if on_start is not None:
+            on_start()
+        for kind, payload in client.iter_scrape(api_key, keyword, location, count, stream=stream, since=since):
+            if kind == "summary":
+                summary = payload
+                continue
+            results.append(payload)
+            if on_lead is not None:
+                on_lead(results)
+        if ticket is not None:
+            ticket.usage = summary.get("usage")
+    return results, summary
+
+
+def run_search(client, api_key, keyword, location, count, tier="free", cache=None, store=None,
+               bypass_cache=False, stream=True, scheduler=None, wait=None, on_lead=None, flights=inflight,
+               on_start=None, cancel=None):
+    """Run one search, preferring a cached answer.
+
+    Returns a dict with ``results``, ``summary``, ``cached``, ``shared``
+    (joined an identical search another caller had in flight; its leads
+    aren't streamed to ``on_lead``) and ``lead_states`` (from
+    ``store.merge``, or ``None`` without a store). Only searches with the
+    same API key are joined, and only after this key's quota check passes;
+    pass ``flights=None`` to never coalesce.
+    ``on_lead`` is called with the results so far as each lead arrives. A live
+    call first takes a slot from ``scheduler`` (a ``QuotaScheduler``), waiting
+    up to ``wait`` seconds; ``QuotaExceeded`` / ``Throttled`` are raised when
+    it can't, and ``Cancelled`` once ``cancel`` (a ``threading.Event``) is
+    set while waiting. ``on_start()`` is called once the search has its slot,
+    or its answer from the cache or a shared flight; raising there abandons
+    the search before it reaches the backend. Raises ``ApiError`` /
+    ``requests`` exceptions from the backend.
+    """
+    count = cap_count(count, tier)
+    hit = None
+    if cache is not None and not bypass_cache:
+        hit = cache.get(keyword, location, count, tier)
+    shared = False
+    if hit is not None:
+        results, summary = hit
+        if on_start is not None:
+            on_start()
+    else:
+        def fetch():
+            results, summary = _fetch(client, api_key, keyword, location, count, tier, stream, scheduler, wait,
+                                      on_lead, on_start=on_start, cancel=cancel)
+            if cache is not None:
+                cache.put(keyword, location, count, tier, results, summary)
+            return results, summary
+
+        if flights is None:
+            results, summary = fetch()
+        else:
+            # Joining someone else's search still needs this key's own quota
+            if scheduler is not None:
+                scheduler.check(api_key, tier)
+            (results, summary), shared = flights.do(flight_key(api_key, keyword, location, count, tier), fetch)
+            if shared:
+                results = list(results)
+                if on_start is not None:
+                    on_start()
+    lead_states = store.merge(results, f"{keyword} in {location}") if store is not None else None
+    return {"results": results, "summary": summary, "cached": hit is not None, "shared": shared,
+            "lead_states": lead_states}
+
+
+def run_refresh(client, api_key, keyword, location, count, previous_keys, tier="free", store=None,
+                since=None, stream=True, scheduler=None, wait=None, on_lead=None):
+    """Re-run a saved search and keep only the leads that are new or changed.
+
+    ``previous_keys`` are the lead fingerprints the search returned last time
+    (a ``SearchHistory`` entry's ``lead_keys``); a lead counts as changed when
+    its details differ from what ``store`` holds for it. ``since`` is passed
+    on so a backend that supports it only sends the delta. Always a live call,
+    never answered from or written to the result cache.
+
+    Returns a dict with ``results`` and ``lead_states`` (new and changed
+    leads only), ``fetched`` (every lead the backend sent, for yield stats),
+    ``summary``, ``changes`` (counts of ``new``, ``changed``,
+    ``unchanged`` and ``removed``; ``removed`` is ``None`` for a delta
+    answer, which doesn't list unchanged leads) and ``lead_keys`` (the
+    search's full set of fingerprints now, to save for the next refresh).
+    Only new and changed leads are merged into ``store``.
+    """
+    results, summary = _fetch(client, api_key, keyword, location, cap_count(count, tier), tier, stream, scheduler,
+                              wait, on_lead, since=since)
+    delta = bool(summary.get("delta"))
+    previous = set(previous_keys)
+    keys = [lead_fingerprint(lead) for lead in results]
+    known = store.hashes([key for key in keys if key in previous]) if store is not None else {}
+
+    kept, states, seen = [], [], set()
+    changes = {"new": 0, "changed": 0, "unchanged": 0, "removed": None}
+    for lead, key in zip(results, keys):
+        if key in seen:
+            continue
+        seen.add(key)
+        if key not in previous:
+            state = "new"
+        elif key in known and known[key] != content_hash(lead):
+            state = "changed"
+        else:
+            changes["unchanged"] += 1
+            continue
+        changes[state] += 1
+        kept.append(lead)
+        states.append(state)
+    if not delta:
+        changes["removed"] = len(previous - seen)
+
+    if store is not None and kept:
+        store.merge(kept, f"refresh: {keyword} in {location}")
+    lead_keys = list(dict.fromkeys([*previous_keys, *keys])) if delta else list(dict.fromkeys(keys))
+    return {"results": kept, "lead_states": states, "fetched": results, "summary": summary, "changes": changes,
+            "lead_keys": lead_keys}
+
+
+def start_paged_search(client, api_key, keyword, location, count, page_size, tier="free", scheduler=None,
+                       wait=None):
+    """Start a cursor-paginated search (``client.scrape_page``) and return its first page.
+
+    Takes a slot from ``scheduler`` like ``run_search``; never cached. ``count``
+    is capped at the plan's ``max_paged_count``.
+    """
+    slot = scheduler.slot(api_key, tier, timeout=wait) if scheduler is not None else nullcontext()
+    with slot as ticket:
+        data = client.scrape_page(api_key, keyword, location, cap_count(count, tier, paged=True), page_size)
+        if ticket is not None:
+            ticket.usage = data.get("usage")
+    return data
+
+
+def run_batch(client, api_key, rows, tier="free", cache=None, bypass_cache=False, max_workers=None,
+              scheduler=None, on_row=None):
+    """Run batch ``rows`` (see ``parse_batch_csv``), cached rows first.
+
+    Returns one status per row, as yielded by ``iter_batch``, with
+    ``state`` "cached" for rows answered locally. ``on_row(index, status)``
+    is called as each row finishes. With a ``scheduler`` the rows that need
+    a live search are checked against the plan quota up front, then each
+    row waits for its own slot.
+    """
+    rows = [{**row, "count": cap_count(row["count"], tier)} for row in rows]
+    statuses = [None] * len(rows)
+    pending = []
+    for i, row in enumerate(rows):
+        hit = None
+        if cache is not None and not bypass_cache:
+            hit = cache.get(row["keyword"], row["location"], row["count"], tier)
+        if hit is None:
+            pending.append(i)
+            continue
+        statuses[i] = {"state": "cached", "returned": len(hit[0]), "error": "",
+                       "results": hit[0], "summary": hit[1]}
+        if on_row is not None:
+            on_row(i, statuses[i])
+
+    slot = None
+    if scheduler is not None:
+        if pending:
+            scheduler.check(api_key, tier, needed=len(pending))
+        slot = lambda: scheduler.slot(api_key, tier)  # noqa: E731
+
+    workers = max_workers or tier_limits(tier)["concurrency"]
+    for pending_index, status in iter_batch(client, api_key, [rows[i] for i in pending], workers, slot=slot):
+        index = pending[pending_index]
+        statuses[index] = status
+        if status["state"] == "done" and cache is not None:
+            row = rows[index]
+            cache.put(row["keyword"], row["location"], row["count"], tier, status["results"], status["summary"])
+        if on_row is not None:
+            on_row(index, status)
+    return statuses
+
+
+def run_fanout(client, api_key, keyword, location, areas, count, tier="free", cache=None, bypass_cache=False,
+               max_workers=None, scheduler=None, on_shard=None):
+    """Search ``keyword`` in every sub-area of ``location`` and merge the answers.
+
+    The shards run as one batch, so they share the plan's concurrency, the
+    upfront quota check and the result cache. ``on_shard(index, status)`` is
+    called as each finishes. Returns a dict with ``results`` (deduplicated
+    across shards), ``rows``, ``statuses`` and ``shards`` (see
+    ``fanout.shard_yield``).
+    """
+    rows = shard_rows(keyword, location, count, areas)
+    statuses = run_batch(client, api_key, rows, tier, cache=cache, bypass_cache=bypass_cache,
+                         max_workers=max_workers, scheduler=scheduler, on_row=on_shard)
+    return {"results": batch_results(statuses), "rows": rows, "statuses": statuses,
+            "shards": shard_yield(rows, statuses)}
+
+
+def batch_results(statuses):
+    """All leads from a finished batch, deduplicated across rows."""
+    return merge_results(status["results"] for status in statuses)
@@ -0,0 +1,144 @@
+"""Process-wide /status cache shared by every session, keyed by API key.
+
+- fresh (younger than ``ttl``): served from memory
+- stale (younger than ``stale_ttl``): served from memory while one background
+  thread refreshes it (stale-while-revalidate)
+- missing, expired or invalidated: fetched synchronously, but only once per key
+  at a time; concurrent callers wait for that single request (single-flight)
+
+Only definitive answers (200, 401, 404) are cached. Timeouts and connection
+errors propagate to the caller so the UI can report them.
+"""
+import threading
+import time
+
+from .config import DEFAULT_API_KEY
+
+CACHEABLE_CODES = (200, 401, 404)
+
+
+def account_from_status(status_code, data, api_key):
+    """``{"tier", "usage", "reset"}`` from a /status answer, or ``None`` when it has none.
+
+    The shared default key is always free tier, and falls back to empty free
+    usage when the backend doesn't know it (401) or has no /status (404).
+    """
+    if status_code == 200:
+        data = data or {}
+        tier = "free" if api_key == DEFAULT_API_KEY else data.get("tier", "free")
+        return {
+            "tier": tier,
+            "usage": data.get("usage", {"daily": 0, "monthly": 0}),
+            "reset": data.get("reset", {}),
+        }
+    if status_code in (401, 404) and api_key == DEFAULT_API_KEY:
+        return {"tier": "free", "usage": {"daily": 0, "monthly": 0}, "reset": {}}
+    return None
+
+
+class StatusResult:
+    def __init__(self, status_code, data=None, text=""):
+        self.status_code = status_code
+        self.data = data or {}
+        self.text = text
+        self.fetched_at = time.time()
+
+    @property
+    def ok(self):
+        return self.status_code == 200
+
+    @property
+    def age(self):
+        return time.time() - self.fetched_at
+
+
+class _Entry:
+    def __init__(self):
+        self.result = None     # last cacheable StatusResult
+        self.outcome = None    # StatusResult or exception from the latest fetch
+        self.in_flight = None  # threading.Event while a fetch is running
+
+
+class StatusCache:
+    def __init__(self, client, ttl=30, stale_ttl=300):
+        self.client = client
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, api_key):
+        """Return a ``StatusResult`` for ``api_key``, fetching it if needed."""
+        with self._lock:
+            entry = self._entries.setdefault(api_key, _Entry())
+            result = entry.result
+            if result is not None and result.age < self.ttl:
+                return result
+            if result is not None and result.age < self.stale_ttl:
+                self._start_background(api_key, entry)
+                return result
+            leader = entry.in_flight is None
+            if leader:
+                entry.in_flight = threading.Event()
+            waiter = entry.in_flight
+
+        if leader:
+            self._refresh(api_key, entry)
+        else:
+            waiter.wait()
+
+        outcome = entry.outcome
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    def peek(self, api_key):
+        """Return the cached status (fresh or stale) without blocking, else ``None``."""
+        with self._lock:
+            entry = self._entries.get(api_key)
+            if entry is None or entry.result is None or entry.result.age >= self.stale_ttl:
+                return None
+            return entry.result
+
+    def prefetch(self, api_key):
+        """Start a background fetch for ``api_key`` unless its status is fresh."""
+        with self._lock:
+            entry = self._entries.setdefault(api_key, _Entry())
+            if entry.result is None or entry.result.age >= self.ttl:
+                self._start_background(api_key, entry)
+
+    def _start_background(self, api_key, entry):
+        # Caller holds self._lock
+        if entry.in_flight is None:
+            entry.in_flight = threading.Event()
+            threading.Thread(target=self._refresh, args=(api_key, entry), daemon=True).start()
+
+    def _refresh(self, api_key, entry):
+        try:
+            r = self.client.status(api_key)
+            try:
+                data = r.json()
+            except ValueError:
+                data = {}
+            outcome = StatusResult(r.status_code, data, r.text[:200])
+        except Exception as e:
+            outcome = e
+        with self._lock:
+            entry.outcome = outcome
+            if isinstance(outcome, StatusResult) and outcome.status_code in CACHEABLE_CODES:
+                entry.result = outcome
+            event, entry.in_flight = entry.in_flight, None
+        event.set()
+
+    def invalidate(self, api_key):
+        """Forget ``api_key`` so the next ``get`` fetches a fresh status.
+
+        A fetch already in flight finishes into the detached entry and is
+        never served, since it may predate the change being invalidated.
+        """
+        with self._lock:
+            self._entries.pop(api_key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
@@ -0,0 +1,193 @@
+"""Do-not-contact list applied to every result set as it comes in.
+
+An uploaded list (one value per line, or CSV cells: emails, phones, domains or
+website URLs in any mix) is normalized the same way as the results (see
+``normalize``) and stored as one sorted array of 64-bit hashes in
+``SUPPRESSION_DIR``. The array is memory-mapped, so every session and worker
+shares the OS page cache instead of holding its own copy of millions of
+entries, and a lead is checked with ``numpy.searchsorted`` over whole columns.
+
+A lead is suppressed when its email, its phone, its website's domain or its
+email's domain is on the list. Listed domains and websites match on the
+registrable domain, so ``mail.example.com`` suppresses all of
+``example.com``. Rebuilding replaces the files atomically; open lists pick
+up the new one on their next lookup.
+"""
+import json
+import os
+import threading
+import time
+from itertools import compress
+
+from .config import DATA_DIR
+from .normalize import email_domains, normalize_emails, normalize_phones, registrable_domains
+
+DEFAULT_DIR = os.getenv("SUPPRESSION_DIR", os.path.join(DATA_DIR, "suppression"))
+CHUNK_LINES = 500_000
+
+_SEPARATORS = r"[,;\t]"
+_QUOTES = r"^[\"']+|[\"']+$"
+
+
+def _hash(prefix, values):
+    import numpy as np
+    import pandas as pd
+
+    values = values.dropna()
+    if values.empty:
+        return np.empty(0, dtype=np.uint64)
+    return pd.util.hash_array((prefix + values).to_numpy(dtype=object), categorize=False)
+
+
+def _entry_hashes(values):
+    """``(hashes, counts)`` for a Series of raw list entries; blanks and headers are skipped."""
+    import numpy as np
+
+    values = values.astype("string").str.strip().str.replace(_QUOTES, "", regex=True).str.lower()
+    values = values[values.fillna("").str.len() > 0]
+    is_email = values.str.contains("@", regex=False).fillna(False).astype(bool)
+    has_letters = values.str.contains(r"[a-z]", regex=True).fillna(False).astype(bool)
+    emails, _ = normalize_emails(values[is_email])
+    domains = registrable_domains(values[~is_email & has_letters])
+    phones = normalize_phones(values[~is_email & ~has_letters])
+    hashes = np.concatenate([_hash("e:", emails), _hash("d:", domains), _hash("p:", phones)])
+    counts = {"emails": int(emails.notna().sum()), "domains": int(domains.notna().sum()),
+              "phones": int(phones.notna().sum())}
+    return hashes, counts
+
+
+class SuppressionList:
+    def __init__(self, directory=DEFAULT_DIR):
+        self.directory = directory
+        self.index_path = os.path.join(directory, "suppression.npy")
+        self.meta_path = os.path.join(directory, "suppression.json")
+        self._lock = threading.Lock()
+        self._index = None
+        self._stamp = None
+
+    # ─────────────────────────────────────────────
+    # Building
+    def build(self, f, name=""):
+        """Replace the list with the entries in binary file ``f``; returns its ``info()``."""
+        import numpy as np
+        import pandas as pd
+
+        os.makedirs(self.directory, exist_ok=True)
+        # One string per line, split into cells below; read in chunks so a
+        # multi-million-line upload never sits in memory as Python strings
+        reader = pd.read_csv(f, header=None, names=["line"], dtype="string", sep="\x01", quoting=3,
+                             skip_blank_lines=True, chunksize=CHUNK_LINES, encoding_errors="replace")
+        parts = []
+        counts = {"emails": 0, "phones": 0, "domains": 0}
+        lines = 0
+        for chunk in reader:
+            lines += len(chunk)
+            cells = chunk["line"]
+            if cells.str.contains(_SEPARATORS, regex=True).any():
+                cells = cells.str.split(_SEPARATORS, regex=True).explode()
+            hashes, chunk_counts = _entry_hashes(cells)
+            parts.append(hashes)
+            for kind, n in chunk_counts.items():
+                counts[kind] += n
+        index = np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.uint64)
+
+        tmp = self.index_path + ".tmp.npy"
+        np.save(tmp, index)
+        meta = {"name": name, "lines": lines, "entries": int(len(index)), **counts, "built": time.time()}
+        with open(self.meta_path + ".tmp", "w") as out:
+            json.dump(meta, out)
+        os.replace(tmp, self.index_path)
+        os.replace(self.meta_path + ".tmp", self.meta_path)
+        return meta
+
+    def clear(self):
+        with self._lock:
+            for path in (self.index_path, self.meta_path):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self._index = self._stamp = None
+
+    def info(self):
+        """``{"name", "lines", "entries", "emails", "phones", "domains", "built"}``, or ``None`` without a list."""
+        try:
+            with open(self.meta_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    # ─────────────────────────────────────────────
+    # Lookups
+    def _current(self):
+        import numpy as np
+
+        try:
+            st = os.stat(self.index_path)
+        except FileNotFoundError:
+            return None
+        stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+        with self._lock:
+            if stamp != self._stamp:
+                self._index = np.load(self.index_path, mmap_mode="r")
+                self._stamp = stamp
+            return self._index
+
+    def __len__(self):
+        index = self._current()
+        return 0 if index is None else len(index)
+
+    def suppressed(self, leads):
+        """Boolean array aligned with ``leads``, ``True`` for leads on the list; ``None`` without a list."""
+        import numpy as np
+        import pandas as pd
+
+        index = self._current()
+        if index is None or not len(index) or not leads:
+            return None
+
+        def column(name):
+            return pd.Series([lead.get(name) for lead in leads], dtype="string")
+
+        emails, _ = normalize_emails(column("email"))
+        countries = column("country") if any("country" in lead for lead in leads) else None
+        phones = normalize_phones(column("phone"), countries)
+        domains = registrable_domains(column("website"))
+
+        hit = np.zeros(len(leads), dtype=bool)
+        for prefix, values in (("e:", emails), ("p:", phones), ("d:", domains), ("d:", email_domains(emails))):
+            present = values.notna().to_numpy()
+            if not present.any():
+                continue
+            keys = _hash(prefix, values)
+            # Sorted probes walk the mapped index front to back
+            order = np.argsort(keys)
+            pos = np.searchsorted(index, keys[order])
+            pos[pos == len(index)] = 0
+            found = np.empty(len(keys), dtype=bool)
+            found[order] = np.asarray(index[pos]) == keys[order]
+            hit[present] |= found
+        return hit
+
+    def filter(self, leads, lead_states=None):
+        """``(kept leads, their lead_states, number suppressed)``."""
+        hit = self.suppressed(leads)
+        if hit is None or not hit.any():
+            return leads, lead_states, 0
+        keep = ~hit
+        kept_states = list(compress(lead_states, keep)) if lead_states is not None else None
+        return list(compress(leads, keep)), kept_states, int(hit.sum())
+
+
+_list = None
+_list_lock = threading.Lock()
+
+
+def get_suppression_list():
+    """The process-wide suppression list, created on first use."""
+    global _list
+    if _list is None:
+        with _list_lock:
+            if _list is None:
+                _list = SuppressionList()
+    return _list
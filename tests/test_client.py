@@ -0,0 +1,49 @@
+from scraper.client import ApiClient
+
+
+class StreamResponse:
+    status_code = 200
+
+    def __init__(self, content_type, lines):
+        self.headers = {"Content-Type": content_type}
+        self.lines = lines
+
+    def iter_lines(self, decode_unicode=False):
+        return iter(self.lines)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class StubClient(ApiClient):
+    def __init__(self, response):
+        super().__init__("http://backend.invalid")
+        self.response = response
+
+    def request(self, method, endpoint, api_key=None, timeout=None, **kwargs):
+        return self.response
+
+
+def scrape(content_type, lines):
+    return list(StubClient(StreamResponse(content_type, lines)).iter_scrape("key", "dentist", "Boston", 2))
+
+
+def test_sse_lead_keeps_its_own_type_field():
+    events = scrape("text/event-stream", [
+        "event: lead", 'data: {"name": "Smile Dental", "type": "Dentist"}', "",
+        "event: lead", 'data: {"name": "Bright Smiles"}', "",
+        "event: summary", 'data: {"requested": 2, "returned": 2}', "",
+    ])
+    assert events == [("lead", {"name": "Smile Dental", "type": "Dentist"}),
+                      ("lead", {"name": "Bright Smiles"}),
+                      ("summary", {"requested": 2, "returned": 2})]
+
+
+def test_unnamed_sse_and_ndjson_records_carry_their_kind():
+    lines = ['{"type": "lead", "data": {"name": "Smile Dental"}}', '{"type": "summary", "returned": 1}']
+    expected = [("lead", {"name": "Smile Dental"}), ("summary", {"returned": 1})]
+    assert scrape("application/x-ndjson", lines) == expected
+    assert scrape("text/event-stream", [f"data: {lines[0]}", "", f"data: {lines[1]}", ""]) == expected
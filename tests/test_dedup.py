@@ -0,0 +1,104 @@
+import random
+
+import pandas as pd
+import pytest
+
+from scraper.dedup import find_duplicates, merge_duplicates
+from scraper.frame import build_frame
+
+
+def same_business(a, b):
+    labels, _ = find_duplicates(pd.DataFrame([a, b]))
+    return labels[0] == labels[1]
+
+
+@pytest.mark.parametrize("a, b", [
+    # Same phone, similar name
+    ({"name": "Smile Dental NYC", "phone": "(212) 555-1234"},
+     {"name": "Smile Dental", "phone": "212-555-1234"}),
+    # Same street and house number, no phone or website on one side
+    ({"name": "Smile Dental", "phone": "(212) 555-1234", "address": "12 Oak Ave, New York, NY 10001"},
+     {"name": "Smile Dental LLC", "address": "12 Oak Avenue, New York NY 10001"}),
+    # Same website, one side without an address
+    ({"name": "Joe's Pizza LLC", "website": "http://www.joespizza.com", "address": "1 Main St, Boston"},
+     {"name": "Joes Pizza", "website": "joespizza.com/menu"}),
+])
+def test_duplicates_are_merged(a, b):
+    assert same_business(a, b)
+
+
+@pytest.mark.parametrize("a, b", [
+    # Phones and websites differ; only the house number and city match
+    ({"name": "Dentist Care 41", "phone": "(212) 968-7161", "address": "524 5th Ave, Boston",
+      "website": "dentist41.com"},
+     {"name": "Dentist Care 53724", "phone": "(212) 968-6147", "address": "524 Park Ave, Boston",
+      "website": "dentist53724.com"}),
+    # Same name and street, different phones
+    ({"name": "Smile Dental", "phone": "(212) 555-1234", "address": "12 Oak Ave, New York, NY 10001"},
+     {"name": "Smile Dental", "phone": "(212) 555-9876", "address": "12 Oak Ave, New York, NY 10001"}),
+    # Same phone, different websites
+    ({"name": "Smile Dental", "phone": "(212) 555-1234", "website": "smiledental.com"},
+     {"name": "Smile Dental", "phone": "(212) 555-1234", "website": "othersmile.com"}),
+    # A chain: same website, different addresses
+    ({"name": "Starbucks", "website": "starbucks.com", "address": "1 Main St, Boston MA 02101"},
+     {"name": "Starbucks", "website": "starbucks.com", "address": "500 Elm St, Boston MA 02101"}),
+    # Same street, different house numbers
+    ({"name": "Smile Dental", "address": "12 Oak Ave, New York, NY 10001"},
+     {"name": "Smile Dental", "address": "14 Oak Ave, New York, NY 10001"}),
+    # A shared switchboard: same phone, similar names, different streets
+    ({"name": "Harbor Medical Group", "phone": "(212) 555-1000", "address": "12 Oak Ave, New York, NY 10001"},
+     {"name": "Harbor Medical Imaging", "phone": "(212) 555-1000", "address": "90 Elm St, New York, NY 10001"}),
+    # A shared switchboard in one building: same phone and address, different company email domains
+    ({"name": "Harbor Medical Group", "phone": "(212) 555-1000", "email": "info@harbormedical.com",
+      "address": "12 Oak Ave, New York, NY 10001"},
+     {"name": "Harbor Medical Imaging", "phone": "(212) 555-1000", "email": "scans@harborimaging.com",
+      "address": "12 Oak Ave, New York, NY 10001"}),
+    # Same phone, unrelated names
+    ({"name": "Smile Dental", "phone": "(212) 555-1234"},
+     {"name": "Grand Auto Repair", "phone": "(212) 555-1234"}),
+])
+def test_distinct_businesses_are_kept_apart(a, b):
+    assert not same_business(a, b)
+
+
+def test_webmail_addresses_do_not_keep_duplicates_apart():
+    assert same_business({"name": "Smile Dental", "phone": "(212) 555-1234", "email": "hi@smiledental.com"},
+                         {"name": "Smile Dental NYC", "phone": "212-555-1234", "email": "smiledental@gmail.com"})
+
+
+def test_distinct_leads_sharing_a_city_are_not_merged():
+    rng = random.Random(7)
+    streets = ["5th Ave", "Park Ave", "Broadway", "Main St", "Oak Ave", "Elm St"]
+    leads = [{"name": f"Dentist Care {i}",
+              "phone": f"(212) {rng.randint(200, 999)}-{rng.randint(0, 9999):04d}",
+              "address": f"{rng.randint(1, 99)} {rng.choice(streets)}, Boston",
+              "website": f"https://www.dentist{i}.com"} for i in range(5000)]
+    assert merge_duplicates(leads)["duplicates"] == 0
+
+
+def test_merge_keeps_the_most_complete_lead_and_fills_gaps():
+    leads = [
+        {"name": "Smile Dental NYC", "phone": "(212) 555-1234"},
+        {"name": "Other Business", "phone": "(617) 555-0000"},
+        {"name": "Smile Dental", "phone": "212-555-1234", "email": "hi@smiledental.com",
+         "address": "12 Oak Ave, New York"},
+        {"name": "Smile Dental", "phone": "+1 212 555 1234", "website": "smiledental.com"},
+    ]
+    outcome = merge_duplicates(leads)
+    assert outcome["duplicates"] == 2
+    assert outcome["kept"] == [2, 1]
+    merged = outcome["leads"][0]
+    assert merged["email"] == "hi@smiledental.com"
+    assert merged["website"] == "smiledental.com"
+    assert outcome["clusters"] == [{"name": "Smile Dental", "count": 3,
+                                    "names": ["Smile Dental NYC", "Smile Dental"]}]
+
+
+def test_merge_uses_the_frames_normalized_columns():
+    leads = [{"name": "Smile Dental", "phone": "(212) 555-1234"},
+             {"name": "Smile Dental", "phone": "(212) 555-9876"}]
+    df = build_frame(leads)
+    assert merge_duplicates(leads, df)["duplicates"] == 0
+    # The frame's phone_e164 column decides, not the raw phone
+    df["phone_e164"] = "+12125551234"
+    assert merge_duplicates(leads, df)["duplicates"] == 1
@@ -0,0 +1,22 @@
+from scraper.fanout import shard_rows, shard_yield
+
+
+def done(*names):
+    return {"state": "done", "results": [{"name": name, "phone": "555"} for name in names], "error": ""}
+
+
+def test_shard_yield_credits_each_lead_to_the_first_area():
+    rows = shard_rows("dentist", "New York", 10, ["Manhattan", "Brooklyn", "Queens"])
+    report = shard_yield(rows, [done("A", "B"), done("B", "C"), done("A")])
+    assert [(shard["returned"], shard["unique"]) for shard in report] == [(2, 2), (2, 1), (1, 0)]
+    assert [shard["prunable"] for shard in report] == [False, False, True]
+
+
+def test_failed_and_skipped_areas_are_never_pruned():
+    rows = shard_rows("dentist", "New York", 10, ["Manhattan", "Brooklyn", "Queens"])
+    failed = {"state": "failed", "results": [], "error": "HTTP 500: backend down"}
+    report = shard_yield(rows, [done("A"), failed, None])
+    assert [shard["state"] for shard in report] == ["done", "failed", "skipped"]
+    assert [shard["unique"] for shard in report] == [1, 0, 0]
+    assert not any(shard["prunable"] for shard in report)
+    assert report[1]["error"] == "HTTP 500: backend down"
@@ -0,0 +1,135 @@
+import threading
+import time
+
+import pytest
+
+from scraper.client import ApiError
+from scraper.flight import SingleFlight, flight_key
+from scraper.quota import QuotaExceeded, QuotaScheduler
+from scraper.search import run_search
+
+
+def wait_until(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.005)
+
+
+def wait_for_followers(flight, n):
+    wait_until(lambda: sum(flight.in_flight().values()) >= n)
+
+
+def run_in_thread(fn):
+    box = {}
+
+    def target():
+        try:
+            box["value"] = fn()
+        except BaseException as e:  # noqa: B036 - recorded for the assertion
+            box["error"] = e
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    return thread, box
+
+
+class FakeClient:
+    """``iter_scrape`` that blocks on ``release`` and fails for ``bad_keys``."""
+
+    def __init__(self, bad_keys=()):
+        self.bad_keys = set(bad_keys)
+        self.release = threading.Event()
+        self.calls = []
+
+    def iter_scrape(self, api_key, keyword, location, count, stream=True, since=None):
+        self.calls.append(api_key)
+        self.release.wait(2)
+        if api_key in self.bad_keys:
+            raise ApiError(401, "Invalid API key")
+        for i in range(count):
+            yield "lead", {"name": f"{keyword} {i}", "key": api_key}
+        yield "summary", {"returned": count}
+
+
+def test_followers_share_a_successful_result():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        release.wait(2)
+        return "value"
+
+    leader, leader_box = run_in_thread(lambda: flight.do("k", fn))
+    wait_until(flight.in_flight)
+    follower, follower_box = run_in_thread(lambda: flight.do("k", fn))
+    wait_for_followers(flight, 1)
+    release.set()
+    leader.join()
+    follower.join()
+    assert leader_box["value"] == ("value", False)
+    assert follower_box["value"] == ("value", True)
+    assert len(calls) == 1
+    assert flight.in_flight() == {}
+
+
+@pytest.mark.parametrize("error", [ValueError("boom"), KeyboardInterrupt()])
+def test_leader_failure_is_not_raised_in_followers(error):
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def failing():
+        release.wait(2)
+        raise error
+
+    leader, leader_box = run_in_thread(lambda: flight.do("k", failing))
+    wait_until(flight.in_flight)
+    follower, follower_box = run_in_thread(lambda: flight.do("k", lambda: "own"))
+    wait_for_followers(flight, 1)
+    release.set()
+    leader.join()
+    follower.join()
+    assert leader_box["error"] is error
+    # The follower made its own call instead
+    assert follower_box == {"value": ("own", False)}
+
+
+def test_flight_key_depends_on_api_key_and_hides_it():
+    key_a = flight_key("key-a", "Dentist", "Boston", 10, "pro")
+    assert key_a == flight_key("key-a", " dentist ", "boston", 10, "pro")
+    assert key_a != flight_key("key-b", "Dentist", "Boston", 10, "pro")
+    assert "key-a" not in key_a
+
+
+def test_searches_with_different_keys_do_not_join():
+    client = FakeClient(bad_keys={"bad"})
+    flight = SingleFlight()
+    bad, bad_box = run_in_thread(lambda: run_search(client, "bad", "dentist", "Boston", 2, "pro", flights=flight))
+    wait_until(flight.in_flight)
+    good, good_box = run_in_thread(lambda: run_search(client, "good", "dentist", "Boston", 2, "pro",
+                                                      flights=flight))
+    wait_until(lambda: len(client.calls) == 2)
+    client.release.set()
+    bad.join()
+    good.join()
+    assert isinstance(bad_box["error"], ApiError)
+    assert not good_box["value"]["shared"]
+    assert [lead["key"] for lead in good_box["value"]["results"]] == ["good", "good"]
+
+
+def test_joining_a_flight_needs_own_quota():
+    client = FakeClient()
+    flight = SingleFlight()
+    scheduler = QuotaScheduler()
+    scheduler.observe("spent", "pro", usage={"daily": 100, "monthly": 100})
+    leader, leader_box = run_in_thread(lambda: run_search(client, "spent", "dentist", "Boston", 2, "pro",
+                                                          flights=flight))
+    wait_until(flight.in_flight)
+    with pytest.raises(QuotaExceeded):
+        run_search(client, "spent", "dentist", "Boston", 2, "pro", scheduler=scheduler, flights=flight)
+    client.release.set()
+    leader.join()
+    assert len(leader_box["value"]["results"]) == 2
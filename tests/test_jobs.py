@@ -0,0 +1,125 @@
+import threading
+import time
+
+import pytest
+
+from scraper.client import ApiError
+from scraper.jobs import JobRunner, JobStore
+from scraper.quota import QuotaScheduler
+
+TIERS = {"free": {"daily": 100, "monthly": 100, "concurrency": 1, "rate": 6000}}
+
+
+def wait_for_state(store, job_id, state, timeout=3):
+    deadline = time.monotonic() + timeout
+    while store.get(job_id)["state"] != state:
+        if time.monotonic() > deadline:
+            raise AssertionError(f"job stayed {store.get(job_id)['state']!r}, expected {state!r}")
+        time.sleep(0.01)
+
+
+class FakeClient:
+    def __init__(self, error=None):
+        self.error = error
+        self.release = threading.Event()
+        self.release.set()
+        self.calls = 0
+
+    def iter_scrape(self, api_key, keyword, location, count, stream=True, since=None):
+        self.calls += 1
+        self.release.wait(3)
+        if self.error is not None:
+            raise self.error
+        for i in range(count):
+            yield "lead", {"name": f"{keyword} {i}"}
+        yield "summary", {"returned": count}
+
+
+@pytest.fixture
+def store():
+    return JobStore(":memory:")
+
+
+def make_runner(store, client, scheduler=None, **kwargs):
+    return JobRunner(client, store, scheduler=scheduler, max_workers=2, **kwargs)
+
+
+def test_job_runs_to_done(store):
+    runner = make_runner(store, FakeClient())
+    job_id = runner.submit("me", "key", "dentist", "Boston", 3)
+    wait_for_state(store, job_id, "done")
+    job = store.get(job_id)
+    assert job["returned"] == 3 and job["started"] is not None
+    assert len(store.results(job_id)[0]) == 3
+    runner.close()
+
+
+def test_job_waiting_for_a_slot_stays_queued_and_can_be_cancelled(store):
+    client = FakeClient()
+    scheduler = QuotaScheduler(TIERS)
+    held = scheduler.acquire("key", "free")  # the key's only slot
+    runner = make_runner(store, client, scheduler)
+    job_id = runner.submit("me", "key", "dentist", "Boston", 3)
+    time.sleep(0.2)
+    assert store.get(job_id)["state"] == "queued"
+    assert runner.cancel(job_id)
+    assert store.get(job_id)["state"] == "cancelled"
+    scheduler.release(held, charged=False)
+    time.sleep(0.7)  # longer than the scheduler's cancel poll
+    assert store.get(job_id)["state"] == "cancelled"
+    assert client.calls == 0
+    assert scheduler.remaining("key", "free")["daily"] == 100
+    runner.close()
+
+
+def test_job_turns_running_once_it_has_a_slot(store):
+    client = FakeClient()
+    client.release.clear()
+    scheduler = QuotaScheduler(TIERS)
+    held = scheduler.acquire("key", "free")
+    runner = make_runner(store, client, scheduler)
+    job_id = runner.submit("me", "key", "dentist", "Boston", 3)
+    time.sleep(0.2)
+    assert store.get(job_id)["state"] == "queued"
+    scheduler.release(held, charged=False)
+    wait_for_state(store, job_id, "running")
+    assert not runner.cancel(job_id)
+    client.release.set()
+    wait_for_state(store, job_id, "done")
+    runner.close()
+
+
+def test_backend_error_fails_the_job(store):
+    runner = make_runner(store, FakeClient(error=ApiError(401, "Invalid API key")))
+    job_id = runner.submit("me", "key", "dentist", "Boston", 3)
+    wait_for_state(store, job_id, "failed")
+    assert store.get(job_id)["error"] == "HTTP 401: Invalid API key"
+    runner.close()
+
+
+def test_slot_wait_timeout_fails_the_job(store):
+    scheduler = QuotaScheduler(TIERS)
+    held = scheduler.acquire("key", "free")
+    runner = make_runner(store, FakeClient(), scheduler, slot_wait=0.2)
+    job_id = runner.submit("me", "key", "dentist", "Boston", 3)
+    wait_for_state(store, job_id, "failed")
+    assert "try again" in store.get(job_id)["error"]
+    scheduler.release(held, charged=False)
+    runner.close()
+
+
+def test_recover_leaves_jobs_with_a_live_lease_alone(store):
+    live = store.create("me", "dentist", "Boston", 3, "free", worker="other-process")
+    stale = store.create("me", "dentist", "Boston", 3, "free", worker="dead-process")
+    store.update(stale, heartbeat=time.time() - 600)
+    store.recover(lease=120)
+    assert store.get(live)["state"] == "queued"
+    assert store.get(stale)["state"] == "interrupted"
+
+
+def test_heartbeat_renews_a_workers_lease(store):
+    job_id = store.create("me", "dentist", "Boston", 3, "free", worker="w1")
+    store.update(job_id, heartbeat=time.time() - 600)
+    store.heartbeat("w1")
+    store.recover(lease=120)
+    assert store.get(job_id)["state"] == "queued"
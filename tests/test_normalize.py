@@ -0,0 +1,41 @@
+import pandas as pd
+
+from scraper.frame import build_frame
+from scraper.normalize import NORMALIZED_COLUMNS, normalize_emails, normalize_phones, registrable_domains
+
+
+def test_emails():
+    email, role = normalize_emails(pd.Series([" Info@Example.com ", "jane.doe@example.com", "not-an-email", None]))
+    assert email.tolist()[:2] == ["info@example.com", "jane.doe@example.com"]
+    assert email.isna().tolist() == [False, False, True, True]
+    assert role.tolist() == [True, False, False, False]
+
+
+def test_phones():
+    phones = pd.Series(["(212) 555-1234", "1-212-555-1234", "+44 20 7946 0958", "0044 20 7946 0958", "020 7946 0958",
+                        "12", None])
+    countries = pd.Series(["us", "us", None, None, "uk", "us", "us"])
+    out = normalize_phones(phones, countries)
+    assert out.tolist()[:5] == ["+12125551234", "+12125551234", "+442079460958", "+442079460958", "+442079460958"]
+    assert out.isna().tolist()[5:] == [True, True]
+
+
+def test_registrable_domains():
+    websites = pd.Series(["https://www.example.com/about", "shop.example.co.uk", "http://a.b.example.com:8080",
+                          "mailto", None])
+    out = registrable_domains(websites)
+    assert out.tolist()[:3] == ["example.com", "example.co.uk", "example.com"]
+    assert out.isna().tolist()[3:] == [True, True]
+
+
+def test_build_frame_adds_normalized_columns():
+    df = build_frame([{"name": "A", "email": "Info@A.com", "phone": "(212) 555-1234", "website": "www.a.com"}])
+    assert set(NORMALIZED_COLUMNS) <= set(df.columns)
+    assert df.loc[0, "domain"] == "a.com"
+    assert df.loc[0, "phone_e164"] == "+12125551234"
+
+
+def test_build_frame_joins_list_categories():
+    df = build_frame([{"name": "A", "category": ["Dentist", "Clinic"]}, {"name": "B", "category": "Dentist"}])
+    assert df["category"].dtype == "category"
+    assert df["category"].tolist() == ["Dentist, Clinic", "Dentist"]
@@ -0,0 +1,84 @@
+import threading
+
+from scraper.pager import CursorPager
+
+PAGE_SIZE = 3
+TOTAL = 10
+
+
+def lead(i):
+    return {"name": f"Lead {i}", "email": f"lead{i}@example.com" if i % 2 else None, "phone": "555"}
+
+
+def page_data(index):
+    leads = [lead(i) for i in range(index * PAGE_SIZE, min((index + 1) * PAGE_SIZE, TOTAL))]
+    data = {"results": leads}
+    if (index + 1) * PAGE_SIZE < TOTAL:
+        data["next_cursor"] = f"c{index + 1}"
+    return data
+
+
+class CursorClient:
+    def __init__(self):
+        self.fetches = []
+        self._lock = threading.Lock()
+
+    def results_page(self, api_key, cursor):
+        index = int(cursor[1:])
+        with self._lock:
+            self.fetches.append(index)
+        return page_data(index)
+
+
+def make_pager(**kwargs):
+    client = CursorClient()
+    return client, CursorPager(client, "key", page_data(0), PAGE_SIZE, **kwargs)
+
+
+def test_rows_span_server_pages():
+    _, pager = make_pager()
+    assert [row["name"] for row in pager.rows(2, 7)] == [f"Lead {i}" for i in range(2, 7)]
+    pager.close()
+
+
+def test_iter_all_reaches_the_end_and_learns_the_total():
+    _, pager = make_pager(window=2)
+    assert [row["name"] for row in pager.iter_all()] == [f"Lead {i}" for i in range(TOTAL)]
+    assert pager.exhausted and pager.total == TOTAL
+    assert pager.emails_found == TOTAL // 2
+    pager.close()
+
+
+def test_evicted_pages_are_refetched_and_counted_once():
+    client, pager = make_pager(window=1)
+    list(pager.iter_all())
+    fetched = pager.fetched
+    assert pager.get_page(1)[0]["name"] == "Lead 3"
+    assert client.fetches.count(1) >= 2
+    assert pager.fetched == fetched == TOTAL
+    pager.close()
+
+
+def test_keep_numbers_rows_through_kept_leads():
+    indexed = []
+    _, pager = make_pager(keep=lambda leads: [l for l in leads if l["email"]], on_page=indexed.extend)
+    kept = [f"Lead {i}" for i in range(1, TOTAL, 2)]
+    # Slices are contiguous even though filtered pages are short
+    assert [row["name"] for row in pager.rows(0, 3)] == kept[0:3]
+    assert [row["name"] for row in pager.rows(3, 6)] == kept[3:5]
+    assert pager.page(2, 4)["#"].tolist() == [3, 4]
+    assert pager.exhausted
+    assert pager.total == pager.row_count == pager.fetched == len(kept)
+    assert pager.suppressed == TOTAL - len(kept)
+    assert [row["name"] for row in pager.iter_all()] == kept
+    assert len(indexed) == TOTAL  # the lead index still sees every lead
+    pager.close()
+
+
+def test_row_count_is_an_upper_bound_until_the_end():
+    _, pager = make_pager(keep=lambda leads: leads[:1])
+    assert pager.total is None
+    assert pager.row_count >= 1
+    assert [row["name"] for row in pager.rows(0, 10)] == ["Lead 0", "Lead 3", "Lead 6", "Lead 9"]
+    assert pager.total == pager.row_count == 4
+    pager.close()
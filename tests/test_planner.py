@@ -0,0 +1,40 @@
+from datetime import datetime, timezone
+
+from scraper.planner import PRIOR_FILL, plan_searches
+
+PAIRS = [("dentist", city) for city in ("Boston", "Austin", "Denver", "Miami", "Seattle", "Portland")]
+PER_SEARCH = PRIOR_FILL * 20  # expected leads of a full free-plan search with no history
+
+
+def at(day, hour=0):
+    return datetime(2026, 1, day, hour, tzinfo=timezone.utc)
+
+
+def test_searches_past_the_daily_cap_move_to_the_next_days():
+    plan = plan_searches(PAIRS[:5], 1000, "free", {"daily": 2, "monthly": 10}, resets={"daily": at(2)})
+    assert [step["day"] for step in plan["steps"]] == [0, 0, 1, 1, 1]
+    assert [step["at"] for step in plan["steps"]] == [None, None, at(2), at(2), at(2)]
+    assert all(step["count"] == 20 for step in plan["steps"])
+    assert plan["searches"] == 5
+    assert plan["shortfall"] == round(1000 - 5 * PER_SEARCH, 1)
+
+
+def test_month_renews_partway_through_the_plan():
+    resets = {"daily": at(30), "monthly": at(31)}
+    plan = plan_searches(PAIRS, 1000, "free", {"daily": 3, "monthly": 1}, resets=resets)
+    # One search left this month, none on the 30th, a fresh month from the 31st
+    assert [step["day"] for step in plan["steps"]] == [0, 2, 2, 2, 3, 3]
+    assert plan["steps"][1]["at"] == at(31)
+
+
+def test_shortfall_and_skipped_pairs_are_reported():
+    plan = plan_searches(PAIRS[:3], 20, "free", {"daily": 1, "monthly": 1})
+    assert plan["searches"] == 1
+    assert plan["shortfall"] == round(20 - PER_SEARCH, 1)
+    assert [skip["reason"] for skip in plan["skipped"]] == ["no quota left", "no quota left"]
+
+    plan = plan_searches(PAIRS[:3], 10, "free", {"daily": 3, "monthly": 10})
+    # One search sized to the target is enough
+    assert [step["count"] for step in plan["steps"]] == [13]
+    assert plan["shortfall"] == 0
+    assert [skip["reason"] for skip in plan["skipped"]] == ["not needed", "not needed"]
@@ -0,0 +1,68 @@
+import threading
+
+import pytest
+
+from scraper.config import DEFAULT_API_KEY
+from scraper.quota import Cancelled, QuotaExceeded, QuotaScheduler, Throttled, cap_count
+
+
+def test_free_key_is_scheduled_per_scope():
+    scheduler = QuotaScheduler()
+    alice, bob = scheduler.scoped("alice"), scheduler.scoped("bob")
+    first = alice.acquire(DEFAULT_API_KEY, "free", timeout=0.1)
+    # Another free user isn't held up by Alice's search...
+    second = bob.acquire(DEFAULT_API_KEY, "free", timeout=0.1)
+    # ...but Alice's own second search waits for her slot
+    with pytest.raises(Throttled):
+        alice.acquire(DEFAULT_API_KEY, "free", timeout=0.1)
+    alice.release(first)
+    bob.release(second)
+    assert alice.remaining(DEFAULT_API_KEY, "free")["daily"] == 2
+    assert bob.remaining(DEFAULT_API_KEY, "free")["daily"] == 2
+
+
+def test_own_keys_are_shared_across_scopes():
+    scheduler = QuotaScheduler()
+    ticket = scheduler.scoped("tab-1").acquire("paid-key", "free", timeout=0.1)
+    with pytest.raises(Throttled):
+        scheduler.scoped("tab-2").acquire("paid-key", "free", timeout=0.1)
+    scheduler.release(ticket)
+    assert scheduler.scoped("tab-2").remaining("paid-key", "free")["daily"] == 2
+
+
+def test_check_counts_usage_and_searches_in_flight():
+    scheduler = QuotaScheduler()
+    scheduler.observe("key", "starter", usage={"daily": 48, "monthly": 48})
+    ticket = scheduler.acquire("key", "starter")
+    scheduler.check("key", "starter", needed=1)
+    with pytest.raises(QuotaExceeded) as error:
+        scheduler.check("key", "starter", needed=2)
+    assert (error.value.period, error.value.remaining) == ("daily", 1)
+    scheduler.release(ticket)
+    assert scheduler.remaining("key", "starter") == {"daily": 1, "monthly": 251}
+
+
+def test_failed_search_is_not_charged():
+    scheduler = QuotaScheduler()
+    with pytest.raises(RuntimeError):
+        with scheduler.slot("key", "pro"):
+            raise RuntimeError("backend down")
+    assert scheduler.remaining("key", "pro")["daily"] == 100
+
+
+def test_cancel_ends_the_wait():
+    scheduler = QuotaScheduler()
+    held = scheduler.acquire("key", "free")
+    cancel = threading.Event()
+    threading.Timer(0.1, cancel.set).start()
+    with pytest.raises(Cancelled):
+        scheduler.acquire("key", "free", timeout=5, cancel=cancel)
+    scheduler.release(held, charged=False)
+
+
+def test_cap_count():
+    assert cap_count(10_000, "free") == 20
+    assert cap_count(0, "pro") == 1
+    assert cap_count(150, "enterprise") == 150
+    assert cap_count(10_000, "free", paged=True) == 100
+    assert cap_count(1050, "pro", paged=True) == 1050
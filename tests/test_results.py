@@ -0,0 +1,64 @@
+import os
+import sys
+
+import pandas as pd
+
+from scraper.results import ArrowFrame, ResultStore
+
+LEADS = [{"name": f"Lead {i}", "email": f"lead{i}@example.com" if i % 2 else None, "phone": "555",
+          "rating": 4.5, "city": "Boston"} for i in range(30)]
+STATES = ["new" if i % 3 else "seen" for i in range(30)]
+
+
+def pages(frame):
+    return frame.page(0, frame.row_count).reset_index(drop=True)
+
+
+def spilled_store(tmp_path, leads=LEADS):
+    """A store whose set "a" was spilled, and a's frames as built before the spill."""
+    # A one-byte budget keeps only the most recent entry in memory
+    store = ResultStore(budget=1, spill_dir=str(tmp_path))
+    store.put("a", leads, STATES)
+    before = pages(store.frame("a")), pages(store.frame("a", only_new=True))
+    store.put("b", LEADS[:5])
+    return store, before
+
+
+def test_spilled_set_serves_the_same_frames(tmp_path):
+    store, (full, new) = spilled_store(tmp_path)
+    assert store.stats()["spills"] == 1
+    assert os.listdir(store.spill_dir) == ["a.arrow"]
+    frame = store.frame("a")
+    assert isinstance(frame, ArrowFrame)
+    pd.testing.assert_frame_equal(pages(frame), full)
+    assert (frame.emails_found, frame.phones_found) == (15, 30)
+    pd.testing.assert_frame_equal(pages(store.frame("a", only_new=True)), new)
+    assert len(new) == STATES.count("new")
+
+
+def test_release_removes_the_spill_file(tmp_path):
+    store, _ = spilled_store(tmp_path)
+    store.release("a")
+    assert "a" not in store
+    assert os.listdir(store.spill_dir) == []
+    assert store.frame("a") is None
+
+
+def test_mixed_column_types_spill_to_json_lines(tmp_path):
+    leads = [dict(lead, rating="4.5" if i % 2 else 4.5) for i, lead in enumerate(LEADS)]
+    store, (full, new) = spilled_store(tmp_path, leads)
+    assert os.listdir(store.spill_dir) == ["a.jsonl"]
+    pd.testing.assert_frame_equal(pages(store.frame("a")), full)
+    pd.testing.assert_frame_equal(pages(store.frame("a", only_new=True)), new)
+
+
+def test_spills_to_json_lines_without_pyarrow(tmp_path, monkeypatch):
+    store = ResultStore(budget=1, spill_dir=str(tmp_path))
+    store.put("a", LEADS, STATES)
+    full = pages(store.frame("a"))
+    with monkeypatch.context() as patch:
+        patch.setitem(sys.modules, "pyarrow", None)  # import fails
+        store.put("b", LEADS[:5])
+    assert store.stats()["spills"] == 1
+    assert os.listdir(store.spill_dir) == ["a.jsonl"]
+    pd.testing.assert_frame_equal(pages(store.frame("a")), full)
@@ -0,0 +1,83 @@
+from scraper.leads import LeadStore, content_hash, lead_fingerprint
+from scraper.quota import QuotaScheduler, TIERS
+from scraper.search import run_batch, run_refresh, run_search, start_paged_search
+
+
+class RecordingClient:
+    def __init__(self):
+        self.counts = []
+
+    def iter_scrape(self, api_key, keyword, location, count, stream=True, since=None):
+        self.counts.append(count)
+        yield "summary", {"returned": 0}
+
+    def scrape_page(self, api_key, keyword, location, count, page_size):
+        self.counts.append(count)
+        return {"results": [], "usage": {"daily": 1, "monthly": 1}}
+
+
+class LeadsClient:
+    def __init__(self, leads, summary=None):
+        self.leads = leads
+        self.summary = summary or {"returned": len(leads)}
+        self.since = []
+
+    def iter_scrape(self, api_key, keyword, location, count, stream=True, since=None):
+        self.since.append(since)
+        for lead in self.leads:
+            yield "lead", dict(lead)
+        yield "summary", self.summary
+
+
+KEPT = {"name": "Kept Dental", "phone": "(212) 555-0001", "email": "hi@kept.com"}
+EDITED = {"name": "Edited Dental", "phone": "(212) 555-0002", "email": "old@edited.com"}
+GONE = {"name": "Gone Dental", "phone": "(212) 555-0003"}
+ADDED = {"name": "Added Dental", "phone": "(212) 555-0004"}
+
+
+def refresh(leads, summary=None, since=None):
+    store = LeadStore(":memory:")
+    store.merge([KEPT, EDITED, GONE])
+    previous_keys = [lead_fingerprint(lead) for lead in (KEPT, EDITED, GONE)]
+    client = LeadsClient(leads, summary)
+    outcome = run_refresh(client, "key", "dentist", "Boston", 20, previous_keys, "pro", store=store, since=since)
+    return client, store, outcome
+
+
+def test_refresh_keeps_only_new_and_changed_leads():
+    edited = {**EDITED, "email": "new@edited.com"}
+    # ADDED comes back twice in one answer; it is counted and kept once
+    _, store, outcome = refresh([KEPT, edited, ADDED, ADDED])
+    assert [lead["name"] for lead in outcome["results"]] == ["Edited Dental", "Added Dental"]
+    assert outcome["lead_states"] == ["changed", "new"]
+    assert outcome["changes"] == {"new": 1, "changed": 1, "unchanged": 1, "removed": 1}
+    assert len(outcome["fetched"]) == 4
+    assert outcome["lead_keys"] == [lead_fingerprint(lead) for lead in (KEPT, EDITED, ADDED)]
+    stored = store.hashes([lead_fingerprint(edited), lead_fingerprint(ADDED)])
+    assert stored == {lead_fingerprint(edited): content_hash(edited), lead_fingerprint(ADDED): content_hash(ADDED)}
+
+
+def test_delta_refresh_keeps_the_previous_keys():
+    client, _, outcome = refresh([ADDED], summary={"returned": 1, "delta": True}, since="2026-01-01T00:00:00Z")
+    assert client.since == ["2026-01-01T00:00:00Z"]
+    assert outcome["lead_states"] == ["new"]
+    # A delta answer doesn't list unchanged leads, so nothing can be called removed
+    assert outcome["changes"] == {"new": 1, "changed": 0, "unchanged": 0, "removed": None}
+    assert outcome["lead_keys"] == [lead_fingerprint(lead) for lead in (KEPT, EDITED, GONE, ADDED)]
+
+
+def test_searches_ask_for_at_most_the_plan_cap():
+    client = RecordingClient()
+    free_max = TIERS["free"]["max_count"]
+    run_search(client, "key", "dentist", "Boston", 10_000, "free", flights=None)
+    start_paged_search(client, "key", "dentist", "Boston", 10_000, 100, "free")
+    run_batch(client, "key", [{"keyword": "dentist", "location": "Boston", "count": 10_000}], "free")
+    run_search(client, "key", "dentist", "Boston", 10_000, "enterprise", flights=None)
+    assert client.counts == [free_max, TIERS["free"]["max_paged_count"], free_max, TIERS["enterprise"]["max_count"]]
+
+
+def test_paged_search_takes_a_slot_and_records_usage():
+    client = RecordingClient()
+    scheduler = QuotaScheduler()
+    start_paged_search(client, "key", "dentist", "Boston", 50, 100, "pro", scheduler=scheduler)
+    assert scheduler.remaining("key", "pro")["daily"] == TIERS["pro"]["daily"] - 1
@@ -0,0 +1,47 @@
+import io
+
+from scraper.suppression import SuppressionList
+
+
+def build(tmp_path, text):
+    suppression = SuppressionList(str(tmp_path))
+    info = suppression.build(io.BytesIO(text.encode("utf-8")), "dnc.txt")
+    return suppression, info
+
+
+LEADS = [
+    {"name": "A", "email": "Info@Blocked.com", "phone": "(212) 555-0001"},
+    {"name": "B", "email": "jane@ok.com", "phone": "212-555-0002", "website": "https://shop.listed.co.uk/x"},
+    {"name": "C", "email": "bob@mail.listed-by-email.com"},
+    {"name": "D", "phone": "+1 212 555 0003"},
+    {"name": "E", "email": "fine@ok.com", "phone": "(212) 555-0009", "website": "ok.com"},
+]
+
+
+def test_build_counts_entries_by_kind(tmp_path):
+    _, info = build(tmp_path, "email,phone\ninfo@blocked.com;listed.co.uk\nlisted-by-email.com\n2125550003\n\n")
+    assert (info["emails"], info["domains"], info["phones"]) == (1, 2, 1)
+    assert info["entries"] == 4
+
+
+def test_filter_drops_leads_matching_any_field(tmp_path):
+    suppression, _ = build(tmp_path, "info@blocked.com\nlisted.co.uk\nlisted-by-email.com\n2125550003\n")
+    kept, states, count = suppression.filter(LEADS, ["new"] * len(LEADS))
+    assert [lead["name"] for lead in kept] == ["E"]
+    assert states == ["new"]
+    assert count == 4
+
+
+def test_without_a_list_nothing_is_filtered(tmp_path):
+    suppression = SuppressionList(str(tmp_path))
+    assert suppression.filter(LEADS) == (LEADS, None, 0)
+
+
+def test_rebuild_and_clear_are_picked_up(tmp_path):
+    suppression, _ = build(tmp_path, "info@blocked.com\n")
+    assert suppression.filter(LEADS)[2] == 1
+    suppression.build(io.BytesIO(b"fine@ok.com\njane@ok.com\n"), "other.txt")
+    assert [lead["name"] for lead in suppression.filter(LEADS)[0]] == ["A", "C", "D"]
+    suppression.clear()
+    assert suppression.info() is None
+    assert suppression.filter(LEADS)[2] == 0